@@ -1,20 +1,33 @@
+import os
 import random
-import pyspiel
 import numpy as np
-from collections import defaultdict, deque
-import matplotlib.pyplot as plt
-
-
-# Ambiente de juego
-game = pyspiel.load_game("connect_four")
-
-# Parametros del juego
-num_players = game.num_players()
-num_rows = game.get_parameters()["rows"]
-num_cols = game.get_parameters()["columns"]
-
-# Q-table, se usara un diccionario para asociar estado con accion 
-q_table = defaultdict(lambda: defaultdict(float))
+from bitboard import load_game, NUM_ROWS, NUM_COLS
+from batch_env import BatchConnectFour, epsilon_greedy_batch
+from qtable import QTable, canonical_board_string
+from zobrist import split_zobrist_key
+from keys import state_to_string
+from checkpoint import Checkpointer, resume
+from metrics import Metrics, CSVSink
+from profiler import NULL_PROFILER, PhaseProfiler
+from replay import ReplayBuffer, legal_bits, q_update_batch
+from plots import DEFAULT_OUT_DIR, WIN_RATE_REFS, save_figure, start_renderer, stop_renderer
+
+
+# Simetria izquierda-derecha: si es True una posicion y su espejo comparten fila en la Q-table
+use_symmetry = False
+# Llaves enteras de Zobrist (zobrist.py) en vez del string del tablero
+use_zobrist = False
+
+# Parametros del juego (el ambiente se carga en cada funcion con load_game, no al importar el modulo)
+num_players = 2
+num_rows = NUM_ROWS
+num_cols = NUM_COLS
+
+# Q-table, cada estado se asocia a una fila con los valores de sus acciones (ver qtable.py)
+if use_symmetry:
+    q_table = QTable(num_actions=num_cols, canonical=split_zobrist_key if use_zobrist else canonical_board_string)
+else:
+    q_table = QTable(num_actions=num_cols)
 
 # Hiperparámetros para Q-learning
 alpha = 0.1
@@ -27,24 +40,22 @@ epsilon_min = 0.01
 agent_wins = 0
 agent_losses = 0
 agent_draws = 0
-#Almacenamiento para segmentos de 1000 juegos
-recent_results = deque(maxlen=1000)
+#Almacenamiento para segmentos de 1000 juegos (ventana movil con conteos en O(1), ver metrics.py)
+#Para monitorear en vivo se le agregan sinks: metrics.add_sink(CSVSink("q_learning.csv"))
+metrics = Metrics(window=1000)
+metrics.gauge("epsilon", lambda: epsilon)
+metrics.gauge("states", lambda: len(q_table))
+metrics.counter("states")
 recent_wins = 0
 recent_losses = 0
 recent_draws = 0
+#Perfil por fases del entrenamiento (profiler.py); desactivado salvo que se reemplace por un PhaseProfiler
+profiler = NULL_PROFILER
 
 #Guardado de estadisticas para plotting
 episode_stats = []
 
 
-# Función para obtener la representación del estado como string, usado para el mapeo en la Q-table
-def state_to_string(state):
-    # Si el juego va a acabar, se retorna un string especial 
-    if state.is_terminal():
-        return "terminal"
-    # String para el mapeo de estado -> accion
-    return str(state.observation_string(state.current_player()))
-
 def select_action_epsilon_greedy(state, q_table, epsilon):
     legal_actions = state.legal_actions()
 
@@ -53,7 +64,8 @@ def select_action_epsilon_greedy(state, q_table, epsilon):
         return None
 
     # Transformacion del estado actual a la llave usada en el mapeo
-    state_key = state_to_string(state)
+    with profiler.phase("key"):
+        state_key = state_to_string(state)
 
     # Epsilon es el valor que indica la preferencia entre exploracion y explotacion, se reduce con el tiempo
     # Exploracion 
@@ -61,7 +73,8 @@ def select_action_epsilon_greedy(state, q_table, epsilon):
         return random.choice(legal_actions)
     # Explotacion, hace referencia a los valores guardados en la Q-table
     else:
-        q_values = {action: q_table[state_key].get(action, 0.0) for action in legal_actions}
+        row = q_table.q_values(state_key)
+        q_values = {action: float(row[action]) for action in legal_actions}
 
         # Busca la mejor o mejores acciones para el estado actual dependiendo de los valores q obtenidos al usar la llave de estado actual
         max_q = max(q_values.values())
@@ -71,17 +84,19 @@ def select_action_epsilon_greedy(state, q_table, epsilon):
 
 #Funcion para actualizar los valores guardados en la Q-table usando: Q(s, a) ← Q(s, a) + α * [R + γ * max(Q(s', a')) - Q(s, a)]
 def update_q_value(state, action, recompensa, next_state, q_table, alpha, gamma):
-    state_key = state_to_string(state)
-    next_state_key = state_to_string(next_state) if next_state else "terminal"
+    with profiler.phase("key"):
+        state_key = state_to_string(state)
+        next_state_key = state_to_string(next_state) if next_state else "terminal"
 
     # Q-value actual
-    q_actual = q_table[state_key].get(action, 0.0)
+    with profiler.phase("q_read"):
+        q_actual = q_table.get_value(state_key, action)
 
     # Max Q-value del siguiente estado
     if next_state and not next_state.is_terminal():
         next_legal_actions = next_state.legal_actions()
         if next_legal_actions:
-            next_q = max(q_table[next_state_key].get(a, 0.0) for a in next_legal_actions)
+            next_q = float(q_table.q_values(next_state_key)[next_legal_actions].max())
         else:
             next_q = 0.0
     else:
@@ -89,7 +104,9 @@ def update_q_value(state, action, recompensa, next_state, q_table, alpha, gamma)
 
     # Ecuacion para calcular el valor de Q
     nuevo_q = q_actual + alpha * (recompensa + gamma * next_q - q_actual)
-    q_table[state_key][action] = nuevo_q
+    # La escritura incluye el crecimiento de la tabla cuando el estado es nuevo
+    with profiler.phase("q_write"):
+        q_table.set_value(state_key, action, nuevo_q)
 
 #Funcion para obtener la recompensa de victoria, la funcion del ambiente retorna un valor dependiendo del jugador elegido
 #(Aun que solo importara para el jugador que aprende)
@@ -104,23 +121,95 @@ def get_agent_recompensa(state, agent_player):
 def update_recent_results(result):
     global recent_wins, recent_losses, recent_draws
     
-    recent_results.append(result)
-    
-    # Se usa el deque para guardar los ultimos 1000 resultados
-    recent_wins = recent_results.count(1)
-    recent_losses = recent_results.count(-1)
-    recent_draws = recent_results.count(0)
+    metrics.record_result(result)
+
+    # La ventana movil guarda los ultimos 1000 resultados y mantiene sus conteos
+    recent_wins = metrics.recent.wins
+    recent_losses = metrics.recent.losses
+    recent_draws = metrics.recent.draws
+
+# Imprime el progreso y guarda el winrate reciente para la grafica (episode = juegos terminados)
+def report_progress(episode):
+    # Calcular winrate de los últimos 1000 juegos
+    total_recent = recent_wins + recent_losses + recent_draws
+    if total_recent > 0:
+        recent_win_rate = recent_wins / total_recent * 100
+        recent_loss_rate = recent_losses / total_recent * 100
+        recent_draw_rate = recent_draws / total_recent * 100
+    else:
+        recent_win_rate = recent_loss_rate = recent_draw_rate = 0
+
+    # Valores acumulados
+    total_global = agent_wins + agent_losses + agent_draws
+    if total_global > 0:
+        global_win_rate = agent_wins / total_global * 100
+    else:
+        global_win_rate = 0
+
+    episode_stats.append({
+        'episode': episode,
+        'recent_win_rate': recent_win_rate,
+    })
+
+    print(f"Episodio {episode}: Epsilon={epsilon:.4f}")
+    print(f"  Segmento de 1000 juegos - Victorias: {recent_wins} ({recent_win_rate:.1f}%), "
+          f"Derrotas: {recent_losses} ({recent_loss_rate:.1f}%), "
+          f"Empates: {recent_draws} ({recent_draw_rate:.1f}%)")
+    print(f"  Acumulado - Victorias: {agent_wins}, Derrotas: {agent_losses}, "
+          f"Empates: {agent_draws}, Tasa victorias: {global_win_rate:.1f}%")
+    print(f"  Estados aprendidos: {len(q_table)} ({q_table.bytes_per_state():.0f} bytes por estado)")
+    print("-" * 80)
+
+# Guarda en el checkpoint las entradas modificadas de la Q-table junto con epsilon y los contadores
+def save_checkpoint(checkpointer, episode):
+    checkpointer.checkpoint(episode=episode, epsilon=epsilon, wins=agent_wins, losses=agent_losses, draws=agent_draws)
+
+# Retoma un entrenamiento desde checkpoint_dir; devuelve los juegos ya jugados (0 si no hay checkpoint)
+def restore_checkpoint(checkpoint_dir):
+    global q_table, epsilon, agent_wins, agent_losses, agent_draws
+    tables, counters = resume(checkpoint_dir, canonical=q_table.canonical)
+    if tables is None:
+        return 0
+    q_table = tables["q"]
+    epsilon = counters.get("epsilon", epsilon)
+    agent_wins = counters.get("wins", 0)
+    agent_losses = counters.get("losses", 0)
+    agent_draws = counters.get("draws", 0)
+    return counters.get("episode", 0)
+
+# Tabla de % de victorias contra la cantidad de juegos, guardada como PNG sin abrir ventana (backend Agg)
+# Las graficas en vivo las dibuja otro proceso desde q_learning_metrics.csv (ver plots.py)
+def plot_training_curve(num_episodes, path=os.path.join(DEFAULT_OUT_DIR, "q_learning_entrenamiento.png")):
+    if episode_stats:
+        episodes = [s['episode'] for s in episode_stats]
+        winrates = [s['recent_win_rate'] for s in episode_stats]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        save_figure(path, {"% de victorias": (episodes, winrates)},
+                    f'Progreso del Entrenamiento ({num_episodes} juegos)', 'Episodio', '% de victorias', WIN_RATE_REFS)
+        print(f"Curva de entrenamiento en {path}")
+
 
 # Función principal para el entrenamiento, usa los datos para calcular Q y guarda los avances
-def train_q_learning(num_episodes):
+# engine: "pyspiel" o "bitboard" (motor en Python puro, mas episodios por segundo)
+# verbose: False para no reportar el progreso ni graficar (lo usan los actores de parallel_train)
+# checkpointer: checkpoint.Checkpointer({"q": q_table}) que guarda los cambios y contadores cada checkpoint_every juegos;
+# start_episode: juegos ya jugados al retomar desde un checkpoint
+# decay_epsilon: False deja epsilon fijo durante la llamada (los actores de parallel_train lo fijan por ronda)
+# Devuelve [victorias, derrotas, empates] de los juegos de esta llamada
+def train_q_learning(num_episodes, engine="pyspiel", verbose=True, checkpointer=None, checkpoint_every=10000,
+                     start_episode=0, decay_epsilon=True):
     global epsilon, agent_wins, agent_losses, agent_draws
     global recent_wins, recent_losses, recent_draws
 
+    juego = load_game(engine, zobrist=use_zobrist)
+    results = [0, 0, 0]
+
     # El jugador agente sera el primero en jugar, el primero siempre tiene una ventaja sobre el segundo
     # Uno de los objetivos es encontrar la solucion optima investigada por estudios sobre el juego
     # (El jugador 1 siempre puede ganar o empatar si empieza en el espacio del medio y juega perfectamente)
-    for episode in range(num_episodes):
-        state = game.new_initial_state()
+    for episode in range(start_episode, num_episodes):
+        with profiler.phase("new_state"):
+            state = juego.new_initial_state()
         agent_player = 0
 
         # Guardado de variables del episodio
@@ -134,13 +223,17 @@ def train_q_learning(num_episodes):
             if current_player == agent_player:
                 
                 # Selecciona una accion usando e greedy, dentro de la seleccion se actualizan los valores Q y la tabla
-                action = select_action_epsilon_greedy(state, q_table, epsilon)
+                with profiler.phase("select_action"):
+                    action = select_action_epsilon_greedy(state, q_table, epsilon)
+                metrics.count("states")
 
                 if action is None:
                     break
 
-                prev_state = state.clone()
-                state.apply_action(action)
+                with profiler.phase("clone"):
+                    prev_state = state.clone()
+                with profiler.phase("apply_action"):
+                    state.apply_action(action)
 
                 if not state.is_terminal():
                     episode_history.append((prev_state, action, state))
@@ -148,84 +241,175 @@ def train_q_learning(num_episodes):
                     episode_history.append((prev_state, action, state))
             else:
                 # Turno del oponente, realiza una accion aleatoria
-                legal_actions = state.legal_actions()
-                if legal_actions:
-                    action = random.choice(legal_actions)
-                    state.apply_action(action)
+                with profiler.phase("opponent"):
+                    legal_actions = state.legal_actions()
+                    if legal_actions:
+                        action = random.choice(legal_actions)
+                        state.apply_action(action)
 
         # Calcular recompensa al final del episodio
         recompensa = get_agent_recompensa(state, agent_player)
 
         # Actualizar Q-values para cada transición
-        for prev_state, action, next_state in episode_history:
-            update_q_value(prev_state, action, recompensa, next_state, q_table, alpha, gamma)
+        with profiler.phase("update"):
+            for prev_state, action, next_state in episode_history:
+                update_q_value(prev_state, action, recompensa, next_state, q_table, alpha, gamma)
 
         # Dependiendo de la victoria/perdida/empate, añade los valores a los resultados
         if recompensa == 1.0:
             agent_wins += 1
+            results[0] += 1
             update_recent_results(1)
         elif recompensa == -1.0:
             agent_losses += 1
+            results[1] += 1
             update_recent_results(-1)
         else:
             agent_draws += 1
+            results[2] += 1
             update_recent_results(0)
 
         # Epsilon es el valor de decision de exploracion/explotacion, 
-        epsilon = max(epsilon_min, epsilon * epsilon_decay)
+        if decay_epsilon:
+            epsilon = max(epsilon_min, epsilon * epsilon_decay)
 
         # progreso cada 1000 juegos
-        if (episode + 1) % 1000 == 0:
-            # Calcular winrate de los últimos 1000 juegos
-            total_recent = recent_wins + recent_losses + recent_draws
-            if total_recent > 0:
-                recent_win_rate = recent_wins / total_recent * 100
-                recent_loss_rate = recent_losses / total_recent * 100
-                recent_draw_rate = recent_draws / total_recent * 100
+        if verbose and (episode + 1) % 1000 == 0:
+            report_progress(episode + 1)
+
+        if checkpointer is not None and ((episode + 1) % checkpoint_every == 0 or episode + 1 == num_episodes):
+            with profiler.phase("checkpoint"):
+                save_checkpoint(checkpointer, episode + 1)
+
+        profiler.tick()
+
+    if verbose:
+        plot_training_curve(num_episodes)
+    return results
+
+
+# Entrenamiento en lotes: batch_size partidas avanzan a la vez en BatchConnectFour.
+# El oponente aleatorio y la exploracion epsilon-greedy se muestrean para todo el lote, y al terminar
+# cada partida se aplica la misma actualizacion que train_q_learning (el siguiente estado es terminal, max Q = 0).
+def train_q_learning_batch(num_episodes, batch_size=256, seed=None, verbose=True):
+    global epsilon, agent_wins, agent_losses, agent_draws
+
+    env = BatchConnectFour(batch_size, seed=seed)
+    rng = env.rng
+    agent_player = 0
+
+    # Transiciones (estado, accion) del agente en la partida en curso de cada tablero
+    histories = [[] for _ in range(batch_size)]
+    episode = 0
+
+    while episode < num_episodes:
+        legal = env.legal_mask()
+        actions = env.random_actions(legal)
+
+        agent_rows = np.nonzero(env.current_player() == agent_player)[0]
+        if len(agent_rows):
+            if use_zobrist:
+                keys = env.zobrist_keys(agent_player, agent_rows)
             else:
-                recent_win_rate = recent_loss_rate = recent_draw_rate = 0
-            
-            # Valores acumulados
-            total_global = agent_wins + agent_losses + agent_draws
-            if total_global > 0:
-                global_win_rate = agent_wins / total_global * 100
+                keys = env.observation_strings(agent_rows)
+            q_values = q_table.values_for(keys)
+            agent_actions = epsilon_greedy_batch(q_values, legal[agent_rows], epsilon, rng)
+            actions[agent_rows] = agent_actions
+            metrics.count("states", len(agent_rows))
+            for i, k, a in zip(agent_rows.tolist(), keys, agent_actions.tolist()):
+                histories[i].append((k, a))
+
+        returns, done = env.step(actions)
+
+        for i in np.nonzero(done)[0].tolist():
+            recompensa = float(returns[i])
+            for state_key, action in histories[i]:
+                q_actual = q_table.get_value(state_key, action)
+                q_table.set_value(state_key, action, q_actual + alpha * (recompensa - q_actual))
+            histories[i] = []
+
+            if recompensa == 1.0:
+                agent_wins += 1
+                update_recent_results(1)
+            elif recompensa == -1.0:
+                agent_losses += 1
+                update_recent_results(-1)
             else:
-                global_win_rate = 0
-
-            episode_stats.append({
-                'episode': episode + 1,
-                'recent_win_rate': recent_win_rate,
-            })
-            
-            print(f"Episodio {episode + 1}: Epsilon={epsilon:.4f}")
-            print(f"  Segmento de 1000 juegos - Victorias: {recent_wins} ({recent_win_rate:.1f}%), "
-                  f"Derrotas: {recent_losses} ({recent_loss_rate:.1f}%), "
-                  f"Empates: {recent_draws} ({recent_draw_rate:.1f}%)")
-            print(f"  Acumulado - Victorias: {agent_wins}, Derrotas: {agent_losses}, "
-                  f"Empates: {agent_draws}, Tasa victorias: {global_win_rate:.1f}%")
-            print(f"  Estados aprendidos: {len(q_table)}")
-            print("-" * 80)
-
-    # Tabla de % de victorias contra la cantidad de juegos
-    if episode_stats:
-        episodes = [s['episode'] for s in episode_stats]
-        winrates = [s['recent_win_rate'] for s in episode_stats]
-            
-        plt.figure(figsize=(10, 5))
-        plt.plot(episodes, winrates, 'b-', linewidth=2)
-        plt.xlabel('Episodio')
-        plt.ylabel('% de victorias')
-        plt.title(f'Progreso del Entrenamiento ({num_episodes} juegos)')
-        plt.grid(True, alpha=0.3)
-            
-        # Líneas de referencia para el % de victorias
-        plt.axhline(y=50, color='gray', linestyle='--', alpha=0.5, label='50% (Malo)')
-        plt.axhline(y=75, color='orange', linestyle='--', alpha=0.5, label='75% (Bueno)')
-        plt.axhline(y=90, color='green', linestyle='--', alpha=0.5, label='90% (Excelente)')
-            
-        plt.legend()
-        plt.tight_layout()
-        plt.show()
+                agent_draws += 1
+                update_recent_results(0)
+
+            epsilon = max(epsilon_min, epsilon * epsilon_decay)
+            episode += 1
+            if verbose and episode % 1000 == 0:
+                report_progress(episode)
+
+    if verbose:
+        plot_training_curve(num_episodes)
+
+
+# Entrenamiento con repeticion de experiencia (replay.py): en cada jugada del agente la llave del estado se arma
+# una sola vez y se convierte en su fila de la Q-table; las transiciones (fila, accion, recompensa, fila siguiente,
+# acciones legales siguientes) van a un anillo de arreglos NumPy y, al final de cada juego, se aplican
+# updates_per_episode actualizaciones en lotes de batch_size transiciones muestreadas (cada una se reutiliza varias veces).
+# El siguiente estado de una transicion es la siguiente decision del agente (despues de la respuesta del oponente);
+# la recompensa del juego va en la ultima transicion.
+def train_q_learning_replay(num_episodes, engine="pyspiel", buffer_size=100000, batch_size=128, updates_per_episode=2,
+                            seed=None, verbose=True):
+    global epsilon, agent_wins, agent_losses, agent_draws
+
+    juego = load_game(engine, zobrist=use_zobrist)
+    buffer = ReplayBuffer(buffer_size, seed=seed)
+    agent_player = 0
+
+    for episode in range(num_episodes):
+        state = juego.new_initial_state()
+        prev_row, prev_action = None, None
+
+        while not state.is_terminal():
+            if state.current_player() == agent_player:
+                legal_actions = state.legal_actions()
+                row, flipped = q_table.intern_state(state_to_string(state))
+                if prev_row is not None:
+                    buffer.add(prev_row, prev_action, 0.0, row, legal_bits(legal_actions, flipped))
+
+                # epsilon-greedy sobre la fila (con desempate al azar, como select_action_epsilon_greedy)
+                if random.random() < epsilon:
+                    action = random.choice(legal_actions)
+                else:
+                    q_row = q_table.values[row, ::-1] if flipped else q_table.values[row]
+                    q_legal = q_row[legal_actions]
+                    best = np.flatnonzero(q_legal == q_legal.max())
+                    action = legal_actions[random.choice(best.tolist())]
+                metrics.count("states")
+
+                prev_row, prev_action = row, (num_cols - 1 - action if flipped else action)
+                state.apply_action(action)
+            else:
+                state.apply_action(random.choice(state.legal_actions()))
+
+        recompensa = get_agent_recompensa(state, agent_player)
+        if prev_row is not None:
+            buffer.add(prev_row, prev_action, recompensa)
+        if len(buffer) >= batch_size:
+            for _ in range(updates_per_episode):
+                q_update_batch(q_table, buffer, batch_size, alpha, gamma)
+
+        if recompensa == 1.0:
+            agent_wins += 1
+            update_recent_results(1)
+        elif recompensa == -1.0:
+            agent_losses += 1
+            update_recent_results(-1)
+        else:
+            agent_draws += 1
+            update_recent_results(0)
+
+        epsilon = max(epsilon_min, epsilon * epsilon_decay)
+        if verbose and (episode + 1) % 1000 == 0:
+            report_progress(episode + 1)
+
+    if verbose:
+        plot_training_curve(num_episodes)
 
 
 # Función para evaluar el agente, toma la Q table calculada y solo realiza explotacion
@@ -235,6 +419,7 @@ def evaluate_agent(num_games):
     draws = 0
     estados_primer_movimiento = []
     estados_ultimo_movimiento = []
+    game = load_game("pyspiel", zobrist=use_zobrist)
 
     for game_num in range(num_games):
         state = game.new_initial_state()
@@ -274,35 +459,70 @@ def evaluate_agent(num_games):
 
 
 
-print("Entrenamiento por Q learning")
-train_q_learning(num_episodes=500000)
-
-## Evaluar el agente entrenado en 100 juegos contra un rival aleatorio
-#evaluate_agent(num_games=100)
-
-# Realizar un juego de ejemplo
-print("\nJuego de ejemplo:")
-state = game.new_initial_state()
-step = 0
-
-while not state.is_terminal():
-    step += 1
-    print(f"\nPaso {step}")
-    print(f"Tablero:\n{state}")
-
-    legal_actions = state.legal_actions()
-    print(f"Acciones legales: {legal_actions}")
+# Entrenamiento completo con checkpoints y un juego de ejemplo (python Q_learning.py o python -m conecta4 q_learning)
+def main():
+    global profiler
+    print("Entrenamiento por Q learning")
+    # Checkpoints incrementales: si el entrenamiento se corta, al volver a correrlo sigue desde el ultimo
+    checkpoint_dir = "checkpoints_q_learning"
+    start_episode = restore_checkpoint(checkpoint_dir)
+    if start_episode:
+        print(f"Retomando desde el juego {start_episode}")
+    checkpointer = Checkpointer(checkpoint_dir, {"q": q_table})
+    # Metricas en vivo (ventana de 1000 juegos, juegos/s, estados/s, epsilon y tamano de la tabla) cada 10 s
+    metrics.flush_interval = 10.0
+    # (si el CSV de una corrida anterior tiene otras columnas, el sink escribe en q_learning_metrics.1.csv)
+    csv_sink = CSVSink("q_learning_metrics.csv", metrics.fields())
+    metrics.add_sink(csv_sink)
+    # Graficas en vivo: otro proceso relee el CSV y regenera los PNG en Gráficas/ (el entrenamiento no grafica)
+    live_plots = True
+    renderer = start_renderer(csv_sink.path) if live_plots else None
+    # Perfil por fases: tabla cada 10000 juegos y pilas para flamegraph en q_learning.folded
+    profile_phases = False
+    if profile_phases:
+        profiler = PhaseProfiler("train_q_learning", report_every=10000, folded_path="q_learning.folded")
+    # Repeticion de experiencia (train_q_learning_replay): sin clones por jugada y actualizaciones en lotes (sin checkpoints)
+    use_replay = False
+    if use_replay:
+        train_q_learning_replay(num_episodes=500000)
+    else:
+        train_q_learning(num_episodes=500000, checkpointer=checkpointer, start_episode=start_episode)
+    checkpointer.close()
+    metrics.close()
+    profiler.close()
+    if renderer is not None:
+        stop_renderer(renderer)
+
+    ## Evaluar el agente entrenado en 100 juegos contra un rival aleatorio
+    #evaluate_agent(num_games=100)
+
+    # Realizar un juego de ejemplo
+    print("\nJuego de ejemplo:")
+    state = load_game("pyspiel", zobrist=use_zobrist).new_initial_state()
+    step = 0
+
+    while not state.is_terminal():
+        step += 1
+        print(f"\nPaso {step}")
+        print(f"Tablero:\n{state}")
+
+        legal_actions = state.legal_actions()
+        print(f"Acciones legales: {legal_actions}")
+
+        #Agente
+        if state.current_player() == 0:
+            action = select_action_epsilon_greedy(state, q_table, 0.0)
+            print(f"Agente juega columna: {action}")
+        # Oponente aleatorio
+        else:  
+            action = random.choice(legal_actions) if legal_actions else None
+            print(f"Oponente juega columna: {action}")
+
+        if action is not None:
+            state.apply_action(action)
 
-    #Agente
-    if state.current_player() == 0:
-        action = select_action_epsilon_greedy(state, q_table, 0.0)
-        print(f"Agente juega columna: {action}")
-    # Oponente aleatorio
-    else:  
-        action = random.choice(legal_actions) if legal_actions else None
-        print(f"Oponente juega columna: {action}")
+    print(f"\nJuego terminado! Resultado: {state.returns()}")
 
-    if action is not None:
-        state.apply_action(action)
 
-print(f"\nJuego terminado! Resultado: {state.returns()}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
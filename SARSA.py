@@ -1,25 +1,29 @@
 import random
 from collections import defaultdict
 import numpy as np
-import pyspiel
 import time
-import pickle
-import os
-
-
-def state_to_key(state, player):
-    obs = np.array(state.observation_tensor(player), dtype=np.int8)
-    return b"p:" + bytes([player]) + b"obs:" + obs.tobytes()
+from bitboard import load_game
+from batch_env import BatchConnectFour, epsilon_greedy_batch
+from qtable import QTable, canonical_obs_key
+from zobrist import split_zobrist_key
+from qtable_file import load_qtable, save_qtable
+from checkpoint import Checkpointer, resume
+from metrics import Metrics, StdoutSink
+from profiler import NULL_PROFILER, PhaseProfiler
+from keys import state_to_key
 
 #epsilon-greedy como politica
 def epsilon_greedy_action(Q, state_key, legal_actions, epsilon):
     if random.random() < epsilon:
         return random.choice(legal_actions)
 
+    # Con QTable se leen los 7 valores del estado de una sola vez
+    q_row = Q.q_values(state_key).tolist() if isinstance(Q, QTable) else None
+
     best_val = -np.inf
     best_actions = []
     for a in legal_actions:
-        val = Q.get((state_key, a), 0.0)
+        val = q_row[a] if q_row is not None else Q.get((state_key, a), 0.0)
         if val > best_val:
             best_val = val
             best_actions = [a]
@@ -30,6 +34,14 @@ def epsilon_greedy_action(Q, state_key, legal_actions, epsilon):
 
 
 
+# Metricas de un entrenamiento: las entregadas por el usuario o, si no hay, unas propias que con verbose
+# se imprimen cada 10 s (juegos/s, estados/s, ventana de 1000 juegos, epsilon y tamano de Q)
+def _training_metrics(metrics, verbose):
+    if metrics is not None:
+        return metrics, False
+    return Metrics(sinks=[StdoutSink()] if verbose else [], flush_interval=10.0), True
+
+
 #ENTRENAMIENTO VS RANDOM
 def train_sarsa_vs_random(num_episodes=5000,
                           alpha=0.1,
@@ -38,9 +50,26 @@ def train_sarsa_vs_random(num_episodes=5000,
                           epsilon_end=0.05,
                           epsilon_decay_episodes=4000,
                           agent_player=0,
-                          Q=None):
-
-    game = pyspiel.load_game("connect_four")
+                          Q=None,
+                          engine="pyspiel",
+                          zobrist=False,
+                          verbose=True,
+                          checkpointer=None,
+                          checkpoint_every=10000,
+                          start_episode=0,
+                          metrics=None,
+                          profiler=None):
+
+    # engine: "pyspiel" o "bitboard" (motor en Python puro, mas episodios por segundo)
+    # zobrist: llaves enteras de Zobrist en vez de bytes de la observacion
+    # verbose: False para no imprimir el progreso (lo usan los actores de parallel_train)
+    # checkpointer: checkpoint.Checkpointer({"q": Q}) que guarda los cambios cada checkpoint_every episodios;
+    # start_episode: episodios ya jugados al retomar desde un checkpoint (sigue el mismo epsilon)
+    # metrics: metrics.Metrics donde se registran resultados y estados (ver _training_metrics)
+    # profiler: profiler.PhaseProfiler que mide el tiempo de cada fase del ciclo (None = sin medir)
+    game = load_game(engine, zobrist=zobrist)
+    profiler = profiler or NULL_PROFILER
+    phase = profiler.phase
 
     if Q is None:
         Q = defaultdict(float)
@@ -52,34 +81,52 @@ def train_sarsa_vs_random(num_episodes=5000,
         return epsilon_start * (1 - frac) + epsilon_end * frac
 
     stats = {"wins": 0, "losses": 0, "draws": 0}
+    metrics, own_metrics = _training_metrics(metrics, verbose)
+    epsilon = get_epsilon(start_episode + 1)
+    metrics.gauge("epsilon", lambda: epsilon)
+    metrics.gauge("states", lambda: len(Q))
+
+    for ep in range(start_episode + 1, num_episodes + 1):
+        if checkpointer is not None and ep > start_episode + 1 and (ep - 1) % checkpoint_every == 0:
+            with phase("checkpoint"):
+                checkpointer.checkpoint(episode=ep - 1)
+        if ep > start_episode + 1:
+            profiler.tick()
 
-    for ep in range(1, num_episodes + 1):
         epsilon = get_epsilon(ep)
-        state = game.new_initial_state()
+        with phase("new_state"):
+            state = game.new_initial_state()
 
         # El oponente puede empezar
-        while not state.is_terminal() and state.current_player() != agent_player:
-            opp_legal = state.legal_actions(state.current_player())
-            state.apply_action(random.choice(opp_legal))
+        with phase("opponent"):
+            while not state.is_terminal() and state.current_player() != agent_player:
+                opp_legal = state.legal_actions(state.current_player())
+                state.apply_action(random.choice(opp_legal))
 
         if state.is_terminal():
             r = state.returns()[agent_player]
             if r > 0: stats["wins"] += 1
             elif r < 0: stats["losses"] += 1
             else: stats["draws"] += 1
+            metrics.record_result(r)
             continue
 
         # Primer estado del agente
-        s_key = state_to_key(state, agent_player)
-        legal = state.legal_actions(agent_player)
-        a = epsilon_greedy_action(Q, s_key, legal, epsilon)
+        with phase("key"):
+            s_key = state_to_key(state, agent_player)
+        with phase("legal_actions"):
+            legal = state.legal_actions(agent_player)
+        with phase("select_action"):
+            a = epsilon_greedy_action(Q, s_key, legal, epsilon)
+        metrics.count("states")
 
         while True:
             # turno del agente
             #print("\n===== Turno del AGENTE (Player {}) =====".format(agent_player))
             #print("Acción elegida por el agente:", a)
 
-            state.apply_action(a)
+            with phase("apply_action"):
+                state.apply_action(a)
 
             #print("Estado después de la acción del agente:")
             #print(state)
@@ -88,8 +135,14 @@ def train_sarsa_vs_random(num_episodes=5000,
 
             if state.is_terminal():
                 reward = state.returns()[agent_player]
-                old = Q[(s_key, a)]
-                Q[(s_key, a)] = old + alpha * (reward - old)
+                with phase("q_read"):
+                    old = Q[(s_key, a)]
+                with phase("q_write"):
+                    Q[(s_key, a)] = old + alpha * (reward - old)
+                if reward > 0: stats["wins"] += 1
+                elif reward < 0: stats["losses"] += 1
+                else: stats["draws"] += 1
+                metrics.record_result(reward)
 
                 #print("\n>>> El juego terminó después del turno del AGENTE")
                 #print(state)
@@ -97,14 +150,15 @@ def train_sarsa_vs_random(num_episodes=5000,
                 break
 
             # turno del oponente random
-            opp_pid = state.current_player()
-            opp_legal = state.legal_actions(opp_pid)
-            opp_action = random.choice(opp_legal)
+            with phase("opponent"):
+                opp_pid = state.current_player()
+                opp_legal = state.legal_actions(opp_pid)
+                opp_action = random.choice(opp_legal)
 
-            #print("\n===== Turno del OPONENTE (Player {}) =====".format(opp_pid))
-            #print("Acción del oponente:", opp_action)
+                #print("\n===== Turno del OPONENTE (Player {}) =====".format(opp_pid))
+                #print("Acción del oponente:", opp_action)
 
-            state.apply_action(opp_action)
+                state.apply_action(opp_action)
 
             #print("Estado después de la acción del oponente:")
             #print(state)
@@ -112,27 +166,134 @@ def train_sarsa_vs_random(num_episodes=5000,
 
             if state.is_terminal():
                 reward = state.returns()[agent_player]
-                old = Q[(s_key, a)]
-                Q[(s_key, a)] = old + alpha * (reward - old)
+                with phase("q_read"):
+                    old = Q[(s_key, a)]
+                with phase("q_write"):
+                    Q[(s_key, a)] = old + alpha * (reward - old)
+                if reward > 0: stats["wins"] += 1
+                elif reward < 0: stats["losses"] += 1
+                else: stats["draws"] += 1
+                metrics.record_result(reward)
                 #print("\n>>> El juego terminó después del turno del OPONENTE")
                 #print(state)
                 #print("Recompensa final:", reward)
                 break
 
             # SARSA paso intermedio
-            s_prime_key = state_to_key(state, agent_player)
-            legal_prime = state.legal_actions(agent_player)
-            a_prime = epsilon_greedy_action(Q, s_prime_key, legal_prime, epsilon)
-
-            old = Q[(s_key, a)]
-            q_next = Q[(s_prime_key, a_prime)]
-            Q[(s_key, a)] = old + alpha * (gamma * q_next - old)
+            with phase("key"):
+                s_prime_key = state_to_key(state, agent_player)
+            with phase("legal_actions"):
+                legal_prime = state.legal_actions(agent_player)
+            with phase("select_action"):
+                a_prime = epsilon_greedy_action(Q, s_prime_key, legal_prime, epsilon)
+            metrics.count("states")
+
+            with phase("q_read"):
+                old = Q[(s_key, a)]
+                q_next = Q[(s_prime_key, a_prime)]
+            # La escritura incluye el crecimiento de la tabla cuando el estado es nuevo
+            with phase("q_write"):
+                Q[(s_key, a)] = old + alpha * (gamma * q_next - old)
 
             s_key = s_prime_key
             a = a_prime
 
-        if ep % 200 == 0:
-            print(f"EP {ep}")
+    if checkpointer is not None:
+        checkpointer.checkpoint(episode=num_episodes)
+    if num_episodes > start_episode:
+        profiler.tick()
+    if own_metrics:
+        metrics.close()
+
+    return Q, stats
+
+
+#ENTRENAMIENTO VS RANDOM EN LOTES (muchas partidas a la vez con BatchConnectFour)
+def train_sarsa_vs_random_batch(num_episodes=5000,
+                                alpha=0.1,
+                                gamma=0.99,
+                                epsilon_start=0.3,
+                                epsilon_end=0.05,
+                                epsilon_decay_episodes=4000,
+                                agent_player=0,
+                                Q=None,
+                                batch_size=256,
+                                seed=None,
+                                zobrist=False,
+                                verbose=True,
+                                metrics=None):
+    """
+    Mismo SARSA contra oponente aleatorio que train_sarsa_vs_random, pero avanzando `batch_size`
+    partidas por paso: las jugadas del oponente y la exploracion epsilon-greedy se muestrean
+    para todo el lote y la deteccion de fin de partida es vectorizada. Las llaves son las mismas
+    de state_to_key, asi que la Q resultante es intercambiable con la del entrenamiento normal.
+    verbose y metrics como en train_sarsa_vs_random.
+    """
+    if Q is None:
+        Q = defaultdict(float)
+
+    def get_epsilon(ep):
+        if ep >= epsilon_decay_episodes:
+            return epsilon_end
+        frac = ep / float(max(1, epsilon_decay_episodes))
+        return epsilon_start * (1 - frac) + epsilon_end * frac
+
+    env = BatchConnectFour(batch_size, seed=seed)
+    rng = env.rng
+    stats = {"wins": 0, "losses": 0, "draws": 0}
+    metrics, own_metrics = _training_metrics(metrics, verbose)
+    epsilon = get_epsilon(1)
+    metrics.gauge("epsilon", lambda: epsilon)
+    metrics.gauge("states", lambda: len(Q))
+
+    # Ultimo par (estado, accion) del agente en cada tablero, pendiente de actualizar
+    prev_keys = [None] * batch_size
+    prev_actions = [0] * batch_size
+    ep = 0
+
+    while ep < num_episodes:
+        epsilon = get_epsilon(ep + 1)
+        legal = env.legal_mask()
+        actions = env.random_actions(legal)
+
+        # Tableros donde juega el agente: epsilon-greedy en lote y paso intermedio de SARSA
+        agent_rows = np.nonzero(env.current_player() == agent_player)[0]
+        if len(agent_rows):
+            if zobrist:
+                keys = env.zobrist_keys(agent_player, agent_rows)
+            else:
+                keys = env.observation_keys(agent_player, agent_rows)
+            if isinstance(Q, QTable):
+                q_values = Q.values_for(keys)
+            else:
+                q_values = np.array([[Q.get((k, a), 0.0) for a in range(7)] for k in keys])
+            agent_actions = epsilon_greedy_batch(q_values, legal[agent_rows], epsilon, rng)
+            actions[agent_rows] = agent_actions
+            metrics.count("states", len(agent_rows))
+            for i, k, a in zip(agent_rows.tolist(), keys, agent_actions.tolist()):
+                if prev_keys[i] is not None:
+                    old = Q[(prev_keys[i], prev_actions[i])]
+                    Q[(prev_keys[i], prev_actions[i])] = old + alpha * (gamma * Q[(k, a)] - old)
+                prev_keys[i] = k
+                prev_actions[i] = a
+
+        returns, done = env.step(actions)
+
+        # Partidas terminadas: actualizacion final con la recompensa y conteo de resultados
+        for i in np.nonzero(done)[0].tolist():
+            reward = float(returns[i]) if agent_player == 0 else -float(returns[i])
+            if prev_keys[i] is not None:
+                old = Q[(prev_keys[i], prev_actions[i])]
+                Q[(prev_keys[i], prev_actions[i])] = old + alpha * (reward - old)
+                prev_keys[i] = None
+            if reward > 0: stats["wins"] += 1
+            elif reward < 0: stats["losses"] += 1
+            else: stats["draws"] += 1
+            metrics.record_result(reward)
+            ep += 1
+
+    if own_metrics:
+        metrics.close()
 
     return Q, stats
 
@@ -146,9 +307,21 @@ def train_selfplay_sarsa(num_episodes=5000,
                          epsilon_end=0.05,
                          epsilon_decay_episodes=4000,
                          Q0=None,
-                         Q1=None):
-
-    game = pyspiel.load_game("connect_four")
+                         Q1=None,
+                         engine="pyspiel",
+                         zobrist=False,
+                         checkpointer=None,
+                         checkpoint_every=10000,
+                         start_episode=0,
+                         verbose=True,
+                         metrics=None,
+                         profiler=None):
+
+    # checkpointer: checkpoint.Checkpointer({"q0": Q0, "q1": Q1}), igual que en train_sarsa_vs_random
+    # verbose, metrics, profiler: igual que en train_sarsa_vs_random (los resultados son los del jugador 0)
+    game = load_game(engine, zobrist=zobrist)
+    profiler = profiler or NULL_PROFILER
+    phase = profiler.phase
 
     if Q0 is None:
         Q0 = defaultdict(float)
@@ -163,19 +336,29 @@ def train_selfplay_sarsa(num_episodes=5000,
         frac = ep / float(max(1, epsilon_decay_episodes))
         return epsilon_start * (1 - frac) + epsilon_end * frac
 
-    for ep in range(1, num_episodes + 1):
+    metrics, own_metrics = _training_metrics(metrics, verbose)
+    epsilon = get_epsilon(start_episode + 1)
+    metrics.gauge("epsilon", lambda: epsilon)
+    metrics.gauge("states", lambda: len(Q[0]) + len(Q[1]))
+
+    for ep in range(start_episode + 1, num_episodes + 1):
         #print("\n\n==============================")
         #print(f"EPISODIO {ep}")
         #print("==============================\n")
 
-        state = game.new_initial_state()
+        with phase("new_state"):
+            state = game.new_initial_state()
         epsilon = get_epsilon(ep)
 
         # Acción inicial
         p = state.current_player()
-        s_key = state_to_key(state, p)
-        legal = state.legal_actions(p)
-        a = epsilon_greedy_action(Q[p], s_key, legal, epsilon)
+        with phase("key"):
+            s_key = state_to_key(state, p)
+        with phase("legal_actions"):
+            legal = state.legal_actions(p)
+        with phase("select_action"):
+            a = epsilon_greedy_action(Q[p], s_key, legal, epsilon)
+        metrics.count("states")
 
         #print(f"Jugador inicial: Player {p}")
         #print("Estado inicial del tablero:")
@@ -190,7 +373,8 @@ def train_selfplay_sarsa(num_episodes=5000,
             #print(f"\n===== Turno del JUGADOR {p} =====")
             #print(f"Acción tomada: {a}")
 
-            state.apply_action(a)
+            with phase("apply_action"):
+                state.apply_action(a)
 
             #print("Estado después de su acción:")
             #print(state)
@@ -199,8 +383,10 @@ def train_selfplay_sarsa(num_episodes=5000,
             # Si el juego terminó con la jugada de p
             if state.is_terminal():
                 reward = state.returns()
-                old = Q[p][(s_key, a)]
-                Q[p][(s_key, a)] = old + alpha * (reward[p] - old)
+                with phase("q_read"):
+                    old = Q[p][(s_key, a)]
+                with phase("q_write"):
+                    Q[p][(s_key, a)] = old + alpha * (reward[p] - old)
 
                 #print(">>> El juego terminó después del turno del jugador", p)
                 #print("Recompensas:", reward)
@@ -209,17 +395,24 @@ def train_selfplay_sarsa(num_episodes=5000,
 
             # TURNO DEL OTRO JUGADOR
             next_p = state.current_player()
-            s_prime_key = state_to_key(state, next_p)
-            legal_prime = state.legal_actions(next_p)
-            a_prime = epsilon_greedy_action(Q[next_p], s_prime_key, legal_prime, epsilon)
+            with phase("key"):
+                s_prime_key = state_to_key(state, next_p)
+            with phase("legal_actions"):
+                legal_prime = state.legal_actions(next_p)
+            with phase("select_action"):
+                a_prime = epsilon_greedy_action(Q[next_p], s_prime_key, legal_prime, epsilon)
+            metrics.count("states")
 
             #print(f"\n===== Turno del SIGUIENTE JUGADOR {next_p} =====")
             #print(f"Acción elegida: {a_prime}")
 
             # UPDATE SARSA
-            old = Q[p][(s_key, a)]
-            q_next = Q[next_p][(s_prime_key, a_prime)]
-            Q[p][(s_key, a)] = old + alpha * (gamma * q_next - old)
+            with phase("q_read"):
+                old = Q[p][(s_key, a)]
+                q_next = Q[next_p][(s_prime_key, a_prime)]
+            # La escritura incluye el crecimiento de la tabla cuando el estado es nuevo
+            with phase("q_write"):
+                Q[p][(s_key, a)] = old + alpha * (gamma * q_next - old)
 
             #print("\n[Actualización SARSA]")
             #print(f"Old Q: {old}")
@@ -231,41 +424,33 @@ def train_selfplay_sarsa(num_episodes=5000,
             a = a_prime
             p = next_p
 
-        if ep % 200 == 0:
-            print(f"EP {ep}")
-
-    return Q[0], Q[1]
-
-
-def evaluate_policy_random(Q, games=500):
-    """Evalúa Player 0 vs oponente aleatorio usando Q (greedy)."""
-    game = pyspiel.load_game("connect_four")
-    results = {"wins": 0, "losses": 0, "draws": 0}
+        metrics.record_result(state.returns()[0])
+        if checkpointer is not None and ep % checkpoint_every == 0:
+            with phase("checkpoint"):
+                checkpointer.checkpoint(episode=ep)
+        profiler.tick()
 
-    for _ in range(games):
-        state = game.new_initial_state()
+    if checkpointer is not None and num_episodes % checkpoint_every != 0:
+        checkpointer.checkpoint(episode=num_episodes)
+    if own_metrics:
+        metrics.close()
 
-        while not state.is_terminal():
-            if state.current_player() == 0:
-                s_key = state_to_key(state, 0)
-                legal = state.legal_actions(0)
-                a = max(legal, key=lambda x: Q.get((s_key, x), 0.0))
-                state.apply_action(a)
-            else:
-                opp_legal = state.legal_actions(1)
-                state.apply_action(random.choice(opp_legal))
+    return Q[0], Q[1]
 
-            if state.is_terminal():
-                r = state.returns()[0]
-                if r > 0: results["wins"] += 1
-                elif r < 0: results["losses"] += 1
-                else: results["draws"] += 1
 
-    return results
+def evaluate_policy_random(Q, games=500, engine="pyspiel", zobrist=False, num_workers=None, seed=None):
+    """
+    Evalúa Player 0 vs oponente aleatorio usando Q (greedy). Las partidas se reparten entre
+    num_workers procesos (en paralelo desde parallel_eval.PARALLEL_MIN_GAMES partidas por defecto);
+    además de wins/losses/draws el resultado trae el win rate con su intervalo de confianza.
+    """
+    from parallel_eval import evaluate_parallel
+    return evaluate_parallel(Q, games, opponent="random", key_fn=state_to_key, engine=engine, zobrist=zobrist,
+                             alternate=False, num_workers=num_workers, seed=seed)
 
-def evaluate_policy_self(Q0, Q1):
+def evaluate_policy_self(Q0, Q1, engine="pyspiel", zobrist=False):
     """Evalúa Player 0 usando Q0 (greedy) vs Player 1 usando Q1 (greedy)."""
-    game = pyspiel.load_game("connect_four")
+    game = load_game(engine, zobrist=zobrist)
     results = {"wins": 0, "losses": 0, "draws": 0}
 
     Q = [Q0, Q1] 
@@ -300,70 +485,113 @@ def evaluate_policy_self(Q0, Q1):
 
 
 
-if __name__ == "__main__":
+# Entrenamiento (o carga y evaluacion) de SARSA en el modo elegido (python SARSA.py o python -m conecta4 sarsa)
+def main(mode="vs_random"):
     start = time.time()
     games = 1000
     num_episodes = 10000
 
-    #ESCOGER MODO DE ENTRENAMIENTO
-    mode = "vs_random"       #"selfplay" o "vs_random"
+    #ESCOGER MODO DE ENTRENAMIENTO: mode es "vs_random" o "selfplay" (python -m conecta4 sarsa / selfplay)
+    engine = "pyspiel"       #"pyspiel" o "bitboard"
+    symmetric = False        #True: una posicion y su espejo comparten entrada en Q (tabla ~2 veces mas chica)
+    zobrist = False          #True: llaves enteras de Zobrist en vez de bytes de la observacion
+    num_actors = 1           #mas de 1: vs_random con varios procesos que mezclan su Q cada 500 episodios (parallel_train)
+    profile_phases = False   #True: tabla de tiempo por fase cada 1000 episodios y pilas para flamegraph en sarsa_<modo>.folded
+    profiler = PhaseProfiler(f"sarsa_{mode}", report_every=1000, folded_path=f"sarsa_{mode}.folded") if profile_phases else None
+    if symmetric:
+        canonical = split_zobrist_key if zobrist else canonical_obs_key
+    else:
+        canonical = None
+
+    # Las tablas se guardan en formato .qtb (qtable_file.py); un .pkl antiguo se convierte al cargarlo
+    canonical_name = ("zobrist" if zobrist else "obs") if symmetric else ""
 
     if mode == "vs_random":
-        # Intentar cargar Q existente
-        if os.path.exists("q_table_sarsa.pkl"):
-            print("Cargando q_table_sarsa.pkl...")
-            with open("q_table_sarsa.pkl", "rb") as f:
-                data = pickle.load(f)
-            Q = defaultdict(float, data)
+        # Intentar cargar Q existente (mapeada en memoria, solo se usa para evaluar)
+        Q = load_qtable("q_table_sarsa.qtb", canonical=canonical_name)
+        if Q is not None:
+            print("Cargando q_table_sarsa.qtb...")
         else:
-            Q = defaultdict(float)
-            Q, stats = train_sarsa_vs_random(num_episodes=num_episodes,Q=Q)
+            Q = QTable(canonical=canonical)
+            if num_actors > 1:
+                from parallel_train import train_parallel
+                Q, stats = train_parallel("sarsa", num_episodes, num_actors=num_actors, Q=Q, engine=engine, zobrist=zobrist)
+            else:
+                # Checkpoints incrementales: si el entrenamiento se corta, al volver a correrlo sigue desde el ultimo
+                tables, counters = resume("checkpoints_sarsa", canonical=canonical)
+                if tables is not None:
+                    Q = tables["q"]
+                    print(f"Retomando desde el episodio {counters['episode']}")
+                checkpointer = Checkpointer("checkpoints_sarsa", {"q": Q})
+                Q, stats = train_sarsa_vs_random(num_episodes=num_episodes,Q=Q, engine=engine, zobrist=zobrist,
+                                                 checkpointer=checkpointer, start_episode=counters.get("episode", 0),
+                                                 profiler=profiler)
+                checkpointer.close()
             print("Guardando Q...")
-            with open("q_table_sarsa.pkl", "wb") as f:
-                pickle.dump(dict(Q), f)
+            save_qtable(Q, "q_table_sarsa.qtb")
+            print(f"Estados: {len(Q)}, bytes por estado: {Q.bytes_per_state():.1f}")
 
-        print("Eval:", evaluate_policy_random(Q, games=games))
+        print("Eval:", evaluate_policy_random(Q, games=games, engine=engine, zobrist=zobrist))
 
 
     #para el self-play hacen falta dos Q para evitar sobreescritura cuando indeseada
     else:  # SELF-PLAY
-        # Intentar cargar Q0 y Q1
-        if os.path.exists("q0_tabla_sarsa.pkl") and os.path.exists("q1_tabla_sarsa.pkl"):
-            print("Cargando q0_tabla_sarsa.pkl y q1_tabla_sarsa.pkl...")
-            Q0 = defaultdict(float, pickle.load(open("q0_tabla_sarsa.pkl", "rb")))
-            Q1 = defaultdict(float, pickle.load(open("q1_tabla_sarsa.pkl", "rb")))
+        # Intentar cargar Q0 y Q1 (como QTable en memoria: se sigue entrenando con ellas)
+        Q0 = load_qtable("q0_tabla_sarsa.qtb", canonical=canonical_name, mutable=True)
+        Q1 = load_qtable("q1_tabla_sarsa.qtb", canonical=canonical_name, mutable=True)
+        if Q0 is not None and Q1 is not None:
+            print("Cargando q0_tabla_sarsa.qtb y q1_tabla_sarsa.qtb...")
             
             results = {"wins": 0, "losses": 0, "draws": 0}
 
             #Se cambio a asi que se reevalue politica luego de cada juego por que si no todos los juegos eran iguales y eran {"wins": 1000, "losses": 0, "draws": 0}
             #o {"wins": 0, "losses": 1000, "draws": 0} o {"wins": 0, "losses": 0, "draws": 1000}
             for i in range(games):
-                res = evaluate_policy_self(Q0, Q1)
+                res = evaluate_policy_self(Q0, Q1, engine=engine, zobrist=zobrist)
                 results["wins"] += res["wins"]
                 results["losses"] += res["losses"]
                 results["draws"] += res["draws"]
                 Q0, Q1 = train_selfplay_sarsa(
                     num_episodes= int(num_episodes/1000), # menos episodios por evaluación
                     Q0=Q0,
-                    Q1=Q1
+                    Q1=Q1,
+                    engine=engine,
+                    zobrist=zobrist,
+                    verbose=False,
+                    profiler=profiler
                 )
             print("Resultados de evaluación tras cargar Q0/Q1:", results)
         else:
-            Q0 = defaultdict(float)
-            Q1 = defaultdict(float)
+            Q0 = QTable(canonical=canonical)
+            Q1 = QTable(canonical=canonical)
+            tables, counters = resume("checkpoints_selfplay", names=("q0", "q1"), canonical=canonical)
+            if tables is not None:
+                Q0, Q1 = tables["q0"], tables["q1"]
+                print(f"Retomando desde el episodio {counters['episode']}")
+            checkpointer = Checkpointer("checkpoints_selfplay", {"q0": Q0, "q1": Q1})
 
             Q0, Q1 = train_selfplay_sarsa(
                 num_episodes=num_episodes,
                 Q0=Q0,
-                Q1=Q1
+                Q1=Q1,
+                engine=engine,
+                zobrist=zobrist,
+                checkpointer=checkpointer,
+                start_episode=counters.get("episode", 0),
+                profiler=profiler
             )
+            checkpointer.close()
 
             print("Guardando Q0/Q1...")
-            pickle.dump(dict(Q0), open("q0_tabla_sarsa.pkl", "wb"))
-            pickle.dump(dict(Q1), open("q1_tabla_sarsa.pkl", "wb"))
+            save_qtable(Q0, "q0_tabla_sarsa.qtb")
+            save_qtable(Q1, "q1_tabla_sarsa.qtb")
 
-            print("Eval:", evaluate_policy_self(Q0,Q1))
+            print("Eval:", evaluate_policy_self(Q0,Q1, engine=engine, zobrist=zobrist))
 
+    if profiler is not None:
+        profiler.close()
     print("Elapsed:", time.time() - start)
 
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import numpy as np
+from zobrist import ZOBRIST, PLAYER_KEYS
+
+# Ambiente vectorizado: N tableros de Conecta 4 como arreglos de NumPy que avanzan una jugada a la vez
+# (todas las partidas en paralelo), con deteccion de victoria/empate vectorizada y reinicio automatico.
+
+NUM_ROWS = 6
+NUM_COLS = 7
+NUM_CELLS = NUM_ROWS * NUM_COLS
+
+# Valores de las celdas: 0 vacia, 1 ficha del jugador 0, 2 ficha del jugador 1
+EMPTY = 0
+
+
+def _build_windows():
+    """Las 69 lineas de 4 celdas del tablero como indices planos (fila * 7 + columna)."""
+    windows = []
+    for r in range(NUM_ROWS):
+        for c in range(NUM_COLS):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(r + k * dr, c + k * dc) for k in range(4)]
+                if all(0 <= rr < NUM_ROWS and 0 <= cc < NUM_COLS for rr, cc in cells):
+                    windows.append([rr * NUM_COLS + cc for rr, cc in cells])
+    return np.array(windows, dtype=np.int64)
+
+
+WINDOWS = _build_windows()
+
+
+def _build_cell_windows():
+    """
+    Para cada celda, las lineas que pasan por ella (a lo mas 16), rellenadas con una linea
+    "fantasma" que apunta a la celda extra NUM_CELLS, que nunca coincide con una ficha.
+    """
+    per_cell = [[w for w in WINDOWS.tolist() if cell in w] for cell in range(NUM_CELLS)]
+    width = max(len(ws) for ws in per_cell)
+    padded = np.full((NUM_CELLS, width, 4), NUM_CELLS, dtype=np.int64)
+    for cell, ws in enumerate(per_cell):
+        padded[cell, :len(ws)] = ws
+    return padded
+
+
+CELL_WINDOWS = _build_cell_windows()
+
+# Numeros de Zobrist reordenados como tableros [jugador, fila, columna] y su version reflejada
+_ZOBRIST = np.array(ZOBRIST, dtype=np.uint64).transpose(0, 2, 1)
+_ZOBRIST_MIRROR = _ZOBRIST[:, :, ::-1].copy()
+
+# Caracteres de observation_string de pyspiel para cada valor de celda
+_CHARS = np.array([ord("."), ord("x"), ord("o")], dtype=np.uint8)
+
+
+class BatchConnectFour:
+    """
+    N partidas de Conecta 4 simultaneas:
+      - boards: (N, 6, 7) int8 con fila 0 abajo (misma orientacion que observation_tensor)
+      - heights: (N, 7) fichas por columna
+      - num_moves: (N,) jugadas hechas; el jugador en turno es num_moves % 2
+    step() aplica una accion por tablero y, si auto_reset=True, reinicia los tableros terminados.
+    """
+
+    def __init__(self, num_envs, seed=None, auto_reset=True):
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+        # Tableros planos con una celda extra (-1) al final, a la que apuntan las lineas "fantasma"
+        # de CELL_WINDOWS; boards es una vista (N, 6, 7) sobre las primeras 42 celdas
+        self._flat = np.zeros((num_envs, NUM_CELLS + 1), dtype=np.int8)
+        self._flat[:, NUM_CELLS] = -1
+        self.boards = self._flat[:, :NUM_CELLS].reshape(num_envs, NUM_ROWS, NUM_COLS)
+        self.heights = np.zeros((num_envs, NUM_COLS), dtype=np.int8)
+        self.num_moves = np.zeros(num_envs, dtype=np.int16)
+        self.done = np.zeros(num_envs, dtype=bool)
+        self._idx = np.arange(num_envs)
+
+    @classmethod
+    def from_state(cls, state, num_envs, seed=None):
+        """
+        Crea N copias de la posicion `state` (pyspiel, bitboard o ZobristState) a partir de su
+        observation_tensor, sin volver a jugar el historial. `seed` puede ser un np.random.Generator.
+        """
+        env = cls(num_envs, seed=seed, auto_reset=False)
+        obs = np.asarray(state.observation_tensor(0), dtype=np.int8).reshape(3, NUM_ROWS, NUM_COLS)
+        board = obs[0] + 2 * obs[1]
+        env.boards[:] = board
+        env.heights[:] = (board != EMPTY).sum(axis=0)
+        env.num_moves[:] = int((board != EMPTY).sum())
+        env.done[:] = state.is_terminal()
+        return env
+
+    def reset(self, mask=None):
+        """Reinicia todos los tableros, o solo los indicados por la mascara booleana `mask`."""
+        if mask is None:
+            mask = slice(None)
+        self.boards[mask] = EMPTY
+        self.heights[mask] = 0
+        self.num_moves[mask] = 0
+        self.done[mask] = False
+
+    def current_player(self):
+        return self.num_moves % 2
+
+    def legal_mask(self):
+        """(N, 7) bool con las columnas no llenas de cada tablero."""
+        return self.heights < NUM_ROWS
+
+    def random_actions(self, legal=None):
+        """Una accion legal uniforme por tablero, muestreada para todo el lote a la vez."""
+        if legal is None:
+            legal = self.legal_mask()
+        noise = self.rng.random(legal.shape)
+        noise[~legal] = -1.0
+        return noise.argmax(axis=1)
+
+    def step(self, actions):
+        """
+        Aplica `actions` (una columna por tablero) y devuelve (returns, done):
+          - returns: (N,) float32 con la utilidad del jugador 0 (+1 gana, -1 pierde, 0 empate o en curso)
+          - done: (N,) bool con los tableros que terminaron en esta jugada
+        Con auto_reset=True los tableros terminados quedan reiniciados al salir.
+        Con auto_reset=False los tableros ya terminados no se modifican.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        active = ~self.done
+        idx = self._idx[active]
+        cols = actions[active]
+        rows = self.heights[idx, cols].astype(np.int64)
+        movers = self.num_moves[idx] % 2
+        pieces = (movers + 1).astype(np.int8)
+
+        self.boards[idx, rows, cols] = pieces
+        self.heights[idx, cols] += 1
+        self.num_moves[idx] += 1
+
+        # Solo hace falta revisar las lineas que pasan por la celda recien jugada
+        lines = self._flat[idx[:, None, None], CELL_WINDOWS[rows * NUM_COLS + cols]]
+        won = (lines == pieces[:, None, None]).all(axis=2).any(axis=1)
+        full = self.num_moves[idx] == NUM_CELLS
+
+        returns = np.zeros(self.num_envs, dtype=np.float32)
+        returns[idx[won]] = np.where(movers[won] == 0, 1.0, -1.0)
+        done = np.zeros(self.num_envs, dtype=bool)
+        done[idx] = won | full
+
+        if self.auto_reset:
+            self.reset(done)
+        else:
+            self.done |= done
+        return returns, done
+
+    def observation_tensors(self):
+        """(N, 126) int8 con el mismo orden que observation_tensor de pyspiel: [jugador 0, jugador 1, vacias]."""
+        boards = self.boards.reshape(self.num_envs, NUM_CELLS)
+        planes = np.stack([boards == 1, boards == 2, boards == EMPTY], axis=1)
+        return planes.reshape(self.num_envs, 3 * NUM_CELLS).astype(np.int8)
+
+    def observation_keys(self, player, rows=None):
+        """Llaves identicas a SARSA.state_to_key(state, player) para los tableros `rows` (todos si es None)."""
+        obs = self.observation_tensors()
+        if rows is not None:
+            obs = obs[rows]
+        prefix = b"p:" + bytes([player]) + b"obs:"
+        raw = obs.tobytes()
+        size = 3 * NUM_CELLS
+        return [prefix + raw[i * size:(i + 1) * size] for i in range(len(obs))]
+
+    def zobrist_keys(self, player, rows=None):
+        """
+        Llaves identicas a zobrist.ZobristState.state_key(player), calculadas para todo el lote
+        como XOR de los numeros de Zobrist de las fichas presentes.
+        """
+        boards = self.boards if rows is None else self.boards[rows]
+        zero = np.uint64(0)
+        h = np.bitwise_xor.reduce(
+            (np.where(boards == 1, _ZOBRIST[0], zero) ^ np.where(boards == 2, _ZOBRIST[1], zero)).reshape(len(boards), -1),
+            axis=1)
+        hm = np.bitwise_xor.reduce(
+            (np.where(boards == 1, _ZOBRIST_MIRROR[0], zero) ^ np.where(boards == 2, _ZOBRIST_MIRROR[1], zero)).reshape(len(boards), -1),
+            axis=1)
+        flipped = hm < h
+        key = (np.minimum(h, hm) ^ np.uint64(PLAYER_KEYS[player])) << np.uint64(1)
+        return (key | flipped.astype(np.uint64)).tolist()
+
+    def observation_strings(self, rows=None):
+        """Strings identicos a observation_string de pyspiel (fila de arriba primero, 'x'/'o'/'.')."""
+        boards = self.boards if rows is None else self.boards[rows]
+        chars = _CHARS[boards[:, ::-1, :]]
+        newline = np.full(chars.shape[:2] + (1,), ord("\n"), dtype=np.uint8)
+        raw = np.concatenate([chars, newline], axis=2).tobytes()
+        size = NUM_ROWS * (NUM_COLS + 1)
+        return [raw[i * size:(i + 1) * size].decode("ascii") for i in range(len(boards))]
+
+
+def epsilon_greedy_batch(q_values, legal, epsilon, rng):
+    """
+    Epsilon-greedy para todo el lote: q_values y legal son (M, 7). Explora con probabilidad epsilon
+    (accion legal uniforme) y si no toma la mejor accion legal, desempatando al azar.
+    """
+    noise = rng.random(legal.shape)
+    masked_q = np.where(legal, q_values, -np.inf)
+    best = masked_q == masked_q.max(axis=1, keepdims=True)
+    greedy = np.where(best, noise, -1.0).argmax(axis=1)
+    explore_noise = np.where(legal, rng.random(legal.shape), -1.0)
+    explore = explore_noise.argmax(axis=1)
+    return np.where(rng.random(len(legal)) < epsilon, explore, greedy)
+
+
+def batch_rollouts(state, n_rollouts, seed=None):
+    """
+    Juega `n_rollouts` partidas aleatorias desde `state` al mismo tiempo (una por tablero del lote)
+    y devuelve un arreglo (n_rollouts,) con la utilidad final del jugador 0 de cada una.
+    """
+    if state.is_terminal():
+        return np.full(n_rollouts, state.returns()[0], dtype=np.float32)
+    env = BatchConnectFour.from_state(state, n_rollouts, seed=seed)
+    results = np.zeros(n_rollouts, dtype=np.float32)
+    while not env.done.all():
+        returns, _ = env.step(env.random_actions())
+        results += returns
+    return results
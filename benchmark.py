@@ -0,0 +1,318 @@
+import os
+import io
+import sys
+import json
+import time
+import random
+import pickle
+import platform
+import tempfile
+import subprocess
+import contextlib
+
+# Sin ventanas: las funciones de entrenamiento que grafican no deben bloquear el benchmark
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import numpy as np
+import minimax
+from bitboard import load_game
+from batch_env import BatchConnectFour
+from qtable import QTable
+from qtable_file import save_qtable
+from heuristic import threat_evaluation
+from parallel_eval import evaluate_parallel
+
+# Benchmarks reproducibles (semilla fija) de todo el proyecto. Cada benchmark devuelve un dict de medidas
+# y el resultado completo se escribe como JSON para comparar corridas:
+#     python benchmark.py [--quick] [--out resultados.json] [--only plies,keys,...]
+
+SEED = 1234
+
+# Posiciones fijas para la busqueda (historial de columnas desde el tablero vacio)
+SEARCH_POSITIONS = {
+    "apertura": [],
+    "medio_juego": [3, 3, 2, 4, 4, 2, 5, 1],
+    "final": [2, 1, 3, 5, 0, 0, 6, 4, 0, 2, 4, 0, 4, 1, 0, 0, 4, 4, 1, 2, 1, 5],
+}
+
+
+def _seed():
+    random.seed(SEED)
+    np.random.seed(SEED)
+
+
+def _rate(count, seconds):
+    return count / seconds if seconds > 0 else float("inf")
+
+
+def _random_positions(game, n):
+    """n posiciones no terminales de partidas aleatorias (con semilla)."""
+    rng = random.Random(SEED)
+    positions = []
+    while len(positions) < n:
+        state = game.new_initial_state()
+        for _ in range(rng.randrange(0, 30)):
+            if state.is_terminal():
+                break
+            state.apply_action(rng.choice(state.legal_actions()))
+        if not state.is_terminal():
+            positions.append(state)
+    return positions
+
+
+def bench_plies(scale):
+    """Jugadas aleatorias por segundo (como pruebas.py) con cada motor y con el ambiente en lote."""
+    out = {}
+    games = int(2000 * scale)
+    for engine in ("pyspiel", "bitboard"):
+        _seed()
+        game = load_game(engine)
+        plies = 0
+        start = time.perf_counter()
+        for _ in range(games):
+            state = game.new_initial_state()
+            while not state.is_terminal():
+                state.apply_action(random.choice(state.legal_actions()))
+                plies += 1
+        out[f"{engine}_plies_per_sec"] = _rate(plies, time.perf_counter() - start)
+    env = BatchConnectFour(256, seed=SEED)
+    steps = int(2000 * scale)
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.step(env.random_actions())
+    out["batch256_plies_per_sec"] = _rate(steps * 256, time.perf_counter() - start)
+    return out
+
+
+def bench_keys(scale):
+    """Llaves de estado por segundo: SARSA.state_to_key y Q_learning.state_to_string."""
+    from keys import state_to_key, state_to_string
+    out = {}
+    n = int(2000 * scale)
+    repeats = 5
+    for name, engine, zobrist, fn in (
+            ("state_to_key_pyspiel", "pyspiel", False, lambda s: state_to_key(s, s.current_player())),
+            ("state_to_key_bitboard", "bitboard", False, lambda s: state_to_key(s, s.current_player())),
+            ("state_to_key_zobrist", "pyspiel", True, lambda s: state_to_key(s, s.current_player())),
+            ("state_to_string_pyspiel", "pyspiel", False, state_to_string),
+            ("state_to_string_zobrist", "pyspiel", True, state_to_string)):
+        positions = _random_positions(load_game(engine, zobrist=zobrist), n)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for state in positions:
+                fn(state)
+        out[f"{name}_per_sec"] = _rate(n * repeats, time.perf_counter() - start)
+    return out
+
+
+def bench_training(scale):
+    """Episodios de entrenamiento por segundo de cada aprendiz (contra el oponente aleatorio)."""
+    from SARSA import train_sarsa_vs_random, train_sarsa_vs_random_batch
+    import Q_learning
+    out = {}
+    episodes = int(2000 * scale)
+    runs = (
+        ("sarsa_pyspiel", lambda: train_sarsa_vs_random(episodes, Q=QTable(), verbose=False)),
+        ("sarsa_bitboard", lambda: train_sarsa_vs_random(episodes, Q=QTable(), engine="bitboard", verbose=False)),
+        ("sarsa_batch", lambda: train_sarsa_vs_random_batch(episodes, Q=QTable(), seed=SEED, verbose=False)),
+        ("q_learning_pyspiel", lambda: Q_learning.train_q_learning(episodes, verbose=False)),
+        ("q_learning_batch", lambda: Q_learning.train_q_learning_batch(episodes, seed=SEED, verbose=False)),
+    )
+    for name, run in runs:
+        _seed()
+        Q_learning.q_table = QTable()
+        Q_learning.epsilon = 1.0
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+        out[f"{name}_episodes_per_sec"] = _rate(episodes, time.perf_counter() - start)
+    return out
+
+
+def bench_search(scale):
+    """
+    alpha_beta sobre las posiciones fijas con la evaluacion de amenazas (determinista):
+    nodos por segundo y tiempo hasta completar cada profundidad, con y sin tabla de transposicion.
+    """
+    out = {}
+    max_depth = 6 if scale >= 1 else 4
+    original = minimax.alpha_beta
+    nodes = [0]
+
+    # Se cuentan los nodos envolviendo la funcion del modulo (las llamadas recursivas pasan por ella)
+    def counted(*args, **kwargs):
+        nodes[0] += 1
+        return original(*args, **kwargs)
+
+    minimax.alpha_beta = counted
+    try:
+        for engine in ("pyspiel", "bitboard"):
+            game = load_game(engine, zobrist=(engine == "pyspiel"))
+            for use_tt in (False, True):
+                label = f"{engine}{'_tt' if use_tt else ''}"
+                for pos_name, history in SEARCH_POSITIONS.items():
+                    state = game.new_initial_state()
+                    for a in history:
+                        state.apply_action(a)
+                    tt = minimax.TranspositionTable(16 * 1024 * 1024) if use_tt else None
+                    times = {}
+                    nodes[0] = 0
+                    total = 0.0
+                    for depth in range(1, max_depth + 1):
+                        start = time.perf_counter()
+                        counted(state, depth, -float("inf"), float("inf"), state.current_player(),
+                                tt=tt, evaluator=threat_evaluation)
+                        total += time.perf_counter() - start
+                        times[depth] = total
+                    out[f"{label}_{pos_name}_nodes_per_sec"] = _rate(nodes[0], total)
+                    out[f"{label}_{pos_name}_time_to_depth"] = times
+    finally:
+        minimax.alpha_beta = original
+    return out
+
+
+def bench_mcts(scale):
+    """Simulaciones por segundo del MCTSBot de open_spiel y de mcts_c4.ConnectFourMCTS en las posiciones fijas."""
+    from open_spiel.python.algorithms import mcts
+    from mcts_c4 import ConnectFourMCTS
+    out = {}
+    game = load_game("pyspiel")
+    sims = int(1000 * scale)
+    for pos_name, history in SEARCH_POSITIONS.items():
+        state = game.new_initial_state()
+        for a in history:
+            state.apply_action(a)
+        bot = mcts.MCTSBot(game, 2, sims, mcts.RandomRolloutEvaluator(random_state=np.random.RandomState(SEED)),
+                           random_state=np.random.RandomState(SEED))
+        start = time.perf_counter()
+        bot.step(state)
+        seconds = time.perf_counter() - start
+        out[f"openspiel_{pos_name}_sims_per_sec"] = _rate(sims, seconds)
+        # Mismo tiempo de reloj para el bot nativo (termina antes si resuelve la posicion)
+        native = ConnectFourMCTS(max_simulations=None, max_time=seconds, seed=SEED)
+        start = time.perf_counter()
+        done = native.search(state)
+        out[f"native_{pos_name}_sims_per_sec"] = _rate(done, time.perf_counter() - start)
+    return out
+
+
+def _trained_table(episodes):
+    from SARSA import train_sarsa_vs_random
+    _seed()
+    Q, _ = train_sarsa_vs_random(episodes, Q=QTable(), engine="bitboard", verbose=False)
+    return Q
+
+
+def bench_eval(scale):
+    """Partidas de evaluacion por segundo (politica greedy contra aleatorio, un proceso)."""
+    Q = _trained_table(int(2000 * scale))
+    games = int(1000 * scale)
+    start = time.perf_counter()
+    evaluate_parallel(Q, games, num_workers=1, seed=SEED)
+    return {"eval_games_per_sec": _rate(games, time.perf_counter() - start)}
+
+
+_LOAD_SCRIPT = """
+import os, sys, time, pickle
+kind, path = sys.argv[1], sys.argv[2]
+from qtable import QTable
+from qtable_file import open_qtable
+
+def rss():
+    # Memoria residente actual (Linux); en otros sistemas el pico de resource.getrusage
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+before = rss()
+start = time.perf_counter()
+if kind == "pickle":
+    with open(path, "rb") as f:
+        Q = QTable.from_dict(pickle.load(f))
+else:
+    Q = open_qtable(path)
+elapsed = time.perf_counter() - start
+print(elapsed, rss() - before)
+"""
+
+
+def bench_table_load(scale):
+    """Tiempo de carga y memoria residual (RSS) de una Q-table en .pkl y en .qtb, en un proceso nuevo."""
+    Q = _trained_table(int(20000 * scale))
+    out = {"table_states": len(Q)}
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl_path = os.path.join(tmp, "q.pkl")
+        qtb_path = os.path.join(tmp, "q.qtb")
+        with open(pkl_path, "wb") as f:
+            pickle.dump(Q.to_dict(), f)
+        save_qtable(Q, qtb_path)
+        for kind, path in (("pickle", pkl_path), ("qtb", qtb_path)):
+            result = subprocess.run([sys.executable, "-c", _LOAD_SCRIPT, kind, path], cwd=here,
+                                    capture_output=True, text=True, check=True)
+            seconds, rss = result.stdout.split()
+            out[f"{kind}_load_seconds"] = float(seconds)
+            out[f"{kind}_load_rss_bytes"] = int(rss)
+            out[f"{kind}_file_bytes"] = os.path.getsize(path)
+    return out
+
+
+BENCHMARKS = {
+    "plies": bench_plies,
+    "keys": bench_keys,
+    "training": bench_training,
+    "search": bench_search,
+    "mcts": bench_mcts,
+    "eval": bench_eval,
+    "table_load": bench_table_load,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(names=None, scale=1.0):
+    """Ejecuta los benchmarks `names` (todos por defecto) y devuelve el dict que se guarda como JSON."""
+    results = {}
+    for name in names or BENCHMARKS:
+        start = time.perf_counter()
+        results[name] = BENCHMARKS[name](scale)
+        results[name]["bench_seconds"] = time.perf_counter() - start
+        print(f"{name}: {results[name]['bench_seconds']:.1f}s", file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": SEED,
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+
+def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    scale = 0.1 if "--quick" in args else 1.0
+    out_path = args[args.index("--out") + 1] if "--out" in args else None
+    names = args[args.index("--only") + 1].split(",") if "--only" in args else None
+    report = json.dumps(run(names, scale), indent=2)
+    if out_path:
+        with open(out_path, "w") as f:
+            f.write(report + "\n")
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
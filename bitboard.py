@@ -0,0 +1,330 @@
+import random
+
+# Motor de Conecta 4 en Python puro usando bitboards, pensado para reemplazar a los
+# estados de pyspiel en los ciclos de entrenamiento y busqueda (evita cruzar a C++ en cada jugada).
+#
+# Distribucion de bits: cada columna ocupa 7 bits (6 filas + 1 bit centinela siempre en 0),
+# el bit de la celda (fila r, columna c) es c * 7 + r, con r = 0 la fila de abajo.
+#
+#   6 13 20 27 34 41 48   <- centinelas
+#   5 12 19 26 33 40 47
+#   4 11 18 25 32 39 46
+#   3 10 17 24 31 38 45
+#   2  9 16 23 30 37 44
+#   1  8 15 22 29 36 43
+#   0  7 14 21 28 35 42
+
+NUM_ROWS = 6
+NUM_COLS = 7
+NUM_CELLS = NUM_ROWS * NUM_COLS
+COL_BITS = NUM_ROWS + 1
+
+# Mismo valor que usa pyspiel para current_player() en un estado terminal
+TERMINAL_PLAYER = -4
+
+COL_MASK = (1 << NUM_ROWS) - 1
+BOTTOM_MASK = sum(1 << (c * COL_BITS) for c in range(NUM_COLS))
+BOARD_MASK = BOTTOM_MASK * COL_MASK
+
+# Desplazamientos para detectar 4 en linea: vertical, horizontal y las dos diagonales
+_DIRECTIONS = (1, COL_BITS, COL_BITS - 1, COL_BITS + 1)
+
+# Simbolos usados por pyspiel en observation_string / str(state)
+_SYMBOLS = ("x", "o")
+
+# Indice en el plano de observacion (r * 7 + c) de cada bit del tablero
+_BIT_TO_CELL = {c * COL_BITS + r: r * NUM_COLS + c for c in range(NUM_COLS) for r in range(NUM_ROWS)}
+
+# Bit del tablero de cada celda (r * 7 + c) del plano de observacion
+_CELL_TO_BIT = [c * COL_BITS + r for r in range(NUM_ROWS) for c in range(NUM_COLS)]
+
+# Observacion del tablero vacio: planos de fichas en 0 y plano de vacias en 1
+_EMPTY_OBS = [0.0] * (2 * NUM_CELLS) + [1.0] * NUM_CELLS
+_EMPTY_OBS_BYTES = bytes(2 * NUM_CELLS) + bytes([1]) * NUM_CELLS
+
+
+def has_four(mask):
+    """Devuelve True si `mask` contiene 4 fichas alineadas (O(1) con desplazamientos y mascaras)."""
+    for d in _DIRECTIONS:
+        m = mask & (mask >> d)
+        if m & (m >> (2 * d)):
+            return True
+    return False
+
+
+def mirror_mask(mask):
+    """Refleja un bitboard de izquierda a derecha (columna c -> columna 6 - c)."""
+    mirrored = 0
+    for c in range(NUM_COLS):
+        mirrored |= ((mask >> (c * COL_BITS)) & COL_MASK) << ((NUM_COLS - 1 - c) * COL_BITS)
+    return mirrored
+
+
+def piece_masks(state):
+    """
+    Mascaras (jugador 0, jugador 1) de un estado bitboard, ZobristState o pyspiel. Los estados de pyspiel
+    se leen de observation_tensor (84 valores) en vez de volver a jugar todo el historial.
+    """
+    state = getattr(state, "state", state)
+    if isinstance(state, BitboardState):
+        return state.pieces(0), state.pieces(1)
+    obs = state.observation_tensor(0)
+    p0 = p1 = 0
+    for cell, bit in enumerate(_CELL_TO_BIT):
+        if obs[cell]:
+            p0 |= 1 << bit
+        elif obs[NUM_CELLS + cell]:
+            p1 |= 1 << bit
+    return p0, p1
+
+
+class BitboardState:
+    """
+    Estado de Conecta 4 con la misma interfaz (subconjunto) que un estado de pyspiel:
+    apply_action, legal_actions, current_player, is_terminal, returns, clone,
+    observation_tensor, observation_string, history. Ademas permite deshacer jugadas
+    con undo_action, por lo que la busqueda no necesita clonar.
+    """
+
+    __slots__ = ("_pieces", "_heights", "_player", "_num_moves", "_winner", "_done", "_legal", "_history")
+
+    def __init__(self):
+        self._pieces = [0, 0]          # una mascara por jugador
+        self._heights = [0] * NUM_COLS  # fichas en cada columna
+        self._player = 0
+        self._num_moves = 0
+        self._winner = -1
+        self._done = False
+        self._legal = list(range(NUM_COLS))  # columnas no llenas, se actualiza al llenar/vaciar una columna
+        self._history = []
+
+    @classmethod
+    def from_history(cls, actions):
+        """Construye el estado aplicando la secuencia de columnas `actions` desde el tablero vacio."""
+        state = cls()
+        for action in actions:
+            state.apply_action(action)
+        return state
+
+    @classmethod
+    def from_pyspiel(cls, state):
+        """Convierte un estado de pyspiel de connect_four en un BitboardState equivalente."""
+        return cls.from_history(state.history())
+
+    def current_player(self):
+        if self._done:
+            return TERMINAL_PLAYER
+        return self._player
+
+    def is_terminal(self):
+        return self._done
+
+    def returns(self):
+        if self._winner == 0:
+            return [1.0, -1.0]
+        if self._winner == 1:
+            return [-1.0, 1.0]
+        return [0.0, 0.0]
+
+    def rewards(self):
+        return self.returns()
+
+    def legal_actions(self, player=None):
+        if self._done:
+            return []
+        return self._legal[:]
+
+    def apply_action(self, action):
+        p = self._player
+        row = self._heights[action]
+        self._pieces[p] |= 1 << (action * COL_BITS + row)
+        self._heights[action] = row + 1
+        if row + 1 == NUM_ROWS:
+            self._legal.remove(action)
+        self._num_moves += 1
+        self._history.append(action)
+        if has_four(self._pieces[p]):
+            self._winner = p
+            self._done = True
+        elif self._num_moves == NUM_CELLS:
+            self._done = True
+        self._player = 1 - p
+
+    def undo_action(self, player, action):
+        """Deshace la ultima jugada (misma firma que pyspiel: jugador que la hizo y columna)."""
+        self._history.pop()
+        row = self._heights[action] - 1
+        self._heights[action] = row
+        if row + 1 == NUM_ROWS:
+            self._legal.append(action)
+            self._legal.sort()
+        self._pieces[player] &= ~(1 << (action * COL_BITS + row))
+        self._num_moves -= 1
+        self._winner = -1
+        self._done = False
+        self._player = player
+
+    def clone(self):
+        other = BitboardState.__new__(BitboardState)
+        other._pieces = self._pieces[:]
+        other._heights = self._heights[:]
+        other._player = self._player
+        other._num_moves = self._num_moves
+        other._winner = self._winner
+        other._done = self._done
+        other._legal = self._legal[:]
+        other._history = self._history[:]
+        return other
+
+    def random_playout(self, rng=random):
+        """
+        Juega al azar desde esta posicion hasta el final sin modificar el estado y devuelve
+        los returns. Trabaja sobre copias locales de las mascaras, sin crear estados intermedios.
+        """
+        if self._done:
+            return self.returns()
+        pieces = self._pieces[:]
+        heights = self._heights[:]
+        legal = self._legal[:]
+        p = self._player
+        num_moves = self._num_moves
+        choice = rng.choice
+        while True:
+            action = choice(legal)
+            row = heights[action]
+            mask = pieces[p] | (1 << (action * COL_BITS + row))
+            pieces[p] = mask
+            heights[action] = row + 1
+            if row + 1 == NUM_ROWS:
+                legal.remove(action)
+            num_moves += 1
+            if has_four(mask):
+                return [1.0, -1.0] if p == 0 else [-1.0, 1.0]
+            if num_moves == NUM_CELLS:
+                return [0.0, 0.0]
+            p = 1 - p
+
+    def history(self):
+        return self._history[:]
+
+    def move_number(self):
+        return self._num_moves
+
+    def heights(self):
+        return self._heights[:]
+
+    def pieces(self, player):
+        return self._pieces[player]
+
+    def hash_key(self):
+        """
+        Llave entera unica de 49 bits para la posicion: fichas del jugador en turno + mascara
+        de ocupacion + fila inferior (el acarreo marca la altura de cada columna).
+        """
+        mask = self._pieces[0] | self._pieces[1]
+        return self._pieces[self._player] + mask + BOTTOM_MASK
+
+    def mirror_hash_key(self):
+        """Llave de la posicion reflejada, sin construir el estado reflejado."""
+        mask = mirror_mask(self._pieces[0] | self._pieces[1])
+        return mirror_mask(self._pieces[self._player]) + mask + BOTTOM_MASK
+
+    def observation_tensor(self, player=None):
+        """
+        Igual que pyspiel (egocentric_obs_tensor=False): 3 planos de 6x7
+        [fichas jugador 0, fichas jugador 1, celdas vacias], fila 0 abajo.
+        """
+        planes = _EMPTY_OBS[:]
+        for plane, mask in enumerate(self._pieces):
+            offset = plane * NUM_CELLS
+            while mask:
+                low = mask & -mask
+                cell = _BIT_TO_CELL[low.bit_length() - 1]
+                planes[offset + cell] = 1.0
+                planes[2 * NUM_CELLS + cell] = 0.0
+                mask ^= low
+        return planes
+
+    def observation_bytes(self):
+        """observation_tensor como bytes int8 (lo mismo que np.int8(...).tobytes() pero sin pasar por floats)."""
+        obs = bytearray(_EMPTY_OBS_BYTES)
+        for plane, mask in enumerate(self._pieces):
+            offset = plane * NUM_CELLS
+            while mask:
+                low = mask & -mask
+                cell = _BIT_TO_CELL[low.bit_length() - 1]
+                obs[offset + cell] = 1
+                obs[2 * NUM_CELLS + cell] = 0
+                mask ^= low
+        return bytes(obs)
+
+    def observation_string(self, player=None):
+        return str(self)
+
+    def action_to_string(self, player, action):
+        return f"{_SYMBOLS[player]}{action}"
+
+    def __str__(self):
+        p0, p1 = self._pieces
+        lines = []
+        for r in range(NUM_ROWS - 1, -1, -1):
+            row = []
+            for c in range(NUM_COLS):
+                bit = 1 << (c * COL_BITS + r)
+                if p0 & bit:
+                    row.append("x")
+                elif p1 & bit:
+                    row.append("o")
+                else:
+                    row.append(".")
+            lines.append("".join(row) + "\n")
+        return "".join(lines)
+
+
+class BitboardGame:
+    """Sustituto minimo de pyspiel.load_game("connect_four") para el motor bitboard."""
+
+    def new_initial_state(self):
+        return BitboardState()
+
+    def num_players(self):
+        return 2
+
+    def num_distinct_actions(self):
+        return NUM_COLS
+
+    def get_parameters(self):
+        return {"columns": NUM_COLS, "rows": NUM_ROWS, "x_in_row": 4}
+
+    def observation_tensor_shape(self):
+        return [3, NUM_ROWS, NUM_COLS]
+
+
+def load_game(engine="pyspiel", zobrist=False):
+    """
+    Devuelve el juego segun el motor elegido:
+      - "pyspiel": pyspiel.load_game("connect_four")
+      - "bitboard": BitboardGame (Python puro, mucho mas rapido por jugada)
+    Con zobrist=True los estados se envuelven en zobrist.ZobristState y las llaves de
+    la Q-table pasan a ser enteros de 63 bits actualizados incrementalmente.
+    """
+    if engine == "bitboard":
+        game = BitboardGame()
+    elif engine == "pyspiel":
+        import pyspiel
+        game = pyspiel.load_game("connect_four")
+    else:
+        raise ValueError(f"Motor desconocido: {engine!r} (usar 'pyspiel' o 'bitboard')")
+    if zobrist:
+        from zobrist import ZobristGame
+        game = ZobristGame(game)
+    return game
+
+
+if __name__ == "__main__":
+    # Partida aleatoria de prueba
+    state = BitboardState()
+    while not state.is_terminal():
+        state.apply_action(random.choice(state.legal_actions()))
+    print(state)
+    print("Returns:", state.returns())
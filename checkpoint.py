@@ -0,0 +1,158 @@
+import os
+import re
+import pickle
+import threading
+from qtable import QTable
+from qtable_file import save_qtable, open_qtable
+
+# Checkpoints incrementales de Q-tables para entrenamientos largos.
+#
+# Un directorio de checkpoints tiene generaciones N = 0, 1, 2...:
+#   base.N.<tabla>.qtb  tablas completas al empezar la generacion N (qtable_file.py; no existe para N = 0)
+#   delta.N.log         registros pickle agregados al final: contadores + filas modificadas desde el anterior
+#
+# checkpoint() solo escribe las filas que cambiaron (QTable.track_changes), asi su costo depende de las
+# entradas modificadas y no del tamano de la tabla. Cada `compact_every` checkpoints se empieza una
+# generacion nueva: se copia la tabla, se abre delta.N+1 y un hilo escribe base.N+1 y borra lo anterior.
+# Si el proceso muere a mitad de la compactacion, resume() usa la base anterior y todos los deltas siguientes.
+
+_FILE_RE = re.compile(r"^(base|delta)\.(\d+)\.")
+
+
+def _generations(directory, kind):
+    found = set()
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            m = _FILE_RE.match(name)
+            if m and m.group(1) == kind and not name.endswith(".tmp"):
+                found.add(int(m.group(2)))
+    return sorted(found)
+
+
+def _read_records(path):
+    """
+    (registros, bytes validos) de un delta; un ultimo registro cortado (caida a mitad de escritura)
+    se ignora y no cuenta en los bytes validos.
+    """
+    records = []
+    valid = 0
+    with open(path, "rb") as f:
+        while True:
+            try:
+                records.append(pickle.load(f))
+            except (EOFError, ValueError, pickle.UnpicklingError):
+                break
+            valid = f.tell()
+    return records, valid
+
+
+def resume(directory, names=("q",), canonical=None):
+    """
+    Reconstruye las tablas `names` desde la ultima base completa mas los deltas siguientes.
+    Devuelve ({nombre: QTable}, contadores del ultimo checkpoint), o (None, {}) si no hay checkpoints.
+    `canonical` se usa solo si no hay base (la base guarda su propia canonizacion).
+    """
+    deltas = _generations(directory, "delta")
+    if not deltas:
+        return None, {}
+    complete = [g for g in _generations(directory, "base")
+                if all(os.path.exists(os.path.join(directory, f"base.{g}.{n}.qtb")) for n in names)]
+    start = complete[-1] if complete else 0
+    if start:
+        tables = {n: open_qtable(os.path.join(directory, f"base.{start}.{n}.qtb")).to_qtable() for n in names}
+    else:
+        tables = {n: QTable(canonical=canonical) for n in names}
+
+    counters = {}
+    for g in deltas:
+        if g < start:
+            continue
+        for record in _read_records(os.path.join(directory, f"delta.{g}.log"))[0]:
+            counters = record["counters"]
+            for name, (keys, values) in record["tables"].items():
+                table = tables[name]
+                for key, row_values in zip(keys, values):
+                    # intern() puede reemplazar table.values al crecer, por eso la fila se obtiene antes
+                    row = table.intern(key)
+                    table.values[row] = row_values
+    return tables, counters
+
+
+class Checkpointer:
+    """
+    Escribe checkpoints incrementales de una o varias QTable ({nombre: tabla}) en `directory`.
+    Si el directorio ya tiene checkpoints (se retoma con resume()) se sigue agregando a la ultima generacion.
+    """
+
+    def __init__(self, directory, tables, compact_every=20):
+        self.directory = directory
+        self.tables = tables
+        self.compact_every = compact_every
+        os.makedirs(directory, exist_ok=True)
+        deltas = _generations(directory, "delta")
+        # En un directorio nuevo el primer checkpoint incluye lo que las tablas ya traian
+        for table in tables.values():
+            table.track_changes(mark_existing=not deltas)
+        self.generation = deltas[-1] if deltas else 0
+        self.since_compaction = 0
+        path = self._delta_path(self.generation)
+        if os.path.exists(path):
+            # Se descarta un registro cortado al final para que los nuevos queden legibles
+            valid = _read_records(path)[1]
+            with open(path, "r+b") as f:
+                f.truncate(valid)
+        self._log = open(path, "ab")
+        self._thread = None
+
+    def _delta_path(self, generation):
+        return os.path.join(self.directory, f"delta.{generation}.log")
+
+    def _append(self, record):
+        pickle.dump(record, self._log, protocol=pickle.HIGHEST_PROTOCOL)
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def checkpoint(self, **counters):
+        """Agrega al delta las filas modificadas desde el checkpoint anterior junto con `counters`."""
+        record = {"counters": counters, "tables": {}}
+        for name, table in self.tables.items():
+            rows = table.take_dirty()
+            record["tables"][name] = ([table.keys[r] for r in rows], table.values[rows])
+        self._append(record)
+        self.since_compaction += 1
+        if self.compact_every and self.since_compaction >= self.compact_every:
+            self.compact(**counters)
+
+    def compact(self, **counters):
+        """Empieza la generacion siguiente y escribe su base en segundo plano."""
+        self.wait()
+        snapshots = {name: table.snapshot() for name, table in self.tables.items()}
+        for table in self.tables.values():
+            table.take_dirty()
+        self.generation += 1
+        self.since_compaction = 0
+        self._log.close()
+        self._log = open(self._delta_path(self.generation), "ab")
+        # Primer registro de la generacion: los contadores al momento de la copia
+        self._append({"counters": counters, "tables": {}})
+        self._thread = threading.Thread(target=self._write_base, args=(self.generation, snapshots), daemon=True)
+        self._thread.start()
+
+    def _write_base(self, generation, snapshots):
+        for name, table in snapshots.items():
+            save_qtable(table, os.path.join(self.directory, f"base.{generation}.{name}.qtb"))
+        # Con la base nueva completa, las generaciones anteriores ya no hacen falta
+        for name in os.listdir(self.directory):
+            m = _FILE_RE.match(name)
+            if m and int(m.group(2)) < generation:
+                os.remove(os.path.join(self.directory, name))
+
+    def wait(self):
+        """Espera a que termine la compactacion en curso, si hay una."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.wait()
+        self._log.close()
@@ -0,0 +1,82 @@
+import importlib
+
+# Punto de entrada de la biblioteca: `import conecta4` no carga nada; cada nombre se importa desde su modulo
+# la primera vez que se usa (conecta4.QTable, conecta4.alpha_beta, conecta4.minimax...). Asi los procesos de
+# trabajo y las herramientas solo pagan por lo que usan (pyspiel, matplotlib y mcts se cargan aun mas tarde,
+# dentro de las funciones que los necesitan). Los modulos siguen en la raiz del repositorio, que debe estar
+# en sys.path (como al correr los scripts o python -m conecta4 desde ahi).
+
+# Nombre publico -> modulo que lo define
+_EXPORTS = {
+    # motores y llaves
+    "load_game": "bitboard",
+    "BitboardState": "bitboard",
+    "BatchConnectFour": "batch_env",
+    "ZobristState": "zobrist",
+    "state_to_key": "keys",
+    "state_to_string": "keys",
+    # Q-tables
+    "QTable": "qtable",
+    "greedy_action": "qtable",
+    "save_qtable": "qtable_file",
+    "load_qtable": "qtable_file",
+    "open_qtable": "qtable_file",
+    "compile_policy": "policy_file",
+    "CompiledPolicy": "policy_file",
+    # aprendices
+    "train_sarsa_vs_random": "SARSA",
+    "train_sarsa_vs_random_batch": "SARSA",
+    "train_selfplay_sarsa": "SARSA",
+    "train_parallel": "parallel_train",
+    "ReplayBuffer": "replay",
+    # busqueda
+    "alpha_beta": "minimax",
+    "iterative_deepening": "minimax",
+    "ParallelRootSearch": "minimax",
+    "TranspositionTable": "transposition",
+    "threat_evaluation": "heuristic",
+    "OpeningBook": "opening_book",
+    "EndgameSolver": "endgame",
+    "ConnectFourMCTS": "mcts_c4",
+    "QTableEvaluator": "q_evaluator",
+    # evaluacion y herramientas
+    "evaluate_parallel": "parallel_eval",
+    "Checkpointer": "checkpoint",
+    "Metrics": "metrics",
+    "PhaseProfiler": "profiler",
+}
+
+# Modulos accesibles como atributos (conecta4.sarsa, conecta4.q_learning...)
+_MODULES = {
+    "sarsa": "SARSA",
+    "q_learning": "Q_learning",
+    "minimax": "minimax",
+    "evaluation": "eval",
+    "parallel_eval": "parallel_eval",
+    "parallel_train": "parallel_train",
+    "bitboard": "bitboard",
+    "batch_env": "batch_env",
+    "keys": "keys",
+    "qtable": "qtable",
+    "qtable_file": "qtable_file",
+    "opening_book": "opening_book",
+    "endgame": "endgame",
+    "benchmark": "benchmark",
+}
+
+__all__ = sorted(_EXPORTS) + sorted(_MODULES)
+
+
+def __getattr__(name):
+    if name in _MODULES:
+        value = importlib.import_module(_MODULES[name])
+    elif name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
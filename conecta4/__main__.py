@@ -0,0 +1,38 @@
+import sys
+import importlib
+
+# Uso: python -m conecta4 <modo> [argumentos del modo]
+# Cada modo importa solo su modulo y llama a su funcion principal.
+
+# modo -> (modulo, funcion, argumentos fijos, recibe los argumentos de la linea de comandos?)
+MODES = {
+    "sarsa": ("SARSA", "main", ("vs_random",), False),
+    "selfplay": ("SARSA", "main", ("selfplay",), False),
+    "q_learning": ("Q_learning", "main", (), False),
+    "minimax": ("minimax", "main", (), False),
+    "eval": ("eval", "evaluar", (), False),
+    "ver_juego": ("eval", "ver_juego", (), False),
+    "benchmark": ("benchmark", "main", (), True),
+    "book": ("opening_book", "main", (), True),
+    "endgame": ("endgame", "main", (), True),
+    "convert": ("qtable_file", "main", (), True),
+    "plot": ("plots", "main", (), True),
+    "qmcts": ("q_evaluator", "main", (), True),
+    "compile": ("policy_file", "main", (), True),
+}
+
+
+def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    if not args or args[0] not in MODES:
+        print("Uso: python -m conecta4 <modo> [argumentos]")
+        print("Modos: " + ", ".join(MODES))
+        return 2
+    module_name, function, fixed, takes_args = MODES[args[0]]
+    entry = getattr(importlib.import_module(module_name), function)
+    entry(*fixed, *([args[1:]] if takes_args else []))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
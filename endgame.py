@@ -0,0 +1,239 @@
+import os
+import sys
+import time
+import random
+import numpy as np
+from bitboard import BitboardState, NUM_COLS, NUM_CELLS, COL_BITS, COL_MASK, NUM_ROWS, BOTTOM_MASK, has_four, mirror_mask, piece_masks
+from transposition import EXACT, LOWER, UPPER
+
+# Solucion exacta de finales: con pocas casillas vacias el arbol restante es chico y se resuelve completo
+# con negamax alfa-beta sobre las mascaras del bitboard (valores +1 gana / 0 empate / -1 pierde para el
+# jugador en turno), en vez de evaluar las hojas con rollouts.
+#
+# EndgameTable guarda en disco posiciones ya resueltas (las de partidas muestreadas: los finales posibles
+# con K casillas vacias son demasiados para enumerarlos todos), en el mismo estilo que opening_book.py:
+#
+#   cabecera (32 bytes): magia, num_posiciones, max_vacias
+#   llaves:   uint64[num_posiciones]    llave de bitboard canonica (posicion o su espejo), ordenadas
+#   valores:  int8[num_posiciones]      valor exacto para el jugador en turno
+#   jugadas:  uint8[num_posiciones]     una jugada optima en la orientacion de la llave guardada
+#
+#     python endgame.py [--max-empty 10] [--games 2000] [--out endgame_table.c4e]
+
+MAGIC = b"C4END001"
+HEADER_BYTES = 32
+DEFAULT_PATH = "endgame_table.c4e"
+
+_BOTTOM = [1 << (c * COL_BITS) for c in range(NUM_COLS)]
+_TOP = [1 << (c * COL_BITS + NUM_ROWS - 1) for c in range(NUM_COLS)]
+_COLUMN = [COL_MASK << (c * COL_BITS) for c in range(NUM_COLS)]
+# Columnas centrales primero: las mejores jugadas suelen estar ahi y la poda corta antes
+_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+
+def _masks(state):
+    """(fichas del jugador en turno, ocupacion, fichas jugadas) de un estado bitboard, ZobristState o pyspiel no terminal."""
+    p0, p1 = piece_masks(state)
+    mask = p0 | p1
+    moves = mask.bit_count()
+    return (p0 if moves % 2 == 0 else p1), mask, moves
+
+
+def empty_cells(state):
+    return NUM_CELLS - len(state.history())
+
+
+def _canonical(current, mask):
+    """(llave canonica, reflejada?) con la misma llave que BitboardState.hash_key."""
+    h = current + mask + BOTTOM_MASK
+    hm = mirror_mask(current) + mirror_mask(mask) + BOTTOM_MASK
+    return (hm, True) if hm < h else (h, False)
+
+
+class EndgameSolver:
+    """
+    Resuelve exactamente posiciones con a lo mas `max_empty` casillas vacias. La tabla de transposicion
+    ({llave: (valor, tipo_de_cota)}) se conserva entre llamadas y se vacia al pasar de `tt_max_entries`.
+    Con `table` (EndgameTable) las posiciones guardadas en disco se responden sin buscar.
+    """
+
+    def __init__(self, max_empty=12, table=None, tt_max_entries=1 << 21):
+        self.max_empty = max_empty
+        self.table = table
+        self.tt_max_entries = tt_max_entries
+        self.tt = {}
+        self.nodes = 0
+
+    def applies(self, state):
+        return not state.is_terminal() and empty_cells(state) <= self.max_empty
+
+    def _negamax(self, current, mask, moves, alpha, beta):
+        self.nodes += 1
+        playable = [c for c in _ORDER if not mask & _TOP[c]]
+        for c in playable:
+            if has_four(current | ((mask + _BOTTOM[c]) & _COLUMN[c])):
+                return 1
+        # Sin victoria inmediata: si solo queda una casilla el tablero se llena en empate
+        if moves >= NUM_CELLS - 1:
+            return 0
+
+        key = current + mask
+        entry = self.tt.get(key)
+        if entry is not None:
+            value, flag = entry
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        alpha_orig = alpha
+        best = -2
+        opponent = current ^ mask
+        for c in playable:
+            value = -self._negamax(opponent, mask | (mask + _BOTTOM[c]), moves + 1, -beta, -alpha)
+            if value > best:
+                best = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if len(self.tt) >= self.tt_max_entries:
+            self.tt.clear()
+        flag = UPPER if best <= alpha_orig else LOWER if best >= beta else EXACT
+        self.tt[key] = (best, flag)
+        return best
+
+    def solve(self, state):
+        """(valor exacto para el jugador en turno, jugada optima) de una posicion no terminal."""
+        if self.table is not None:
+            hit = self.table.lookup(state)
+            if hit is not None:
+                return hit
+        current, mask, moves = _masks(state)
+        best_value, best_action = -2, None
+        for c in _ORDER:
+            if mask & _TOP[c]:
+                continue
+            if has_four(current | ((mask + _BOTTOM[c]) & _COLUMN[c])):
+                return 1, c
+            if moves + 1 == NUM_CELLS:
+                value = 0
+            else:
+                # Ventana (best_value, 1): solo interesa saber si la jugada supera a la mejor hasta ahora
+                value = -self._negamax(current ^ mask, mask | (mask + _BOTTOM[c]), moves + 1, -1, -best_value)
+            if value > best_value:
+                best_value, best_action = value, c
+                if value == 1:
+                    break
+        return best_value, best_action
+
+    def value(self, state, player):
+        """Valor exacto de la posicion para `player` (objetivo para entrenar), o None fuera del final."""
+        if state.is_terminal():
+            return state.returns()[player]
+        if not self.applies(state):
+            return None
+        value = self.solve(state)[0]
+        return value if state.current_player() == player else -value
+
+
+def save_table(entries, path, max_empty):
+    """Guarda {llave canonica: (valor, jugada)} en `path`."""
+    keys = np.array(sorted(entries), dtype=np.uint64)
+    values = np.array([entries[k][0] for k in keys.tolist()], dtype=np.int8)
+    moves = np.array([entries[k][1] for k in keys.tolist()], dtype=np.uint8)
+    header = MAGIC + np.array([len(keys), max_empty], dtype=np.uint64).tobytes()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header.ljust(HEADER_BYTES, b"\0"))
+        f.write(keys.tobytes())
+        f.write(values.tobytes())
+        f.write(moves.tobytes())
+    os.replace(tmp, path)
+
+
+class EndgameTable:
+    """Posiciones resueltas de un archivo de save_table, mapeadas en memoria; lookup(state) -> (valor, jugada) o None."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_BYTES)
+        if header[:8] != MAGIC:
+            raise ValueError(f"{path} no es una tabla de finales")
+        n, self.max_empty = np.frombuffer(header, dtype=np.uint64, count=2, offset=8).tolist()
+        self._n = n
+        if n:
+            self.keys = np.memmap(path, dtype=np.uint64, mode="r", offset=HEADER_BYTES, shape=(n,))
+            self.values = np.memmap(path, dtype=np.int8, mode="r", offset=HEADER_BYTES + 8 * n, shape=(n,))
+            self.moves = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_BYTES + 9 * n, shape=(n,))
+        else:
+            self.keys = np.zeros(0, dtype=np.uint64)
+
+    def __len__(self):
+        return self._n
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def lookup(self, state):
+        if empty_cells(state) > self.max_empty or state.is_terminal():
+            return None
+        current, mask, _ = _masks(state)
+        key, flipped = _canonical(current, mask)
+        i = int(np.searchsorted(self.keys, np.uint64(key)))
+        if i == self._n or int(self.keys[i]) != key:
+            return None
+        move = int(self.moves[i])
+        return int(self.values[i]), (NUM_COLS - 1 - move if flipped else move)
+
+
+def load_table(path=DEFAULT_PATH):
+    """EndgameTable de `path`, o None si el archivo no existe."""
+    return EndgameTable(path) if os.path.exists(path) else None
+
+
+def build_table(max_empty=10, num_games=2000, seed=None, solver=None, verbose=True):
+    """
+    Juega `num_games` partidas aleatorias y resuelve cada posicion no terminal con a lo mas `max_empty`
+    casillas vacias. Devuelve {llave canonica: (valor, jugada)} para save_table.
+    """
+    rng = random.Random(seed)
+    solver = solver or EndgameSolver(max_empty=max_empty)
+    entries = {}
+    start = time.perf_counter()
+    for game in range(num_games):
+        state = BitboardState()
+        while not state.is_terminal():
+            if empty_cells(state) <= max_empty:
+                current, mask, _ = _masks(state)
+                key, flipped = _canonical(current, mask)
+                if key not in entries:
+                    value, move = solver.solve(state)
+                    entries[key] = (value, NUM_COLS - 1 - move if flipped else move)
+            state.apply_action(rng.choice(state.legal_actions()))
+        if verbose and (game + 1) % 100 == 0:
+            print(f"{game + 1} partidas: {len(entries)} posiciones, {time.perf_counter() - start:.1f}s")
+    return entries
+
+
+def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    max_empty = int(args[args.index("--max-empty") + 1]) if "--max-empty" in args else 10
+    num_games = int(args[args.index("--games") + 1]) if "--games" in args else 2000
+    out_path = args[args.index("--out") + 1] if "--out" in args else DEFAULT_PATH
+    entries = build_table(max_empty, num_games)
+    save_table(entries, out_path, max_empty)
+    print(f"{len(entries)} posiciones en {out_path} ({os.path.getsize(out_path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
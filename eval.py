@@ -1,77 +1,57 @@
-import pyspiel
 import random
 import numpy as np
 import time
 import os
-import pickle
-from collections import defaultdict
-from open_spiel.python.algorithms import mcts
-from SARSA import state_to_key
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-
-def evaluate_agent_sarsa(Q_table, opponent_type="random", num_games=100, mcts_bot=None):
-    
-    game = pyspiel.load_game("connect_four")
-    # Ya no hay agent_net.eval() porque es un diccionario
-    
-    wins = 0
-    losses = 0
-    draws = 0
-    
-    print(f"--- Iniciando Evaluación vs {opponent_type.upper()} ({num_games} partidas) ---")
-    
-    for i in range(num_games):
-        state = game.new_initial_state()
-        
-        # Alternar quién empieza:
-        # Partidas pares: Agente es Player 0
-        # Partidas impares: Agente es Player 1
-        agent_player_id = i % 2 
-        
-        while not state.is_terminal():
-            legal_actions = state.legal_actions()
-            current_player = state.current_player()
-            
-            if current_player == agent_player_id:
-                # --- JUEGA TU AGENTE (SARSA TABULAR) ---
-                # Estrategia GREEDY: Buscar la acción con mayor valor en Q
-                
-                s_key = state_to_key(state, current_player)
-                
-                # Buscamos la acción legal que tenga el valor Q más alto.
-                # Si la acción no existe en la tabla, asume valor 0.0 (o un valor bajo si prefieres)
-                action = max(legal_actions, key=lambda a: Q_table.get((s_key, a), 0.0))
-                
-            else:
-                # --- JUEGA EL OPONENTE ---
-                if opponent_type == "random":
-                    action = random.choice(legal_actions)
-                elif opponent_type == "mcts":
-                    action = mcts_bot.step(state)
-            
-            state.apply_action(action)
-        
-        # Fin del juego
-        returns = state.returns()
-        agent_reward = returns[agent_player_id]
-        
-        if agent_reward > 0:
-            wins += 1
-        elif agent_reward < 0:
-            losses += 1
-        else:
-            draws += 1
-            
-    win_rate = (wins / num_games) * 100
-    print(f"Resultados vs {opponent_type}:")
-    print(f"Victorias: {wins} | Derrotas: {losses} | Empates: {draws}")
-    print(f"Win Rate: {win_rate:.2f}%")
+from bitboard import load_game
+from keys import state_to_key
+from qtable import QTable, greedy_action
+from parallel_eval import evaluate_parallel, opponent_spec
+from qtable_file import load_qtable
+from opening_book import load_book
+from mcts_c4 import ConnectFourMCTS
+from policy_file import compile_policy, load_policy
+
+# open_spiel.python.algorithms.mcts se importa solo en las funciones que arman un MCTSBot
+
+def evaluate_agent_sarsa(Q_table, opponent_type="random", num_games=100, mcts_bot=None, num_workers=None, seed=None,
+                         book=None):
+    """
+    Juega num_games partidas greedy contra el oponente, alternando quién empieza
+    (partidas pares: Agente es Player 0, impares: Player 1). Las partidas se reparten entre
+    num_workers procesos (ver parallel_eval.evaluate_parallel; por defecto, en paralelo solo con muchas partidas).
+    Con opponent_type="mcts" cada proceso arma su propio bot con la configuracion de mcts_bot
+    (parallel_eval.opponent_spec); si mcts_bot no se puede reconstruir (p. ej. q_evaluator.q_mcts_bot)
+    se juega contra ese mismo bot en este proceso.
+    Con `book` (opening_book.OpeningBook) el agente juega las aperturas del libro.
+    """
+    if opponent_type == "mcts":
+        opponent = opponent_spec(mcts_bot)
+        if opponent is None:
+            if num_workers is not None and num_workers > 1:
+                print(f"{type(mcts_bot).__name__} no se puede copiar a otros procesos: se evalua en este proceso")
+            opponent, num_workers = mcts_bot, 1
+        elif seed is None and getattr(mcts_bot, "_random_state", None) is not None:
+            # Las semillas de las tareas salen del generador del bot (reproducible si el bot lo es)
+            seed = int(mcts_bot._random_state.randint(1 << 31))
+    else:
+        opponent = opponent_type
+    # El nombre del bot distingue al MCTSBot de open_spiel de mcts_c4.ConnectFourMCTS en los resultados
+    label = f"{opponent_type} ({type(mcts_bot).__name__})" if opponent_type == "mcts" else opponent_type
+
+    print(f"--- Iniciando Evaluación vs {label.upper()} ({num_games} partidas) ---")
+    results = evaluate_parallel(Q_table, num_games, opponent=opponent, key_fn=state_to_key, alternate=True,
+                                num_workers=num_workers, seed=seed, book=book)
+
+    win_rate = results["win_rate"] * 100
+    low, high = results["win_ci"]
+    print(f"Resultados vs {label}:")
+    print(f"Victorias: {results['wins']} | Derrotas: {results['losses']} | Empates: {results['draws']}")
+    print(f"Win Rate: {win_rate:.2f}% (IC 95%: {low * 100:.2f}% - {high * 100:.2f}%)")
     print("---------------------------------------------------")
     return win_rate
 
 def play_vs_human(Q_table):
-    game = pyspiel.load_game("connect_four")
+    game = load_game("pyspiel")
     state = game.new_initial_state()
     
     print("Tú eres Player 1 (Turnos pares). El Agente es Player 0.")
@@ -86,15 +66,16 @@ def play_vs_human(Q_table):
             
             s_key = state_to_key(state, current_player)
             
-            # --- Debugging: Ver valores Q ---
-            print("Valores Q del agente:")
-            for action in legal_actions:
-                val = Q_table.get((s_key, action), 0.0)
-                print(f"  Col {action}: {val:.4f}")
+            # --- Debugging: Ver valores Q (una politica compilada solo guarda el orden de las acciones) ---
+            if hasattr(Q_table, "get"):
+                print("Valores Q del agente:")
+                for action in legal_actions:
+                    val = Q_table.get((s_key, action), 0.0)
+                    print(f"  Col {action}: {val:.4f}")
             # -------------------------------
 
             # Selección Greedy
-            action = max(legal_actions, key=lambda a: Q_table.get((s_key, a), 0.0))
+            action = greedy_action(Q_table, s_key, legal_actions)
             
             print(f"Agente elige columna: {action}")
             state.apply_action(action)
@@ -157,14 +138,15 @@ def print_board_colored(state):
     print("-" * 15)
 
 def visualize_game_terminal(Q_table, opponent_type="random", delay=0.8, mcts_bot=None):
-    game = pyspiel.load_game("connect_four")
+    game = load_game("pyspiel")
     state = game.new_initial_state()
     
     # Limpiar pantalla inicial
     os.system('cls' if os.name == 'nt' else 'clear')
     
     print("--- INICIANDO PARTIDA ---")
-    print(f"{RED}● Agente (SARSA){RESET} vs {YELLOW}● Oponente ({opponent_type}){RESET}")
+    label = f"{opponent_type}, {type(mcts_bot).__name__}" if opponent_type == "mcts" else opponent_type
+    print(f"{RED}● Agente (SARSA){RESET} vs {YELLOW}● Oponente ({label}){RESET}")
     time.sleep(1)
 
     while not state.is_terminal():
@@ -181,7 +163,7 @@ def visualize_game_terminal(Q_table, opponent_type="random", delay=0.8, mcts_bot
             print(f"Turno: {RED}AGENTE SARSA{RESET}")
             # Pensando...
             s_key = state_to_key(state, current_player)
-            action = max(legal_actions, key=lambda a: Q_table.get((s_key, a), 0.0))
+            action = greedy_action(Q_table, s_key, legal_actions)
             print(f"Agente elige columna: {action}")
         else:
             print(f"Turno: {YELLOW}OPONENTE ({opponent_type}){RESET}")
@@ -208,46 +190,67 @@ def visualize_game_terminal(Q_table, opponent_type="random", delay=0.8, mcts_bot
 
     
 def evaluar():    
+    from open_spiel.python.algorithms import mcts
     # Parámetros de entrenamiento
     EVAL_GAMES = 1000
 
 
-    filename = "q1_table_sarsa.pkl"
+    filename = "q1_table_sarsa.qtb"
     
-    # 1. CARGA DE DATOS
-    if os.path.exists(filename):
+    # 1. CARGA DE DATOS (archivo .qtb mapeado en memoria; un .pkl antiguo se convierte la primera vez)
+    Q = load_qtable(filename)
+    if Q is not None:
         print(f"Cargando Q-table existente desde {filename}...")
-        with open(filename, "rb") as f:
-            loaded_data = pickle.load(f)
-        # Convertimos de dict normal a defaultdict para evitar errores de clave
-        Q = defaultdict(float, loaded_data)
     else:
         print("No se encontró archivo guardado. Se iniciará con una tabla Q vacía.")
-        Q = defaultdict(float)        
+        Q = QTable()        
+
+    # Politica compilada (policy_file.py): para jugar basta el orden de las acciones de cada estado (12 bytes
+    # por estado en vez de la tabla completa); se compila la primera vez desde la Q-table
+    use_policy = False
+    if use_policy:
+        policy_path = os.path.splitext(filename)[0] + ".c4p"
+        if load_policy(policy_path) is None:
+            compile_policy(Q, policy_path)
+        Q = load_policy(policy_path)
+
+    # Libro de aperturas opcional (opening_book.c4b): el agente juega las primeras jugadas desde el libro
+    use_book = False
+    book = load_book() if use_book else None
 
     # 4. evaluamos contra un random 
-    evaluate_agent_sarsa(Q, opponent_type="random", num_games=EVAL_GAMES)
+    evaluate_agent_sarsa(Q, opponent_type="random", num_games=EVAL_GAMES, book=book)
     #evaluamos contra un pro
-    evaluate_agent_sarsa(Q, opponent_type="mcts", num_games=EVAL_GAMES, mcts_bot=mcts.MCTSBot(pyspiel.load_game("connect_four"), uct_c=2, max_simulations=20, evaluator=mcts.RandomRolloutEvaluator()))
+    # MCTS propio de Conecta 4 (mcts_c4.py: arbol reutilizado entre jugadas, mucho mas rapido); False = MCTSBot de open_spiel
+    # (el oponente de referencia; con True los resultados no se comparan con los de antes)
+    native_mcts = False
+    if native_mcts:
+        mcts_bot = ConnectFourMCTS(uct_c=2, max_simulations=20)
+    else:
+        mcts_bot = mcts.MCTSBot(load_game("pyspiel"), uct_c=2, max_simulations=20, evaluator=mcts.RandomRolloutEvaluator())
+    evaluate_agent_sarsa(Q, opponent_type="mcts", num_games=EVAL_GAMES, mcts_bot=mcts_bot, book=book)
 
     # 5. jugamos con el bot
     input("\nPresiona Enter para jugar contra el agente...")
     play_vs_human(Q)
 
 def ver_juego():
-    filename = "q_table_sarsa.pkl"
-    if os.path.exists(filename):
+    from open_spiel.python.algorithms import mcts
+    filename = "q_table_sarsa.qtb"
+    Q = load_qtable(filename)
+    if Q is not None:
         print(f"Cargando Q-table existente desde {filename}...")
-        with open(filename, "rb") as f:
-            loaded_data = pickle.load(f)
-        # Convertimos de dict normal a defaultdict para evitar errores de clave
-        Q = defaultdict(float, loaded_data)
     else:
         print("No se encontró archivo guardado. Se iniciará con una tabla Q vacía.")
-        Q = defaultdict(float)
+        Q = QTable()
 
     #visualize_game_terminal(Q, opponent_type="random", delay=1.0)
-    visualize_game_terminal(Q, opponent_type="mcts", delay=1.0, mcts_bot=mcts.MCTSBot(pyspiel.load_game("connect_four"), uct_c=2, max_simulations=60, evaluator=mcts.RandomRolloutEvaluator()))
+    native_mcts = False  # True = mcts_c4.ConnectFourMCTS en vez del MCTSBot de open_spiel
+    if native_mcts:
+        mcts_bot = ConnectFourMCTS(uct_c=2, max_simulations=60)
+    else:
+        mcts_bot = mcts.MCTSBot(load_game("pyspiel"), uct_c=2, max_simulations=60, evaluator=mcts.RandomRolloutEvaluator())
+    visualize_game_terminal(Q, opponent_type="mcts", delay=1.0, mcts_bot=mcts_bot)
 
 
 if __name__ == "__main__":
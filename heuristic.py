@@ -0,0 +1,96 @@
+from bitboard import NUM_ROWS, NUM_COLS, COL_BITS, piece_masks
+
+# Evaluacion estatica de posiciones para las hojas de alpha_beta (alternativa determinista y barata a
+# rollout_evaluation). Todo se calcula con mascaras precalculadas sobre la distribucion de bits de bitboard.py.
+
+
+def _cell_bit(r, c):
+    return 1 << (c * COL_BITS + r)
+
+
+def _build_window_masks():
+    """Mascaras de las 69 lineas de 4 celdas (horizontales, verticales y diagonales)."""
+    masks = []
+    for r in range(NUM_ROWS):
+        for c in range(NUM_COLS):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(r + k * dr, c + k * dc) for k in range(4)]
+                if all(0 <= rr < NUM_ROWS and 0 <= cc < NUM_COLS for rr, cc in cells):
+                    mask = 0
+                    for rr, cc in cells:
+                        mask |= _cell_bit(rr, cc)
+                    masks.append(mask)
+    return masks
+
+
+WINDOW_MASKS = _build_window_masks()
+
+
+def _build_weight_masks():
+    """
+    Peso de cada celda = cantidad de lineas que pasan por ella (3 en las esquinas, 13 al centro).
+    Se agrupan las celdas por peso para sumar con un popcount por grupo.
+    """
+    groups = {}
+    for r in range(NUM_ROWS):
+        for c in range(NUM_COLS):
+            bit = _cell_bit(r, c)
+            weight = sum(1 for w in WINDOW_MASKS if w & bit)
+            groups[weight] = groups.get(weight, 0) | bit
+    return sorted(groups.items())
+
+
+WEIGHT_MASKS = _build_weight_masks()
+
+# Filas impares contando desde abajo (1, 3, 5) y pares (2, 4, 6): las amenazas en fila impar favorecen
+# al jugador que empieza y las de fila par al segundo (regla de paridad de Conecta 4)
+ODD_ROWS_MASK = sum(_cell_bit(r, c) for r in range(0, NUM_ROWS, 2) for c in range(NUM_COLS))
+EVEN_ROWS_MASK = sum(_cell_bit(r, c) for r in range(1, NUM_ROWS, 2) for c in range(NUM_COLS))
+
+# Pesos de la heuristica
+TWO_WEIGHT = 2.0         # linea abierta con 2 fichas propias
+THREE_WEIGHT = 10.0      # linea abierta con 3 fichas propias
+POSITION_WEIGHT = 0.5    # por ficha, multiplicado por el peso de su celda
+PARITY_WEIGHT = 15.0     # amenaza (celda que completa 4) en la fila de paridad favorable
+SCALE = 100.0            # valor = x / (|x| + SCALE), queda en (-1, 1) sin llegar a una victoria real
+
+
+def _pieces(state):
+    """Mascaras (jugador 0, jugador 1) de un estado bitboard, ZobristState o pyspiel."""
+    return piece_masks(state)
+
+
+def _side_score(mine, theirs):
+    """Puntaje de un jugador: lineas abiertas de 2 y 3, posicion de sus fichas y mascara de amenazas."""
+    score = 0.0
+    threats = 0
+    for w in WINDOW_MASKS:
+        if w & theirs:
+            continue
+        n = (w & mine).bit_count()
+        if n == 2:
+            score += TWO_WEIGHT
+        elif n == 3:
+            score += THREE_WEIGHT
+            threats |= w & ~mine
+    for weight, mask in WEIGHT_MASKS:
+        score += POSITION_WEIGHT * weight * (mine & mask).bit_count()
+    return score, threats
+
+
+def threat_evaluation(state, maximizing_player):
+    """
+    Evaluador estatico para las hojas: lineas abiertas de 2/3 ponderadas por posicion mas la paridad
+    de amenazas (impares para el jugador 0, pares para el jugador 1). Devuelve un valor en (-1, 1)
+    para `maximizing_player`, con la misma firma que los evaluadores de alpha_beta.
+    """
+    if state.is_terminal():
+        return state.returns()[maximizing_player]
+    p0, p1 = _pieces(state)
+    empty = ~(p0 | p1)
+    score0, threats0 = _side_score(p0, p1)
+    score1, threats1 = _side_score(p1, p0)
+    score0 += PARITY_WEIGHT * (threats0 & empty & ODD_ROWS_MASK).bit_count()
+    score1 += PARITY_WEIGHT * (threats1 & empty & EVEN_ROWS_MASK).bit_count()
+    raw = score0 - score1 if maximizing_player == 0 else score1 - score0
+    return raw / (abs(raw) + SCALE)
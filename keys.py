@@ -0,0 +1,30 @@
+import numpy as np
+from bitboard import BitboardState
+from zobrist import ZobristState
+
+# Llaves de estado de las Q-tables. Estan en un modulo aparte (sin pyspiel ni los entrenamientos) para que
+# la evaluacion, los procesos de trabajo y las herramientas puedan importarlas sin cargar los aprendices.
+
+
+# Llave de SARSA (y de la evaluacion): jugador + observacion int8 en bytes
+def state_to_key(state, player):
+    # Con hash de Zobrist la llave es un entero que el estado ya mantiene actualizado
+    if isinstance(state, ZobristState):
+        return state.state_key(player)
+    # Los estados bitboard entregan la observacion directamente como bytes int8 (misma llave)
+    if isinstance(state, BitboardState):
+        return b"p:" + bytes([player]) + b"obs:" + state.observation_bytes()
+    obs = np.array(state.observation_tensor(player), dtype=np.int8)
+    return b"p:" + bytes([player]) + b"obs:" + obs.tobytes()
+
+
+# Función para obtener la representación del estado como string, usado para el mapeo en la Q-table de Q_learning
+def state_to_string(state):
+    # Si el juego va a acabar, se retorna un string especial 
+    if state.is_terminal():
+        return "terminal"
+    # Con hash de Zobrist la llave es un entero que el estado mantiene actualizado en cada jugada
+    if isinstance(state, ZobristState):
+        return state.state_key(state.current_player())
+    # String para el mapeo de estado -> accion
+    return str(state.observation_string(state.current_player()))
@@ -0,0 +1,329 @@
+import math
+import time
+import random
+import numpy as np
+from bitboard import BitboardState, NUM_COLS, NUM_CELLS, COL_BITS, COL_MASK, NUM_ROWS, has_four
+
+# MCTS (UCT con partidas aleatorias) especializado en Conecta 4, para usar en lugar de
+# open_spiel.python.algorithms.mcts.MCTSBot donde hoy se recibe un mcts_bot (step(state) -> accion).
+#
+#   - El arbol se conserva entre jugadas: en cada step la raiz avanza por las jugadas hechas desde la
+#     anterior (las del bot y las del rival), asi las simulaciones ya hechas en ese subarbol se reutilizan.
+#   - Los nodos no son objetos: cada campo es una lista plana indexada por numero de nodo y los hijos de
+#     un nodo ocupan posiciones consecutivas (first_child .. first_child + num_children - 1).
+#     Las posiciones se guardan como mascaras de bitboard (fichas del jugador en turno, ocupacion).
+#   - Las simulaciones se hacen en lotes de batch_size hojas (con perdida virtual para que el lote no
+#     elija siempre la misma rama) y sus partidas aleatorias se juegan a la vez con operaciones NumPy.
+#
+# El valor de cada nodo es la suma de resultados (+1 gana / 0 empate / -1 pierde) desde el punto de vista
+# del jugador que hizo la jugada que lleva al nodo, como en el MCTS de open_spiel.
+
+_BOTTOM = [1 << (c * COL_BITS) for c in range(NUM_COLS)]
+_TOP = [1 << (c * COL_BITS + NUM_ROWS - 1) for c in range(NUM_COLS)]
+_COLUMN = [COL_MASK << (c * COL_BITS) for c in range(NUM_COLS)]
+
+_BOTTOM_NP = np.array(_BOTTOM, dtype=np.int64)
+_TOP_NP = np.array(_TOP, dtype=np.int64)
+_COLUMN_NP = np.array(_COLUMN, dtype=np.int64)
+_DIRECTIONS = (1, COL_BITS, COL_BITS - 1, COL_BITS + 1)
+
+# Perdida virtual de una rama mientras su simulacion esta pendiente dentro del lote
+VIRTUAL_LOSS = 1.0
+# Desde cuantas hojas conviene jugar las partidas con NumPy (con menos, el ciclo en Python es mas rapido)
+MIN_NUMPY_PLAYOUTS = 128
+
+
+def playout(current, mask, moves, rand=random.random):
+    """Una partida aleatoria sobre mascaras; resultado para el jugador en turno (+1, 0 o -1)."""
+    sign = 1.0
+    cols = [c for c in range(NUM_COLS) if not mask & _TOP[c]]
+    while True:
+        c = cols[int(rand() * len(cols))]
+        bit = (mask + _BOTTOM[c]) & _COLUMN[c]
+        if has_four(current | bit):
+            return sign
+        moves += 1
+        if moves == NUM_CELLS:
+            return 0.0
+        if bit & _TOP[c]:
+            cols.remove(c)
+        current, mask = current ^ mask, mask | bit
+        sign = -sign
+
+
+def batch_playouts(current, mask, moves, rng):
+    """
+    Partidas aleatorias simultaneas desde varias posiciones (arreglos de fichas del jugador en turno,
+    ocupacion y jugadas hechas). Devuelve el resultado de cada una para el jugador en turno de su posicion.
+    """
+    current = np.array(current, dtype=np.int64)
+    mask = np.array(mask, dtype=np.int64)
+    moves = np.array(moves, dtype=np.int64)
+    results = np.zeros(len(current), dtype=np.float32)
+    sign = np.ones(len(current), dtype=np.float32)
+    idx = np.arange(len(current))
+    while len(idx):
+        m = mask[idx]
+        cur = current[idx]
+        noise = rng.random((len(idx), NUM_COLS))
+        noise[(m[:, None] & _TOP_NP) != 0] = -1.0
+        cols = noise.argmax(axis=1)
+        bit = (m + _BOTTOM_NP[cols]) & _COLUMN_NP[cols]
+        mover = cur | bit
+        won = np.zeros(len(idx), dtype=bool)
+        for d in _DIRECTIONS:
+            pairs = mover & (mover >> d)
+            won |= (pairs & (pairs >> (2 * d))) != 0
+        moves[idx] += 1
+        results[idx[won]] = sign[idx[won]]
+        # Sigue el rival: sus fichas son las ocupadas que no son del jugador que acaba de mover
+        current[idx] = cur ^ m
+        mask[idx] = m | bit
+        sign[idx] = -sign[idx]
+        idx = idx[~(won | (moves[idx] == NUM_CELLS))]
+    return results
+
+
+class ConnectFourMCTS:
+    """
+    Bot MCTS con la interfaz de MCTSBot que usa el proyecto: step(state), restart(), inform_action(),
+    y los atributos uct_c y max_simulations. Con max_time (segundos) cada jugada busca hasta agotar
+    ese tiempo (y max_simulations, si no es None); al menos uno de los dos limites es obligatorio. `state` puede ser de pyspiel, bitboard o ZobristState.
+    max_nodes: al pasar de ese numero de nodos se compacta el arbol al subarbol de la raiz.
+    """
+
+    def __init__(self, uct_c=2, max_simulations=20, max_time=None, batch_size=16, seed=None, max_nodes=1 << 20):
+        # Sin ningun limite la busqueda solo terminaria al resolver la raiz (en la apertura, nunca)
+        if max_simulations is None and max_time is None:
+            raise ValueError("ConnectFourMCTS necesita max_simulations o max_time")
+        self.uct_c = uct_c
+        self.max_simulations = max_simulations
+        self.max_time = max_time
+        self.batch_size = batch_size
+        self.max_nodes = max_nodes
+        self.rng = np.random.default_rng(seed)
+        self._random = random.Random(seed).random
+        self.simulations = 0
+        self.restart()
+
+    def restart(self):
+        """Descarta el arbol (la proxima jugada empieza una busqueda nueva)."""
+        self._history = None
+        self._parent = []
+        self._action = []
+        self._first_child = []
+        self._num_children = []
+        self._visits = []
+        self._value = []
+        self._terminal = []   # None, o el resultado exacto para quien hizo la jugada
+        self._current = []
+        self._mask = []
+        self._moves = []
+        self.root = -1
+
+    def restart_at(self, state):
+        self.restart()
+
+    def inform_action(self, state, player, action):
+        # La raiz se avanza en step comparando historiales, no hace falta seguir cada jugada
+        pass
+
+    def __len__(self):
+        return len(self._visits)
+
+    def _new_node(self, parent, action, current, mask, moves, terminal):
+        self._parent.append(parent)
+        self._action.append(action)
+        self._first_child.append(-1)
+        self._num_children.append(0)
+        self._visits.append(0)
+        self._value.append(0.0)
+        self._terminal.append(terminal)
+        self._current.append(current)
+        self._mask.append(mask)
+        self._moves.append(moves)
+        return len(self._visits) - 1
+
+    def _new_root(self, history):
+        self.restart()
+        board = BitboardState.from_history(history)
+        player = board.current_player()
+        mask = board.pieces(0) | board.pieces(1)
+        self.root = self._new_node(-1, -1, board.pieces(player), mask, board.move_number(), None)
+        self._history = list(history)
+
+    def _advance(self, history):
+        """Mueve la raiz por las jugadas de `history` que faltan; crea un arbol nuevo si no estan en el arbol."""
+        old = self._history
+        if old is None or history[:len(old)] != old:
+            self._new_root(history)
+            return
+        node = self.root
+        for action in history[len(old):]:
+            first = self._first_child[node]
+            for child in range(first, first + self._num_children[node]):
+                if self._action[child] == action:
+                    node = child
+                    break
+            else:
+                self._new_root(history)
+                return
+        self.root = node
+        self._history = list(history)
+        if len(self._visits) > self.max_nodes:
+            self._compact()
+
+    def _compact(self):
+        """Copia el subarbol de la raiz a listas nuevas (los hijos de cada nodo siguen siendo consecutivos)."""
+        fields = (self._action, self._visits, self._value, self._terminal, self._current, self._mask, self._moves)
+        new_fields = tuple([f[self.root]] for f in fields)
+        parent, first_child, num_children = [-1], [-1], [0]
+        queue = [(self.root, 0)]
+        for old, new in queue:
+            n = self._num_children[old]
+            if not n:
+                continue
+            first = self._first_child[old]
+            first_child[new] = len(parent)
+            num_children[new] = n
+            for child in range(first, first + n):
+                queue.append((child, len(parent)))
+                parent.append(new)
+                first_child.append(-1)
+                num_children.append(0)
+                for f, nf in zip(fields, new_fields):
+                    nf.append(f[child])
+        self._parent, self._first_child, self._num_children = parent, first_child, num_children
+        (self._action, self._visits, self._value, self._terminal,
+         self._current, self._mask, self._moves) = new_fields
+        self.root = 0
+
+    def _expand(self, node):
+        """Agrega los hijos de `node` de una vez (cada campo se extiende con todos los hijos)."""
+        current, mask, moves = self._current[node], self._mask[node], self._moves[node]
+        cols = [c for c in range(NUM_COLS) if not mask & _TOP[c]]
+        # Los hijos sin visitar se eligen en orden: se rota la lista para no favorecer siempre la misma columna
+        k = len(cols)
+        start = int(self._random() * k)
+        cols = cols[start:] + cols[:start]
+        bits = [(mask + _BOTTOM[c]) & _COLUMN[c] for c in cols]
+        full = moves + 1 == NUM_CELLS
+        self._first_child[node] = len(self._visits)
+        self._num_children[node] = k
+        self._parent.extend([node] * k)
+        self._action.extend(cols)
+        self._first_child.extend([-1] * k)
+        self._num_children.extend([0] * k)
+        self._visits.extend([0] * k)
+        self._value.extend([0.0] * k)
+        terminal = [1.0 if has_four(current | b) else 0.0 if full else None for b in bits]
+        self._terminal.extend(terminal)
+        self._current.extend([current ^ mask] * k)
+        self._mask.extend([mask | b for b in bits])
+        self._moves.extend([moves + 1] * k)
+        if 1.0 in terminal or full:
+            self._prove(self._first_child[node] + terminal.index(1.0 if 1.0 in terminal else 0.0))
+
+    def _prove(self, node):
+        """
+        `node` acaba de quedar resuelto: sube resolviendo a sus ancestros (como el solver del MCTS de open_spiel).
+        Un padre pierde si algun hijo gana para quien lo juega; si todos sus hijos estan resueltos, vale -max.
+        """
+        terminal, parent = self._terminal, self._parent[node]
+        while parent >= 0 and terminal[parent] is None:
+            if terminal[node] == 1.0:
+                terminal[parent] = -1.0
+            else:
+                first = self._first_child[parent]
+                values = terminal[first:first + self._num_children[parent]]
+                if None in values:
+                    return
+                terminal[parent] = -max(values)
+            node, parent = parent, self._parent[parent]
+
+    def _select(self):
+        """Baja desde la raiz por UCT aplicando la perdida virtual; expande la hoja y devuelve el camino."""
+        visits, value, uct_c = self._visits, self._value, self.uct_c
+        node = self.root
+        path = [node]
+        visits[node] += 1
+        while self._terminal[node] is None:
+            n = self._num_children[node]
+            if not n:
+                self._expand(node)
+                break
+            first = self._first_child[node]
+            explore = uct_c * uct_c * math.log(visits[node])
+            best, best_score = first, -math.inf
+            for child in range(first, first + n):
+                v = visits[child]
+                if not v:
+                    best = child
+                    break
+                score = value[child] / v + math.sqrt(explore / v)
+                if score > best_score:
+                    best, best_score = child, score
+            node = best
+            path.append(node)
+            visits[node] += 1
+            value[node] -= VIRTUAL_LOSS
+        return path
+
+    def _run_batch(self, n):
+        paths = [self._select() for _ in range(n)]
+        rollouts = [i for i, path in enumerate(paths) if self._terminal[path[-1]] is None]
+        rewards = [self._terminal[path[-1]] for path in paths]
+        if len(rollouts) >= MIN_NUMPY_PLAYOUTS:
+            leaves = [paths[i][-1] for i in rollouts]
+            results = batch_playouts([self._current[l] for l in leaves], [self._mask[l] for l in leaves],
+                                     [self._moves[l] for l in leaves], self.rng).tolist()
+        else:
+            results = [playout(self._current[paths[i][-1]], self._mask[paths[i][-1]], self._moves[paths[i][-1]],
+                               self._random) for i in rollouts]
+        # El resultado es del jugador en turno en la hoja; el nodo guarda el de quien movio
+        for i, r in zip(rollouts, results):
+            rewards[i] = -r
+        for path in paths:
+            # Una hoja perdida para quien la juega puede resolver al padre (si todos sus hermanos ya lo estan)
+            if self._terminal[path[-1]] is not None and len(path) > 1:
+                self._prove(path[-1])
+        value = self._value
+        for path, reward in zip(paths, rewards):
+            for node in reversed(path[1:]):
+                value[node] += reward + VIRTUAL_LOSS
+                reward = -reward
+        self.simulations += n
+
+    def search(self, state):
+        """Corre las simulaciones de una jugada desde `state`; devuelve cuantas hizo."""
+        self._advance(list(state.history()))
+        start = time.perf_counter()
+        done = 0
+        while self.max_simulations is None or done < self.max_simulations:
+            # Con la raiz resuelta no hace falta seguir buscando
+            if self._terminal[self.root] is not None:
+                break
+            if self.max_time is not None and time.perf_counter() - start >= self.max_time:
+                break
+            n = self.batch_size if self.max_simulations is None else min(self.batch_size, self.max_simulations - done)
+            self._run_batch(n)
+            done += n
+        return done
+
+    def policy(self):
+        """[(accion, fraccion de visitas)] de los hijos de la raiz."""
+        first, n = self._first_child[self.root], self._num_children[self.root]
+        total = sum(self._visits[first:first + n]) or 1
+        return [(self._action[c], self._visits[c] / total) for c in range(first, first + n)]
+
+    def step_with_policy(self, state):
+        self.search(state)
+        first, n = self._first_child[self.root], self._num_children[self.root]
+        children = range(first, first + n)
+        # Primero los resultados demostrados (un hijo sin resolver cuenta como empate), luego el mas visitado
+        terminal, visits, value = self._terminal, self._visits, self._value
+        best = max(children, key=lambda c: (0.0 if terminal[c] is None else terminal[c], visits[c], value[c]))
+        return self.policy(), self._action[best]
+
+    def step(self, state):
+        return self.step_with_policy(state)[1]
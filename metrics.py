@@ -0,0 +1,231 @@
+import os
+import sys
+import csv
+import json
+import time
+import threading
+
+# Metricas de entrenamiento en streaming. En el ciclo de entrenamiento solo se hacen operaciones O(1)
+# (record_result, count); los promedios, tasas por segundo y gauges se calculan en snapshot(), que un
+# hilo en segundo plano llama cada flush_interval segundos para escribir en los sinks (stdout, CSV, JSONL).
+
+
+class RollingResults:
+    """Ventana de los ultimos `window` resultados (+1, -1, 0) con conteos actualizados en O(1)."""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._buffer = [0] * window
+        self._next = 0
+        self.size = 0
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+
+    def _add_count(self, result, n):
+        if result > 0:
+            self.wins += n
+        elif result < 0:
+            self.losses += n
+        else:
+            self.draws += n
+
+    def add(self, result):
+        if self.size == self.window:
+            self._add_count(self._buffer[self._next], -1)
+        else:
+            self.size += 1
+        self._buffer[self._next] = result
+        self._next = (self._next + 1) % self.window
+        self._add_count(result, 1)
+
+    def rates(self):
+        """(victorias, derrotas, empates) en % de la ventana."""
+        if not self.size:
+            return 0.0, 0.0, 0.0
+        return (self.wins / self.size * 100, self.losses / self.size * 100, self.draws / self.size * 100)
+
+
+class StdoutSink:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def write(self, snapshot):
+        parts = [f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in snapshot.items() if k != "time"]
+        print(" ".join(parts), file=self.stream, flush=True)
+
+    def close(self):
+        pass
+
+
+class CSVSink:
+    """
+    CSV con una fila por snapshot. Las columnas son `fields` (Metrics.fields(): las fijas mas los contadores
+    y gauges declarados) o, sin fields, las del primer snapshot. Si el archivo ya existe con otra cabecera,
+    o llega un snapshot con columnas nuevas, se sigue en otro archivo (nombre.1.csv, nombre.2.csv, ...)
+    en vez de desalinear las filas; `path` es el archivo que se esta escribiendo.
+    """
+
+    def __init__(self, path, fields=None):
+        self._base = path
+        self._file = None
+        self._writer = None
+        self.path = path
+        if fields is not None:
+            self._open(list(fields))
+
+    def _open(self, fields):
+        root, ext = os.path.splitext(self._base)
+        path, n = self._base, 0
+        while os.path.exists(path) and os.path.getsize(path) and _csv_header(path) != fields:
+            n += 1
+            path = f"{root}.{n}{ext}"
+        if self._file is not None:
+            self._file.close()
+            print(f"CSVSink: columnas distintas, se sigue en {path}", file=sys.stderr)
+        self.path = path
+        self._file = open(path, "a", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=fields)
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+
+    def write(self, snapshot):
+        if self._writer is None:
+            self._open(list(snapshot))
+        elif not set(snapshot) <= set(self._writer.fieldnames):
+            self._open(self._writer.fieldnames + [k for k in snapshot if k not in self._writer.fieldnames])
+        self._writer.writerow(snapshot)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _csv_header(path):
+    with open(path, "r", newline="") as f:
+        return next(csv.reader(f), None)
+
+
+class JSONLSink:
+    """Un objeto JSON por linea y por snapshot."""
+
+    def __init__(self, path):
+        self._file = open(path, "a")
+
+    def write(self, snapshot):
+        self._file.write(json.dumps(snapshot) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class Metrics:
+    """
+    Metricas de un entrenamiento:
+      - record_result(r): resultado de un episodio (+1, -1, 0): totales y ventana movil (RollingResults)
+      - count(name, n): contadores de throughput (p. ej. "states"); snapshot() entrega name_per_sec
+        (counter(name) lo declara antes de contar, asi su columna esta desde el primer snapshot)
+      - gauge(name, fn): valor que se lee al hacer el snapshot (epsilon, tamano de la Q-table...)
+    Con sinks se inicia un hilo que cada `flush_interval` segundos escribe un snapshot en cada sink;
+    close() escribe el ultimo y cierra los sinks.
+    """
+
+    def __init__(self, sinks=None, flush_interval=5.0, window=1000):
+        self.sinks = list(sinks or [])
+        self.flush_interval = flush_interval
+        self.recent = RollingResults(window)
+        self.episodes = 0
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+        self.counters = {}
+        self.gauges = {}
+        self._start = self._last_time = time.perf_counter()
+        self._last_counts = {}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        if self.sinks:
+            self._start_thread()
+
+    def _start_thread(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        if self._thread is None:
+            self._start_thread()
+
+    def record_result(self, result):
+        self.episodes += 1
+        if result > 0:
+            self.wins += 1
+        elif result < 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+        self.recent.add(result)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def counter(self, name):
+        self.counters.setdefault(name, 0)
+
+    def gauge(self, name, fn):
+        self.gauges[name] = fn
+
+    def fields(self):
+        """Columnas de snapshot() con los contadores y gauges declarados hasta ahora (para CSVSink)."""
+        fields = ["time", "elapsed", "episodes", "wins", "losses", "draws", "recent_win_rate", "recent_loss_rate",
+                  "recent_draw_rate"]
+        fields += [f"{name}_per_sec" for name in dict(self.counters, episodes=0)] + list(self.gauges)
+        return list(dict.fromkeys(fields))
+
+    def snapshot(self):
+        """Estado actual con tasas por segundo desde el snapshot anterior."""
+        with self._lock:
+            now = time.perf_counter()
+            elapsed = max(now - self._last_time, 1e-9)
+            counts = dict(self.counters, episodes=self.episodes)
+            win_rate, loss_rate, draw_rate = self.recent.rates()
+            snap = {
+                "time": time.time(),
+                "elapsed": now - self._start,
+                "episodes": self.episodes,
+                "wins": self.wins,
+                "losses": self.losses,
+                "draws": self.draws,
+                "recent_win_rate": win_rate,
+                "recent_loss_rate": loss_rate,
+                "recent_draw_rate": draw_rate,
+            }
+            for name, value in counts.items():
+                snap[f"{name}_per_sec"] = (value - self._last_counts.get(name, 0)) / elapsed
+            for name, fn in self.gauges.items():
+                snap[name] = fn()
+            self._last_time = now
+            self._last_counts = counts
+        return snap
+
+    def flush(self):
+        snap = self.snapshot()
+        for sink in self.sinks:
+            sink.write(snap)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self.sinks:
+            self.flush()
+        for sink in self.sinks:
+            sink.close()
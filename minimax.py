@@ -1,7 +1,18 @@
 import random
 import numpy as np
-import pyspiel
 import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from bitboard import BitboardState, load_game
+from transposition import TranspositionTable, position_hash, EXACT, LOWER, UPPER
+from heuristic import threat_evaluation
+from batch_env import batch_rollouts
+from opening_book import load_book
+from endgame import EndgameSolver, empty_cells, load_table
+
+# True si el estado es (o envuelve, como ZobristState) un BitboardState
+def is_bitboard(state):
+    return isinstance(getattr(state, "state", state), BitboardState)
 
 def rollout_evaluation(state, maximizing_player, n_rollouts=20):
     """
@@ -9,6 +20,13 @@ def rollout_evaluation(state, maximizing_player, n_rollouts=20):
     el promedio de la utilidad para `maximizing_player`.
     """
     total = 0.0
+    # Las partidas aleatorias no necesitan el hash de Zobrist: se juegan sobre el estado envuelto
+    state = getattr(state, "state", state)
+    # Con el motor bitboard la partida aleatoria se juega sobre mascaras locales, sin clonar
+    if isinstance(state, BitboardState):
+        for _ in range(n_rollouts):
+            total += state.random_playout()[maximizing_player]
+        return total / float(n_rollouts)
     for _ in range(n_rollouts):
         sim_state = state.clone()
         # jugar aleatoriamente hasta terminal
@@ -19,18 +37,48 @@ def rollout_evaluation(state, maximizing_player, n_rollouts=20):
         total += returns[maximizing_player]
     return total / float(n_rollouts)
 
+# Generador compartido por las evaluaciones por rollouts en lote
+_rollout_rng = np.random.default_rng()
+
+def batched_rollout_evaluation(state, maximizing_player, n_rollouts=256):
+    """
+    Igual que rollout_evaluation, pero las n_rollouts partidas se juegan simultáneamente como
+    operaciones sobre arreglos (batch_env.batch_rollouts); el costo casi no crece con n_rollouts.
+    """
+    returns = batch_rollouts(state, n_rollouts, seed=_rollout_rng)
+    mean = float(returns.mean())
+    return mean if maximizing_player == 0 else -mean
+
 # En Conecta 4, la columna central suele ser la mejor jugada inicial y también una de las más fuertes durante la partida, asi le ayudamos a la busqueda
 def action_center_priority(action):
     center = 3  # en tablero de 7 columnas, columna central es 3
     return -abs(center - action)  # más cerca del centro -> mayor prioridad
 
-def alpha_beta(state, depth, alpha, beta, maximizing_player, rollout_at_leaf=30):
+# Los estados bitboard permiten deshacer jugadas, asi la busqueda recorre el arbol sobre un unico estado sin clonar
+def supports_undo(state):
+    return is_bitboard(state)
+
+class SearchTimeout(Exception):
+    """La búsqueda superó el tiempo asignado a la jugada (ver iterative_deepening)."""
+
+def alpha_beta(state, depth, alpha, beta, maximizing_player, rollout_at_leaf=30, tt=None,
+               deadline=None, first_action=None, evaluator=None, shared_alpha=None, endgame=None):
     """
     Minimax con poda alfa-beta:
       - depth: profundidad restante
       - alpha, beta: parámetros de poda
       - maximizing_player: índice del jugador cuya utilidad maximizamos
       - rollout_at_leaf: número de rollouts si depth == 0 (evaluación heurística)
+      - tt: TranspositionTable opcional; guarda valor, profundidad, tipo de cota y mejor acción
+        de cada posición, para cortar sin volver a buscar y para ordenar las jugadas
+      - deadline: instante (time.perf_counter) en que se aborta la búsqueda con SearchTimeout
+      - first_action: acción a probar primero en este nodo (p. ej. la mejor de la iteración anterior)
+      - evaluator: función evaluator(state, maximizing_player) -> valor para las hojas; por defecto
+        rollout_evaluation con rollout_at_leaf partidas (ver heuristic.threat_evaluation)
+      - shared_alpha: multiprocessing.Value con el alpha de la raíz compartido entre procesos
+        (ver ParallelRootSearch); cada nodo sube su alpha a ese valor antes de buscar
+      - endgame: endgame.EndgameSolver; con pocas casillas vacías el nodo se resuelve exactamente
+        (+1/0/-1) en vez de seguir buscando y evaluar las hojas
     Devuelve (valor_est, mejor_accion) donde mejor_accion es None para nodos internos
     si solo queremos el valor.
     """
@@ -39,9 +87,48 @@ def alpha_beta(state, depth, alpha, beta, maximizing_player, rollout_at_leaf=30)
         returns = state.returns()
         return returns[maximizing_player], None
 
-    # Caso profundidad límite: evaluación heurística por rollouts
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout()
+
+    # Final: el resto del árbol es chico, se resuelve completo (valor para el jugador en turno)
+    if endgame is not None and endgame.applies(state):
+        value, action = endgame.solve(state)
+        return (value if state.current_player() == maximizing_player else -value), action
+
+    # Otro proceso pudo haber encontrado una jugada mejor en la raíz: su valor es cota inferior para todo el árbol.
+    # Si la ventana queda vacía el nodo ya no importa: se corta sin guardar nada en la tabla
+    caller_alpha = alpha
+    if shared_alpha is not None:
+        alpha = max(alpha, shared_alpha.value)
+        if alpha >= beta:
+            return alpha, None
+
+    # Consulta de la tabla de transposicion (los valores dependen del jugador que maximiza, va en la llave)
+    tt_move = None
+    if tt is not None:
+        tt_key = (position_hash(state) << 1) | maximizing_player
+        entry = tt.probe(tt_key)
+        if entry is not None:
+            _, tt_value, tt_depth, tt_flag, tt_move = entry
+            if tt_depth >= depth:
+                if tt_flag == EXACT:
+                    return tt_value, tt_move
+                if tt_flag == LOWER:
+                    alpha = max(alpha, tt_value)
+                elif tt_flag == UPPER:
+                    beta = min(beta, tt_value)
+                if alpha >= beta:
+                    return tt_value, tt_move
+        alpha_orig, beta_orig = alpha, beta
+
+    # Caso profundidad límite: evaluación heurística (rollouts o el evaluador entregado)
     if depth == 0:
-        value = rollout_evaluation(state, maximizing_player, n_rollouts=rollout_at_leaf)
+        if evaluator is None:
+            value = rollout_evaluation(state, maximizing_player, n_rollouts=rollout_at_leaf)
+        else:
+            value = evaluator(state, maximizing_player)
+        if tt is not None:
+            tt.store(tt_key, value, 0, EXACT, None)
         return value, None
 
     current = state.current_player()
@@ -53,21 +140,38 @@ def alpha_beta(state, depth, alpha, beta, maximizing_player, rollout_at_leaf=30)
         return value, None
 
     best_action = None
+    undo = supports_undo(state)
+    maximizing = current == maximizing_player
+
+    # ordenar movimientos por heurística simple: priorizar el centro; la mejor acción de la tabla va primero
+    ordered_actions = sorted(legal, key=lambda a: action_center_priority(a), reverse=maximizing)
+    preferred = first_action if first_action is not None else tt_move
+    if preferred in ordered_actions:
+        ordered_actions.remove(preferred)
+        ordered_actions.insert(0, preferred)
 
     # Si es el turno del jugador maximizador
-    if current == maximizing_player:
+    if maximizing:
         value = -float('inf')
-        # ordenar movimientos por heurística simple: priorizar el centro (opcional)
-        ordered_actions = sorted(legal, key=lambda a: action_center_priority(a), reverse=True)
         for action in ordered_actions:
-            child = state.clone()
+            if undo:
+                child = state
+            else:
+                child = state.clone()
             child.apply_action(action)
 
             # si la acción termina el juego inmediatamente, podemos leer el resultado
-            if child.is_terminal():
-                child_val = child.returns()[maximizing_player]
-            else:
-                child_val, _ = alpha_beta(child, depth - 1, alpha, beta, maximizing_player, rollout_at_leaf)
+            # (try/finally: si se agota el tiempo la jugada se deshace igual)
+            try:
+                if child.is_terminal():
+                    child_val = child.returns()[maximizing_player]
+                else:
+                    child_val, _ = alpha_beta(child, depth - 1, alpha, beta, maximizing_player, rollout_at_leaf, tt,
+                                              deadline, evaluator=evaluator, shared_alpha=shared_alpha,
+                                              endgame=endgame)
+            finally:
+                if undo:
+                    state.undo_action(current, action)
 
             if child_val > value:
                 value = child_val
@@ -77,20 +181,27 @@ def alpha_beta(state, depth, alpha, beta, maximizing_player, rollout_at_leaf=30)
             if alpha >= beta:
                 # poda
                 break
-        return value, best_action
 
     # Turno del jugador minimizador (el rival)
     else:
         value = float('inf')
-        ordered_actions = sorted(legal, key=lambda a: action_center_priority(a), reverse=False)
         for action in ordered_actions:
-            child = state.clone()
+            if undo:
+                child = state
+            else:
+                child = state.clone()
             child.apply_action(action)
 
-            if child.is_terminal():
-                child_val = child.returns()[maximizing_player]
-            else:
-                child_val, _ = alpha_beta(child, depth - 1, alpha, beta, maximizing_player, rollout_at_leaf)
+            try:
+                if child.is_terminal():
+                    child_val = child.returns()[maximizing_player]
+                else:
+                    child_val, _ = alpha_beta(child, depth - 1, alpha, beta, maximizing_player, rollout_at_leaf, tt,
+                                              deadline, evaluator=evaluator, shared_alpha=shared_alpha,
+                                              endgame=endgame)
+            finally:
+                if undo:
+                    state.undo_action(current, action)
 
             if child_val < value:
                 value = child_val
@@ -99,17 +210,229 @@ def alpha_beta(state, depth, alpha, beta, maximizing_player, rollout_at_leaf=30)
             beta = min(beta, value)
             if alpha >= beta:
                 break
+
+    # Si el alpha compartido superó la ventana de quien llamó, este nodo o sus hijos se buscaron con una ventana
+    # más estrecha que la de alpha_orig/beta_orig: el valor no es una cota confiable y no se guarda
+    if tt is not None and (shared_alpha is None or shared_alpha.value <= caller_alpha):
+        if value <= alpha_orig:
+            flag = UPPER
+        elif value >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        tt.store(tt_key, value, depth, flag, best_action)
+    return value, best_action
+
+
+
+
+def iterative_deepening(state, time_budget_ms, max_depth=None, rollout_at_leaf=30, tt=None, evaluator=None,
+                        parallel=None, book=None, endgame=None):
+    """
+    Busca a profundidad 1, 2, 3... hasta agotar `time_budget_ms` milisegundos y devuelve
+    (valor, mejor_accion, profundidad) de la última iteración completa. Cada iteración prueba
+    primero la mejor acción de la anterior (y reutiliza la tabla de transposición si se pasa `tt`).
+    Con `parallel` (un ParallelRootSearch) cada iteración se reparte entre sus procesos.
+    Con `book` (opening_book.OpeningBook) las posiciones del libro se responden sin buscar y con
+    `endgame` (endgame.EndgameSolver) los finales se resuelven exactamente.
+    """
+    if book is not None:
+        hit = book.lookup(state)
+        if hit is not None:
+            return hit[1], hit[0], book.depth
+    if endgame is not None and endgame.applies(state):
+        value, best_action = endgame.solve(state)
+        return value, best_action, empty_cells(state)
+    deadline = time.perf_counter() + time_budget_ms / 1000.0
+    maximizing_player = state.current_player()
+    legal = state.legal_actions(maximizing_player)
+    if max_depth is None:
+        # no tiene sentido buscar más allá de las casillas vacías
+        max_depth = 42 - len(state.history())
+
+    # Si ni siquiera la profundidad 1 alcanza a terminar, se juega la columna más central
+    value, best_action, completed = 0.0, max(legal, key=action_center_priority), 0
+    for depth in range(1, max_depth + 1):
+        try:
+            if parallel is not None:
+                value, best_action = parallel.search(state, depth, rollout_at_leaf=rollout_at_leaf, deadline=deadline,
+                                                     first_action=best_action, evaluator=evaluator)
+            else:
+                value, best_action = alpha_beta(state, depth, -float('inf'), float('inf'), maximizing_player,
+                                                rollout_at_leaf, tt, deadline, first_action=best_action,
+                                                evaluator=evaluator, endgame=endgame)
+        except SearchTimeout:
+            break
+        completed = depth
+    return value, best_action, completed
+
+
+# Estado de cada proceso de ParallelRootSearch (se define en _init_worker)
+_worker_game = None
+_worker_tt = None
+_worker_shared_alpha = None
+
+
+def _init_worker(engine, zobrist, shared_alpha, tt_max_mb):
+    """Inicializa un proceso: juego propio, tabla de transposición propia y el alpha compartido."""
+    global _worker_game, _worker_tt, _worker_shared_alpha, _rollout_rng
+    _worker_game = load_game(engine, zobrist=zobrist)
+    _worker_tt = TranspositionTable(max_bytes=tt_max_mb * 1024 * 1024) if tt_max_mb else None
+    _worker_shared_alpha = shared_alpha
+    # Con fork todos los procesos heredan el mismo estado aleatorio: se vuelve a sembrar en cada uno
+    random.seed()
+    _rollout_rng = np.random.default_rng()
+
+
+def _search_root_move(history, action, depth, beta, rollout_at_leaf, deadline, evaluator):
+    """
+    Busca la jugada `action` de la raíz en un proceso del pool. La posición se reconstruye desde
+    su historial (los estados de pyspiel no se pueden enviar entre procesos).
+    Devuelve (accion, valor, exacto): exacto es False si el valor solo es una cota superior
+    porque no superó el alpha compartido.
+    """
+    state = _worker_game.new_initial_state()
+    for a in history:
+        state.apply_action(a)
+    maximizing_player = state.current_player()
+    state.apply_action(action)
+    if state.is_terminal():
+        value = state.returns()[maximizing_player]
+    else:
+        value, _ = alpha_beta(state, depth - 1, _worker_shared_alpha.value, beta, maximizing_player, rollout_at_leaf,
+                              _worker_tt, deadline, evaluator=evaluator, shared_alpha=_worker_shared_alpha)
+    with _worker_shared_alpha.get_lock():
+        exact = value > _worker_shared_alpha.value
+        if exact:
+            _worker_shared_alpha.value = value
+    return action, value, exact
+
+
+class ParallelRootSearch:
+    """
+    Alpha-beta con las jugadas de la raíz repartidas en un ProcessPoolExecutor (Young Brothers Wait):
+    la primera jugada se busca sola para fijar un alpha y las hermanas en paralelo. El alpha de la raíz
+    vive en memoria compartida (multiprocessing.Value) y cada proceso lo relee en todos sus nodos,
+    así una jugada buena encontrada por un proceso poda la búsqueda de los demás.
+
+    El pool se crea una vez y se reutiliza entre jugadas; cada proceso conserva su propia tabla de
+    transposición (tt_max_mb por proceso, 0 para no usarla). `evaluator` debe poder serializarse con
+    pickle (una función de módulo como threat_evaluation, no una lambda).
+    """
+
+    def __init__(self, num_workers=None, engine="pyspiel", zobrist=None, tt_max_mb=64, ybwc=True):
+        if zobrist is None:
+            zobrist = engine == "pyspiel"
+        self.num_workers = num_workers or mp.cpu_count()
+        self.ybwc = ybwc
+        self.shared_alpha = mp.Value("d", -float('inf'))
+        self.executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_worker,
+                                            initargs=(engine, zobrist, self.shared_alpha, tt_max_mb))
+
+    def search(self, state, depth, alpha=-float('inf'), beta=float('inf'), rollout_at_leaf=30,
+               deadline=None, first_action=None, evaluator=None):
+        """
+        Mismo contrato que alpha_beta con maximizing_player = jugador en turno: devuelve
+        (valor, mejor_accion). Si se agota `deadline` se lanza SearchTimeout.
+        """
+        maximizing_player = state.current_player()
+        if state.is_terminal():
+            return state.returns()[maximizing_player], None
+        if depth == 0:
+            return alpha_beta(state, 0, alpha, beta, maximizing_player, rollout_at_leaf, evaluator=evaluator)
+
+        ordered_actions = sorted(state.legal_actions(maximizing_player), key=action_center_priority, reverse=True)
+        if first_action in ordered_actions:
+            ordered_actions.remove(first_action)
+            ordered_actions.insert(0, first_action)
+
+        self.shared_alpha.value = alpha
+        history = list(state.history())
+        args = (depth, beta, rollout_at_leaf, deadline, evaluator)
+        results = {}
+
+        def submit(action):
+            return self.executor.submit(_search_root_move, history, action, *args)
+
+        pending = []
+        rest = ordered_actions
+        if self.ybwc:
+            first = submit(ordered_actions[0])
+            action, value, exact = first.result()
+            results[action] = (value, exact)
+            rest = ordered_actions[1:]
+        if self.shared_alpha.value < beta:
+            pending = [submit(a) for a in rest]
+        try:
+            while pending:
+                done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                pending = list(not_done)
+                for future in done:
+                    action, value, exact = future.result()
+                    results[action] = (value, exact)
+                # Corte beta en la raíz: las jugadas que faltan no pueden cambiar el resultado
+                if self.shared_alpha.value >= beta:
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+            # Las tareas que ya empezaron terminan pronto: con alpha >= beta cortan en su primer nodo
+            if pending:
+                self.shared_alpha.value = float('inf')
+                wait(pending)
+
+        # Igual que en alpha_beta: gana la primera jugada (en el orden de búsqueda) con el mayor valor;
+        # solo se consideran los valores exactos, salvo que ninguno lo sea (fallo bajo en toda la raíz)
+        searched = [a for a in ordered_actions if a in results]
+        candidates = [a for a in searched if results[a][1]] or searched
+        value, best_action = -float('inf'), None
+        for action in candidates:
+            if results[action][0] > value:
+                value, best_action = results[action][0], action
         return value, best_action
 
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
 
+    def __enter__(self):
+        return self
 
+    def __exit__(self, *exc):
+        self.close()
 
-if __name__ == "__main__":
-    game = pyspiel.load_game("connect_four")
+
+# Partida de minimax contra si mismo con la configuracion de abajo (python minimax.py o python -m conecta4 minimax)
+def main():
+    engine = "pyspiel"    #"pyspiel" o "bitboard"
+    use_tt = True         #tabla de transposicion compartida entre turnos
+    tt_max_mb = 64
+    # los estados de pyspiel se envuelven con hash de Zobrist para la tabla de transposicion
+    game = load_game(engine, zobrist=(engine == "pyspiel"))
+    tt = TranspositionTable(max_bytes=tt_max_mb * 1024 * 1024) if use_tt else None
 
     search_depth=6
+    time_budget_ms=None   #si se define (p. ej. 500), se usa profundización iterativa con ese tiempo por jugada
     rollout_at_leaf=8
+    leaf_evaluation = "rollouts"   #"rollouts", "batched_rollouts" (en lote con NumPy) o "heuristic" (amenazas)
+    if leaf_evaluation == "heuristic":
+        evaluator = threat_evaluation
+    elif leaf_evaluation == "batched_rollouts":
+        evaluator = lambda s, p: batched_rollout_evaluation(s, p, n_rollouts=256)
+    else:
+        evaluator = None
     max_print_depth=5
+    use_book = True       #usar opening_book.c4b si existe (se genera con python opening_book.py)
+    book = load_book() if use_book else None
+    endgame_empty = 12    #con estas casillas vacias o menos se resuelve el final exactamente (None = desactivado)
+    # endgame_table.c4e (python endgame.py) guarda finales ya resueltos
+    endgame = EndgameSolver(endgame_empty, table=load_table()) if endgame_empty else None
+    num_workers = 1       #mas de 1: reparte las jugadas de la raiz entre procesos (ParallelRootSearch)
+    # los procesos necesitan un evaluador serializable: con "batched_rollouts" se usa el de modulo (256 rollouts)
+    parallel = None
+    if num_workers > 1:
+        parallel = ParallelRootSearch(num_workers, engine=engine, tt_max_mb=tt_max_mb if use_tt else 0)
+        if leaf_evaluation == "batched_rollouts":
+            evaluator = batched_rollout_evaluation
 
     state = game.new_initial_state()
 
@@ -119,20 +442,40 @@ if __name__ == "__main__":
 
     while not state.is_terminal():
         print("\n--- TURN", turn, "player", state.current_player(), "---")
-        #start = time.time()
-        value, best_action = alpha_beta(
-            state,
-            depth=search_depth,
-            alpha=-float('inf'),
-            beta=float('inf'),
-            maximizing_player=state.current_player(),
-            rollout_at_leaf=rollout_at_leaf,
-        )
-        #end = time.time()
+        start = time.time()
+        hit = book.lookup(state) if book is not None else None
+        if hit is not None:
+            best_action, value = hit
+            print(f"Libro de aperturas (profundidad {book.depth})")
+        elif endgame is not None and endgame.applies(state):
+            value, best_action = endgame.solve(state)
+            print(f"Final resuelto ({endgame.nodes} nodos)")
+        elif time_budget_ms is None and parallel is not None:
+            value, best_action = parallel.search(state, search_depth, rollout_at_leaf=rollout_at_leaf,
+                                                 evaluator=evaluator)
+        elif time_budget_ms is None:
+            value, best_action = alpha_beta(
+                state,
+                depth=search_depth,
+                alpha=-float('inf'),
+                beta=float('inf'),
+                maximizing_player=state.current_player(),
+                rollout_at_leaf=rollout_at_leaf,
+                tt=tt,
+                evaluator=evaluator,
+            )
+        else:
+            value, best_action, reached = iterative_deepening(state, time_budget_ms, rollout_at_leaf=rollout_at_leaf, tt=tt,
+                                                        evaluator=evaluator, parallel=parallel, book=book,
+                                                        endgame=endgame)
+            print(f"Depth reached: {reached}")
+        end = time.time()
 
         print(f"\nBest action at root: {best_action} -> {state.action_to_string(state.current_player(), best_action)}")
         print(f"Estimated value (for player {state.current_player()}): {value:.4f}")
-        #print(f"Nodes visited: {nodes}, time: {end-start:.2f}s")
+        print(f"Time: {end-start:.2f}s")
+        if tt is not None:
+            print(f"TT hits: {tt.hits}/{tt.probes}")
 
         # Aplicar la mejor acción y mostrar estado
         state.apply_action(best_action)
@@ -141,10 +484,14 @@ if __name__ == "__main__":
 
         turn += 1
 
+    if parallel is not None:
+        parallel.close()
+
     # Juego terminado: mostrar recompensas
     returns = state.returns()
     for pid in range(game.num_players()):
         print(f"Utility for player {pid} is {returns[pid]}")
 
 
-
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import numpy as np
+from bitboard import BitboardState, BOTTOM_MASK, mirror_mask, piece_masks
+from transposition import TranspositionTable
+from heuristic import threat_evaluation
+
+# Libro de aperturas: mejor jugada y valor de cada posicion hasta la jugada `max_ply`, calculados una vez
+# con alpha_beta a profundidad `depth`. Las posiciones se guardan por su llave de bitboard (unica, 49 bits)
+# y una posicion y su espejo comparten entrada (se guarda la de llave menor y la jugada se refleja).
+#
+#   cabecera (32 bytes): magia, num_posiciones, max_ply, profundidad
+#   llaves:   uint64[num_posiciones]    ordenadas, se buscan con np.searchsorted
+#   valores:  float32[num_posiciones]   valor para el jugador en turno
+#   jugadas:  uint8[num_posiciones]     mejor columna en la orientacion de la llave guardada
+#
+#     python opening_book.py [--max-ply 4] [--depth 8] [--out opening_book.c4b]
+
+MAGIC = b"C4BOOK01"
+HEADER_BYTES = 32
+NUM_COLS = 7
+DEFAULT_PATH = "opening_book.c4b"
+
+
+def book_key(state):
+    """(llave canonica, reflejada?) de un estado bitboard, ZobristState o pyspiel no terminal."""
+    p0, p1 = piece_masks(state)
+    mask = p0 | p1
+    current = p0 if mask.bit_count() % 2 == 0 else p1
+    # Mismas llaves que BitboardState.hash_key / mirror_hash_key
+    h = current + mask + BOTTOM_MASK
+    hm = mirror_mask(current) + mirror_mask(mask) + BOTTOM_MASK
+    return (hm, True) if hm < h else (h, False)
+
+
+def build_book(max_ply=4, depth=8, evaluator=threat_evaluation, tt_max_mb=256, verbose=True):
+    """
+    Busca todas las posiciones no terminales con hasta `max_ply` fichas (una por par de espejos)
+    y devuelve {llave: (mejor_jugada, valor)}. Una tabla de transposicion se comparte entre posiciones.
+    """
+    from minimax import alpha_beta
+    tt = TranspositionTable(max_bytes=tt_max_mb * 1024 * 1024)
+    entries = {}
+    frontier = [BitboardState()]
+    for ply in range(max_ply + 1):
+        start = time.perf_counter()
+        next_frontier = []
+        queued = set()
+        for state in frontier:
+            key, flipped = book_key(state)
+            value, action = alpha_beta(state, depth, -float("inf"), float("inf"), state.current_player(),
+                                       tt=tt, evaluator=evaluator)
+            entries[key] = (NUM_COLS - 1 - action if flipped else action, value)
+            if ply == max_ply:
+                continue
+            for a in state.legal_actions():
+                child = state.clone()
+                child.apply_action(a)
+                child_key = book_key(child)[0]
+                if not child.is_terminal() and child_key not in queued:
+                    queued.add(child_key)
+                    next_frontier.append(child)
+        if verbose:
+            print(f"Jugada {ply}: {len(frontier)} posiciones en {time.perf_counter() - start:.1f}s")
+        frontier = next_frontier
+    return entries
+
+
+def save_book(entries, path, max_ply, depth):
+    keys = np.array(sorted(entries), dtype=np.uint64)
+    values = np.array([entries[k][1] for k in keys.tolist()], dtype=np.float32)
+    moves = np.array([entries[k][0] for k in keys.tolist()], dtype=np.uint8)
+    header = MAGIC + np.array([len(keys)], dtype=np.uint64).tobytes() + np.array([max_ply, depth], dtype=np.uint32).tobytes()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header.ljust(HEADER_BYTES, b"\0"))
+        f.write(keys.tobytes())
+        f.write(values.tobytes())
+        f.write(moves.tobytes())
+    os.replace(tmp, path)
+
+
+class OpeningBook:
+    """Libro cargado desde un archivo de save_book; lookup(state) -> (jugada, valor) o None."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:8] != MAGIC:
+            raise ValueError(f"{path} no es un libro de aperturas")
+        n = int(np.frombuffer(data, dtype=np.uint64, count=1, offset=8)[0])
+        self.max_ply, self.depth = np.frombuffer(data, dtype=np.uint32, count=2, offset=16).tolist()
+        self.keys = np.frombuffer(data, dtype=np.uint64, count=n, offset=HEADER_BYTES)
+        self.values = np.frombuffer(data, dtype=np.float32, count=n, offset=HEADER_BYTES + 8 * n)
+        self.moves = np.frombuffer(data, dtype=np.uint8, count=n, offset=HEADER_BYTES + 12 * n)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, state):
+        """Mejor jugada y su valor (para el jugador en turno), o None si la posicion no esta en el libro."""
+        if len(state.history()) > self.max_ply or state.is_terminal():
+            return None
+        key, flipped = book_key(state)
+        i = int(np.searchsorted(self.keys, np.uint64(key)))
+        if i == len(self.keys) or int(self.keys[i]) != key:
+            return None
+        move = int(self.moves[i])
+        return (NUM_COLS - 1 - move if flipped else move), float(self.values[i])
+
+
+def load_book(path=DEFAULT_PATH):
+    """OpeningBook de `path`, o None si el archivo no existe (el libro siempre es opcional)."""
+    return OpeningBook(path) if os.path.exists(path) else None
+
+
+def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    max_ply = int(args[args.index("--max-ply") + 1]) if "--max-ply" in args else 4
+    depth = int(args[args.index("--depth") + 1]) if "--depth" in args else 8
+    out_path = args[args.index("--out") + 1] if "--out" in args else DEFAULT_PATH
+    start = time.time()
+    entries = build_book(max_ply, depth)
+    save_book(entries, out_path, max_ply, depth)
+    print(f"{len(entries)} posiciones en {out_path} ({os.path.getsize(out_path)} bytes), {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
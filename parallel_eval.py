@@ -0,0 +1,170 @@
+import math
+import random
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from bitboard import load_game
+from qtable import greedy_action
+
+# Evaluacion de una Q-table (greedy) repartiendo las partidas entre procesos.
+# La tabla se entrega una sola vez a cada proceso por el initializer del pool (con fork se hereda
+# la memoria del padre sin copiarla ni serializarla); cada tarea solo recibe el rango de partidas,
+# el oponente y una semilla, asi los resultados no dependen del numero de procesos.
+
+# Partidas por tarea: tareas chicas reparten mejor la carga (las partidas contra MCTS duran mucho mas)
+GAMES_PER_TASK = 25
+
+# Con num_workers=None se usan todos los nucleos solo desde esta cantidad de partidas; con menos,
+# levantar el pool cuesta mas de lo que ahorra y se juega en este proceso
+PARALLEL_MIN_GAMES = 500
+
+# Estado de cada proceso (ver _init_worker)
+_worker_Q = None
+_worker_game = None
+_worker_key_fn = None
+_worker_book = None
+
+
+def wilson_interval(successes, n, z=1.96):
+    """Intervalo de confianza de Wilson (95% por defecto) para una proporcion successes / n."""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def _init_worker(Q, engine, zobrist, key_fn, book=None):
+    global _worker_Q, _worker_game, _worker_key_fn, _worker_book
+    _worker_Q = Q
+    _worker_game = load_game(engine, zobrist=zobrist)
+    _worker_key_fn = key_fn
+    _worker_book = book
+
+
+def opponent_spec(bot):
+    """
+    Descripcion serializable de `bot` para _make_opponent, o None si no se puede reconstruir
+    con la misma configuracion en otro proceso (p. ej. un MCTSBot con q_evaluator.QTableEvaluator
+    o con ruido de Dirichlet): en ese caso hay que jugar con el bot en este proceso.
+    """
+    from mcts_c4 import ConnectFourMCTS
+    if isinstance(bot, ConnectFourMCTS):
+        return ("mcts_c4", {"uct_c": bot.uct_c, "max_simulations": bot.max_simulations,
+                            "max_time": bot.max_time, "batch_size": bot.batch_size})
+    from open_spiel.python.algorithms import mcts
+    if not isinstance(bot, mcts.MCTSBot) or type(bot.evaluator) is not mcts.RandomRolloutEvaluator:
+        return None
+    if bot._dirichlet_noise is not None or bot.evaluator.max_length is not None:
+        return None
+    if bot._child_selection_fn not in (mcts.SearchNode.uct_value, mcts.SearchNode.puct_value):
+        return None
+    return ("mcts", {"uct_c": bot.uct_c, "max_simulations": bot.max_simulations,
+                     "n_rollouts": bot.evaluator.n_rollouts, "solve": bot.solve,
+                     "puct": bot._child_selection_fn is mcts.SearchNode.puct_value})
+
+
+def _make_opponent(opponent, seed):
+    """
+    Construye el oponente dentro del proceso a partir de su descripcion:
+      - "random"
+      - ("mcts", {"uct_c": 2, "max_simulations": 20, "n_rollouts": 1, "solve": True, "puct": False}):
+        mcts.MCTSBot con rollouts aleatorios
+      - ("mcts_c4", {"uct_c": 2, "max_simulations": 20, "max_time": None, "batch_size": 16}): mcts_c4.ConnectFourMCTS
+      - un objeto con step(state) (solo en este proceso, ver opponent_spec)
+    Devuelve una funcion state -> accion.
+    """
+    if opponent == "random":
+        rng = random.Random(seed)
+        return lambda state: rng.choice(state.legal_actions())
+    if hasattr(opponent, "step"):
+        return opponent.step
+    name, params = opponent
+    if name == "mcts":
+        from open_spiel.python.algorithms import mcts
+        random_state = np.random.RandomState(seed % (1 << 32))
+        evaluator = mcts.RandomRolloutEvaluator(params.get("n_rollouts", 1), random_state=random_state)
+        selection = mcts.SearchNode.puct_value if params.get("puct", False) else mcts.SearchNode.uct_value
+        bot = mcts.MCTSBot(load_game("pyspiel"), params.get("uct_c", 2), params.get("max_simulations", 20),
+                           evaluator, solve=params.get("solve", True), random_state=random_state,
+                           child_selection_fn=selection)
+        return bot.step
+    if name == "mcts_c4":
+        from mcts_c4 import ConnectFourMCTS
+        return ConnectFourMCTS(seed=seed, **params).step
+    raise ValueError(f"Oponente desconocido: {opponent}")
+
+
+def _play_games(first_game, num_games, opponent, alternate, seed):
+    """
+    Juega las partidas first_game .. first_game + num_games - 1 y devuelve [victorias, derrotas, empates]
+    del agente. Con alternate=True el agente es el jugador i % 2 en la partida i; si no, siempre el 0.
+    """
+    opponent_action = _make_opponent(opponent, seed)
+    counts = [0, 0, 0]
+    for i in range(first_game, first_game + num_games):
+        agent = i % 2 if alternate else 0
+        state = _worker_game.new_initial_state()
+        while not state.is_terminal():
+            player = state.current_player()
+            if player == agent:
+                hit = _worker_book.lookup(state) if _worker_book is not None else None
+                if hit is not None:
+                    action = hit[0]
+                else:
+                    action = greedy_action(_worker_Q, _worker_key_fn(state, player), state.legal_actions(player))
+            else:
+                action = opponent_action(state)
+            state.apply_action(action)
+        r = state.returns()[agent]
+        counts[0 if r > 0 else 1 if r < 0 else 2] += 1
+    return counts
+
+
+def evaluate_parallel(Q, num_games, opponent="random", key_fn=None, engine="pyspiel", zobrist=False,
+                      alternate=True, num_workers=None, seed=None, book=None):
+    """
+    Juega `num_games` partidas de la politica greedy de Q contra `opponent` (ver _make_opponent)
+    en `num_workers` procesos (con None, todos los nucleos desde PARALLEL_MIN_GAMES partidas y este proceso
+    con menos; con 1 se juega en este proceso). Un oponente que es un objeto (no una descripcion) solo
+    puede jugar en este proceso.
+    key_fn(state, player) es la funcion de llaves de la tabla (SARSA.state_to_key por defecto).
+    Con `book` (opening_book.OpeningBook) el agente juega las aperturas del libro y usa Q desde ahi.
+
+    Devuelve {"wins", "losses", "draws", "games", "win_rate", "win_ci", "loss_ci", "draw_ci"},
+    con los intervalos de Wilson al 95%.
+    """
+    if key_fn is None:
+        from keys import state_to_key
+        key_fn = state_to_key
+    if num_workers is None:
+        num_workers = mp.cpu_count() if num_games >= PARALLEL_MIN_GAMES else 1
+    if hasattr(opponent, "step") and num_workers > 1:
+        raise ValueError("Un oponente sin descripcion (ver opponent_spec) solo se puede jugar con num_workers=1")
+
+    # Una semilla por tarea derivada de `seed`: misma secuencia de partidas con cualquier numero de procesos
+    starts = list(range(0, num_games, GAMES_PER_TASK))
+    seeds = np.random.SeedSequence(seed).generate_state(len(starts), dtype=np.uint64).tolist()
+    tasks = [(start, min(GAMES_PER_TASK, num_games - start), opponent, alternate, s) for start, s in zip(starts, seeds)]
+
+    if num_workers <= 1:
+        _init_worker(Q, engine, zobrist, key_fn, book)
+        partial = [_play_games(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                 initargs=(Q, engine, zobrist, key_fn, book)) as executor:
+            partial = list(executor.map(_play_games, *zip(*tasks)))
+
+    wins, losses, draws = (sum(c[k] for c in partial) for k in range(3))
+    return {
+        "wins": wins,
+        "losses": losses,
+        "draws": draws,
+        "games": num_games,
+        "win_rate": wins / num_games if num_games else 0.0,
+        "win_ci": wilson_interval(wins, num_games),
+        "loss_ci": wilson_interval(losses, num_games),
+        "draw_ci": wilson_interval(draws, num_games),
+    }
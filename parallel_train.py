@@ -0,0 +1,224 @@
+import random
+import multiprocessing as mp
+import numpy as np
+from qtable import QTable
+
+# Entrenamiento con varios actores: K procesos juegan episodios contra el oponente aleatorio sobre una
+# copia local de la Q-table y cada M episodios envian al coordinador lo que cambiaron (delta por entrada
+# y cantidad de actualizaciones). El coordinador mezcla los deltas en la tabla maestra y devuelve a todos
+# los actores los valores nuevos de las entradas modificadas.
+#
+# Mezclas disponibles:
+#   - "td_sum": se suman los incrementos TD de todos los actores (como si se hubieran aplicado en serie)
+#   - "average": promedio de los deltas ponderado por la cantidad de actualizaciones de cada actor
+
+# Segundos que se espera a cada actor al terminar antes de matarlo
+ACTOR_JOIN_TIMEOUT = 10.0
+
+
+class TrackedQTable(QTable):
+    """
+    QTable que recuerda el valor original y el numero de actualizaciones de cada entrada
+    modificada desde start_segment(), para enviar solo los cambios al coordinador.
+    """
+
+    def start_segment(self):
+        self.base = {}
+        self.visits = {}
+
+    @classmethod
+    def from_table(cls, Q):
+        table = cls(num_actions=Q.num_actions, chunk_size=Q.chunk_size, canonical=Q.canonical)
+        table.index = dict(Q.index)
+        table.keys = list(Q.keys)
+        table.values = Q.values.copy()
+        table._key_bytes = Q._key_bytes
+        table.start_segment()
+        return table
+
+    def set_value(self, key, action, value):
+        stored, flipped = self._locate(key)
+        entry = (stored, self._action(action, flipped))
+        if entry not in self.base:
+            row = self.index.get(stored)
+            self.base[entry] = 0.0 if row is None else float(self.values[row, entry[1]])
+            self.visits[entry] = 0
+        self.visits[entry] += 1
+        super().set_value(key, action, value)
+
+    def take_delta(self):
+        """{(llave_canonica, accion): (nuevo - original, actualizaciones)} del segmento, y empieza otro."""
+        delta = {}
+        for (stored, action), old in self.base.items():
+            row = self.index[stored]
+            delta[(stored, action)] = (float(self.values[row, action]) - old, self.visits[(stored, action)])
+        self.start_segment()
+        return delta
+
+    def apply_updates(self, updates):
+        """Escribe los valores {(llave_canonica, accion): valor} recibidos del coordinador (sin registrarlos)."""
+        for (stored, action), value in updates.items():
+            row = self.intern(stored)
+            self.values[row, action] = value
+
+
+def merge_deltas(Q, deltas, merge="td_sum"):
+    """Aplica a la tabla maestra Q los deltas de los actores y devuelve {entrada: valor nuevo}."""
+    totals = {}
+    for delta in deltas:
+        for entry, (d, visits) in delta.items():
+            total = totals.get(entry)
+            if total is None:
+                totals[entry] = [d, d * visits, visits]
+            else:
+                total[0] += d
+                total[1] += d * visits
+                total[2] += visits
+    updates = {}
+    for (stored, action), (d_sum, d_weighted, visits) in totals.items():
+        row = Q.intern(stored)
+        step = d_sum if merge == "td_sum" else d_weighted / visits
+        value = float(Q.values[row, action]) + step
+        Q.values[row, action] = value
+        updates[(stored, action)] = value
+    return updates
+
+
+# Aprendices: cada uno juega num_episodes con epsilon fijo sobre la tabla local y devuelve [victorias, derrotas, empates]
+def _run_sarsa(Q, num_episodes, epsilon, engine, zobrist):
+    from SARSA import train_sarsa_vs_random
+    _, stats = train_sarsa_vs_random(num_episodes=num_episodes, epsilon_start=epsilon, epsilon_end=epsilon,
+                                     Q=Q, engine=engine, zobrist=zobrist, verbose=False)
+    return [stats["wins"], stats["losses"], stats["draws"]]
+
+
+def _run_q_learning(Q, num_episodes, epsilon, engine, zobrist):
+    import Q_learning
+    # train_q_learning lee la tabla, epsilon y las llaves de Zobrist de variables del modulo (este proceso es del actor)
+    Q_learning.q_table = Q
+    Q_learning.epsilon = epsilon
+    Q_learning.use_zobrist = zobrist
+    return Q_learning.train_q_learning(num_episodes, engine=engine, verbose=False, decay_epsilon=False)
+
+
+# Mismos calendarios de epsilon que el entrenamiento en un proceso, en funcion de los episodios jugados en total
+def _sarsa_epsilon(episode, epsilon_start=0.3, epsilon_end=0.05, epsilon_decay_episodes=4000):
+    if episode >= epsilon_decay_episodes:
+        return epsilon_end
+    frac = episode / float(max(1, epsilon_decay_episodes))
+    return epsilon_start * (1 - frac) + epsilon_end * frac
+
+
+def _q_learning_epsilon(episode):
+    import Q_learning
+    return max(Q_learning.epsilon_min, Q_learning.epsilon_decay ** episode)
+
+
+LEARNERS = {
+    "sarsa": (_run_sarsa, _sarsa_epsilon),
+    "q_learning": (_run_q_learning, _q_learning_epsilon),
+}
+
+
+def _actor_loop(conn, learner, Q, engine, zobrist, seed):
+    """
+    Proceso actor: espera ("run", episodios, epsilon, actualizaciones) y responde ("ok", delta, resultados).
+    Si algo falla responde ("error", excepcion) y termina.
+    """
+    try:
+        random.seed(seed)
+        np.random.seed(seed % (1 << 32))
+        run = LEARNERS[learner][0]
+        local = TrackedQTable.from_table(Q)
+        while True:
+            message = conn.recv()
+            if message[0] == "stop":
+                break
+            _, num_episodes, epsilon, updates = message
+            local.apply_updates(updates)
+            results = run(local, num_episodes, epsilon, engine, zobrist) if num_episodes else [0, 0, 0]
+            conn.send(("ok", local.take_delta(), results))
+    except Exception as e:
+        try:
+            try:
+                conn.send(("error", e))
+            except Exception:
+                # Excepcion que no se puede serializar: se manda su texto
+                conn.send(("error", RuntimeError(repr(e))))
+        except (BrokenPipeError, OSError):
+            pass
+    finally:
+        conn.close()
+
+
+def train_parallel(learner="sarsa", num_episodes=100000, num_actors=None, merge_every=500, merge="td_sum",
+                   Q=None, engine="pyspiel", zobrist=False, seed=None, verbose=True):
+    """
+    Entrena `learner` ("sarsa" o "q_learning") contra el oponente aleatorio con `num_actors` procesos
+    (todos los nucleos por defecto). Cada actor juega `merge_every` episodios por ronda antes de mezclar
+    (ver merge_deltas). Q es la tabla maestra inicial (QTable, se crea una si es None); con "q_learning"
+    debe usar las llaves de Q_learning.state_to_string. Devuelve (Q, {"wins", "losses", "draws"}).
+    """
+    if num_actors is None:
+        num_actors = mp.cpu_count()
+    if Q is None:
+        Q = QTable()
+    epsilon_fn = LEARNERS[learner][1]
+    seeds = np.random.SeedSequence(seed).generate_state(num_actors, dtype=np.uint64).tolist()
+
+    # Los actores son procesos persistentes: reciben la tabla inicial una sola vez al crearse
+    conns, actors = [], []
+    for i in range(num_actors):
+        parent_conn, child_conn = mp.Pipe()
+        actor = mp.Process(target=_actor_loop, args=(child_conn, learner, Q, engine, zobrist, seeds[i]), daemon=True)
+        actor.start()
+        child_conn.close()
+        conns.append(parent_conn)
+        actors.append(actor)
+
+    stats = [0, 0, 0]
+    done = 0
+    updates = {}
+    try:
+        while done < num_episodes:
+            # Ronda completa de merge_every por actor, o en la ultima se reparte lo que falta
+            # (los primeros actores juegan uno mas) para jugar exactamente num_episodes
+            remaining = num_episodes - done
+            if remaining >= merge_every * num_actors:
+                counts = [merge_every] * num_actors
+            else:
+                base, extra = divmod(remaining, num_actors)
+                counts = [base + (i < extra) for i in range(num_actors)]
+            epsilon = epsilon_fn(done)
+            for conn, count in zip(conns, counts):
+                conn.send(("run", count, epsilon, updates))
+            deltas = []
+            for i, conn in enumerate(conns):
+                try:
+                    reply = conn.recv()
+                except EOFError:
+                    raise RuntimeError(f"El actor {i} termino sin responder (codigo {actors[i].exitcode})") from None
+                if reply[0] == "error":
+                    raise RuntimeError(f"Fallo en el actor {i}") from reply[1]
+                _, delta, results = reply
+                deltas.append(delta)
+                stats = [s + r for s, r in zip(stats, results)]
+            updates = merge_deltas(Q, deltas, merge)
+            done += sum(counts)
+            if verbose:
+                total = max(1, sum(stats))
+                print(f"EP {done}: epsilon={epsilon:.3f}, victorias {stats[0] / total * 100:.1f}%, "
+                      f"estados {len(Q)}, entradas mezcladas {len(updates)}")
+    finally:
+        # Un actor caido tiene el pipe cerrado: el error real es el de arriba, no el del envio
+        for conn in conns:
+            try:
+                conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        for actor in actors:
+            actor.join(timeout=ACTOR_JOIN_TIMEOUT)
+            if actor.is_alive():
+                actor.terminate()
+                actor.join()
+    return Q, {"wins": stats[0], "losses": stats[1], "draws": stats[2]}
@@ -0,0 +1,217 @@
+import os
+import sys
+import csv
+import json
+import time
+import subprocess
+
+# Graficas de entrenamiento fuera del proceso que entrena. El entrenamiento solo escribe sus metricas
+# (metrics.CSVSink / JSONLSink); este modulo, en otro proceso, lee lo nuevo del archivo cada cierto tiempo
+# y vuelve a generar los PNG con el backend Agg (sin ventana, no bloquea en servidores sin pantalla).
+# Las series se reducen a lo mas 2 * max_points puntos promediando tramos, asi una curva de 1.5 millones
+# de episodios cuesta lo mismo de dibujar que una de mil.
+#
+#     python plots.py q_learning_metrics.csv [--watch] [--interval 10] [--out Gráficas]
+
+DEFAULT_OUT_DIR = "Gráficas"
+
+# Lineas de referencia para el % de victorias (las mismas de las graficas originales)
+WIN_RATE_REFS = ((50, "gray", "50% (Malo)"), (75, "orange", "75% (Bueno)"), (90, "green", "90% (Excelente)"))
+
+
+class Downsampler:
+    """
+    Serie (x, y) reducida: los puntos llegan de a uno y se promedian en tramos de `stride` puntos.
+    Cuando hay 2 * max_points tramos se juntan de a pares y stride se duplica (memoria y dibujo acotados).
+    """
+
+    def __init__(self, max_points=2000):
+        self.max_points = max_points
+        self.stride = 1
+        self.x = []
+        self.y = []
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+        self._count = 0
+
+    def add(self, x, y):
+        self._sum_x += x
+        self._sum_y += y
+        self._count += 1
+        if self._count == self.stride:
+            self.x.append(self._sum_x / self.stride)
+            self.y.append(self._sum_y / self.stride)
+            self._sum_x = self._sum_y = 0.0
+            self._count = 0
+            if len(self.x) >= 2 * self.max_points:
+                self.x = [(a + b) / 2 for a, b in zip(self.x[::2], self.x[1::2])]
+                self.y = [(a + b) / 2 for a, b in zip(self.y[::2], self.y[1::2])]
+                self.stride *= 2
+
+    def points(self):
+        """Puntos de la serie, incluyendo el tramo que aun no se completa."""
+        if not self._count:
+            return self.x, self.y
+        return self.x + [self._sum_x / self._count], self.y + [self._sum_y / self._count]
+
+    def __len__(self):
+        return len(self.x) + (1 if self._count else 0)
+
+
+class MetricsFollower:
+    """Lee de a poco un archivo de metricas (CSV con cabecera o JSONL) que otro proceso sigue escribiendo."""
+
+    def __init__(self, path):
+        self.path = path
+        self.jsonl = path.endswith(".jsonl")
+        self._offset = 0
+        self._fields = None
+
+    def read_new(self):
+        """Filas completas agregadas desde la llamada anterior, como dicts de floats."""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r", newline="") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # Una linea sin salto final todavia se esta escribiendo: se lee en la proxima llamada
+        end = data.rfind("\n") + 1
+        self._offset += len(data[:end].encode("utf-8"))
+        lines = [line for line in data[:end].splitlines() if line.strip()]
+        if self.jsonl:
+            rows = [json.loads(line) for line in lines]
+        else:
+            records = csv.reader(lines)
+            if self._fields is None:
+                self._fields = next(records, None)
+            rows = [dict(zip(self._fields, record)) for record in records]
+        return [{k: float(v) for k, v in row.items() if _is_number(v)} for row in rows]
+
+
+def _is_number(value):
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def save_figure(path, series, title, xlabel, ylabel, refs=()):
+    """
+    Dibuja {etiqueta: (xs, ys)} en `path` (PNG) con Agg. Usa Figure directamente (sin pyplot),
+    asi no depende del backend configurado ni abre ventanas. El archivo se reemplaza de una vez.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=(10, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    for label, (xs, ys) in series.items():
+        ax.plot(xs, ys, linewidth=2, label=label)
+    for y, color, label in refs:
+        ax.axhline(y=y, color=color, linestyle="--", alpha=0.5, label=label)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    fig.tight_layout()
+    tmp = path + ".tmp.png"
+    fig.savefig(tmp)
+    os.replace(tmp, path)
+
+
+class TrainingPlotter:
+    """
+    Genera <nombre>_victorias.png (tasas de la ventana movil) y <nombre>_velocidad.png (episodios/s)
+    a partir del archivo de metricas de un entrenamiento. update() lee solo las filas nuevas.
+    """
+
+    RATES = (("recent_win_rate", "Victorias"), ("recent_loss_rate", "Derrotas"), ("recent_draw_rate", "Empates"))
+
+    def __init__(self, metrics_path, out_dir=DEFAULT_OUT_DIR, name=None, max_points=2000):
+        self.follower = MetricsFollower(metrics_path)
+        self.out_dir = out_dir
+        self.name = name or os.path.splitext(os.path.basename(metrics_path))[0]
+        self.rates = {column: Downsampler(max_points) for column, _ in self.RATES}
+        self.speed = Downsampler(max_points)
+        self.episodes = 0
+
+    def update(self):
+        """Agrega las filas nuevas y vuelve a dibujar si hubo alguna. Devuelve cuantas filas leyo."""
+        rows = self.follower.read_new()
+        for row in rows:
+            x = row.get("episodes", 0.0)
+            self.episodes = int(x)
+            for column, series in self.rates.items():
+                if column in row:
+                    series.add(x, row[column])
+            if "episodes_per_sec" in row:
+                self.speed.add(x, row["episodes_per_sec"])
+        if rows:
+            self.render()
+        return len(rows)
+
+    def render(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        rates = {label: self.rates[column].points() for column, label in self.RATES if len(self.rates[column])}
+        if rates:
+            save_figure(os.path.join(self.out_dir, f"{self.name}_victorias.png"), rates,
+                        f"Progreso del Entrenamiento ({self.episodes} juegos)", "Episodio", "% de la ventana", WIN_RATE_REFS)
+        if len(self.speed):
+            save_figure(os.path.join(self.out_dir, f"{self.name}_velocidad.png"), {"Episodios/s": self.speed.points()},
+                        "Velocidad de entrenamiento", "Episodio", "Episodios por segundo")
+
+    def watch(self, interval=10.0, idle_timeout=None):
+        """
+        Actualiza cada `interval` segundos hasta Ctrl+C o, con idle_timeout, hasta que el archivo
+        pase esa cantidad de segundos sin filas nuevas.
+        """
+        last_rows = time.monotonic()
+        try:
+            while True:
+                if self.update():
+                    last_rows = time.monotonic()
+                elif idle_timeout is not None and time.monotonic() - last_rows > idle_timeout:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        self.update()
+
+
+def start_renderer(metrics_path, out_dir=DEFAULT_OUT_DIR, interval=10.0):
+    """
+    Lanza el graficador en otro proceso (python plots.py ... --watch) y devuelve el Popen; el proceso que
+    entrena no importa matplotlib. Al terminar se llama stop_renderer para que dibuje lo ultimo y salga.
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plots.py")
+    return subprocess.Popen([sys.executable, script, metrics_path, "--watch", "--interval", str(interval),
+                             "--out", out_dir])
+
+
+def stop_renderer(process, timeout=60):
+    import signal
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    paths = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] not in ("--interval", "--out"))]
+    interval = float(args[args.index("--interval") + 1]) if "--interval" in args else 10.0
+    out_dir = args[args.index("--out") + 1] if "--out" in args else DEFAULT_OUT_DIR
+    for path in paths or ["q_learning_metrics.csv"]:
+        plotter = TrainingPlotter(path, out_dir)
+        if "--watch" in args:
+            plotter.watch(interval)
+        else:
+            plotter.update()
+            print(f"{path}: {plotter.episodes} juegos -> {out_dir}/{plotter.name}_*.png")
+
+
+if __name__ == "__main__":
+    main()
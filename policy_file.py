@@ -0,0 +1,193 @@
+import os
+import sys
+import numpy as np
+from qtable import QTable
+from qtable_file import MappedQTable, CANONICAL, KEY_STR, key_hash, _key_type, _canonical_name
+from keys import state_to_key, state_to_string
+
+# Politica compilada (.c4p): para jugar solo hace falta el argmax sobre las acciones legales, asi que de una
+# Q-table se guarda, por estado, el orden de sus acciones de mayor a menor valor y nada mas. Una jugada es
+# un hash, una busqueda binaria en los hashes y recorrer el orden hasta la primera accion legal.
+#
+#   cabecera (32 bytes): magia, num_estados, tipo_de_llave (uint32), canonizacion (12 bytes)
+#   hashes:   uint64[num_estados]   mismo hash que qtable_file.key_hash, ordenados
+#   ordenes:  uint32[num_estados]   accion i-esima (mejor primero) en los bits 3*i .. 3*i + 2, y en el bit
+#                                   21 + i - 1 si la accion i-esima empata con la anterior (i = 1 .. 6)
+#
+# 12 bytes por estado, contra la llave, las 7 floats y el diccionario de una QTable.
+# Empates: gana la accion legal menor, como en greedy_action. En tablas canonizadas una llave reflejada
+# invierte las columnas, asi que ahi se busca la menor accion real dentro del primer grupo empatado.
+#
+#     python policy_file.py q_table_sarsa.qtb [--out q_table_sarsa.c4p]
+
+MAGIC = b"C4POL002"
+HEADER_BYTES = 32
+NUM_ACTIONS = 7
+ACTION_BITS = 3
+TIE_SHIFT = NUM_ACTIONS * ACTION_BITS
+DEFAULT_SUFFIX = ".c4p"
+
+
+def pack_orders(values):
+    """
+    (n, 7) valores -> uint32[n] con las acciones ordenadas de mayor a menor valor (empates: accion menor)
+    y un bit por posicion que dice si empata con la anterior.
+    """
+    values = np.asarray(values, dtype=np.float32)
+    order = np.argsort(-values, axis=1, kind="stable")
+    ranked = np.take_along_axis(values, order, axis=1)
+    ties = (ranked[:, 1:] == ranked[:, :-1]).astype(np.uint32)
+    shifts = (ACTION_BITS * np.arange(NUM_ACTIONS)).astype(np.uint32)
+    tie_shifts = (TIE_SHIFT + np.arange(NUM_ACTIONS - 1)).astype(np.uint32)
+    packed = np.bitwise_or.reduce(order.astype(np.uint32) << shifts, axis=1)
+    packed |= np.bitwise_or.reduce(ties << tie_shifts, axis=1)
+    return packed.astype(np.uint32)
+
+
+def compile_policy(Q, path, canonical=None):
+    """
+    Escribe la politica greedy de Q (QTable, MappedQTable o dict {(estado, accion): valor}) en `path`.
+    `canonical` como en qtable_file.save_qtable; por defecto se deduce de Q.
+    """
+    if isinstance(Q, MappedQTable):
+        hashes = np.asarray(Q.hashes)
+        values = Q.values
+        key_type = Q.key_type
+        canonical = Q.canonical_name if canonical is None else canonical
+    else:
+        if not isinstance(Q, QTable):
+            Q = QTable.from_dict(Q)
+        if canonical is None:
+            canonical = _canonical_name(Q.canonical)
+        key_type = _key_type(Q.keys)
+        hashes = np.array([key_hash(k) for k in Q.keys], dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+        hashes = hashes[order]
+        if len(hashes) > 1 and (hashes[1:] == hashes[:-1]).any():
+            raise ValueError("Colision de hash entre dos estados distintos")
+        values = Q.values[:len(Q)][order]
+    if np.shape(values)[1] != NUM_ACTIONS:
+        raise ValueError(f"Se esperaban {NUM_ACTIONS} acciones por estado")
+    orders = pack_orders(values)
+    header = MAGIC + np.array([len(hashes)], dtype=np.uint64).tobytes() + np.array([key_type], dtype=np.uint32).tobytes()
+    header += canonical.encode("ascii").ljust(12, b"\0")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(hashes.tobytes())
+        f.write(orders.tobytes())
+    os.replace(tmp, path)
+
+
+class CompiledPolicy:
+    """
+    Politica de solo lectura sobre un .c4p mapeado en memoria. act(state, legal_mask) -> accion;
+    best_action(key, legal_actions) permite usarla donde se usa una Q-table con greedy_action
+    (evaluate_agent_sarsa, visualize_game_terminal, parallel_eval). Estados desconocidos: la accion legal menor.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_BYTES)
+        if header[:8] != MAGIC:
+            raise ValueError(f"{path} no es una politica compilada")
+        n = int(np.frombuffer(header, dtype=np.uint64, count=1, offset=8)[0])
+        self.key_type = int(np.frombuffer(header, dtype=np.uint32, count=1, offset=16)[0])
+        self.canonical_name = header[20:32].rstrip(b"\0").decode("ascii")
+        self.canonical = CANONICAL[self.canonical_name] if self.canonical_name else None
+        self._n = n
+        if n:
+            self.hashes = np.memmap(path, dtype=np.uint64, mode="r", offset=HEADER_BYTES, shape=(n,))
+            self.orders = np.memmap(path, dtype=np.uint32, mode="r", offset=HEADER_BYTES + 8 * n, shape=(n,))
+        else:
+            self.hashes = np.zeros(0, dtype=np.uint64)
+            self.orders = np.zeros(0, dtype=np.uint32)
+
+    def __len__(self):
+        return self._n
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def state_key(self, state):
+        """Llave de `state` con la funcion de llaves con la que se entreno la tabla."""
+        if self.key_type == KEY_STR:
+            return state_to_string(state)
+        return state_to_key(state, state.current_player())
+
+    def _order(self, key):
+        """(orden empaquetado o None, reflejada?) de `key`."""
+        flipped = False
+        if self.canonical is not None:
+            key, flipped = self.canonical(key)
+        h = key_hash(key)
+        i = int(np.searchsorted(self.hashes, np.uint64(h)))
+        if i < self._n and int(self.hashes[i]) == h:
+            return int(self.orders[i]), flipped
+        return None, flipped
+
+    def act_key(self, key, legal_mask):
+        """Mejor accion de `key` entre las de `legal_mask` (bit a = columna a legal)."""
+        packed, flipped = self._order(key)
+        if packed is None:
+            return (legal_mask & -legal_mask).bit_length() - 1
+        best = None
+        for i in range(NUM_ACTIONS):
+            if best is not None and not packed >> (TIE_SHIFT + i - 1) & 1:
+                return best
+            a = packed >> (ACTION_BITS * i) & 7
+            if not flipped:
+                if legal_mask >> a & 1:
+                    return a
+                continue
+            # Reflejada: el orden guardado pone primero la columna real mayor del grupo empatado
+            a = NUM_ACTIONS - 1 - a
+            if legal_mask >> a & 1 and (best is None or a < best):
+                best = a
+        if best is not None:
+            return best
+        raise ValueError("legal_mask sin acciones legales")
+
+    def act(self, state, legal_mask=None):
+        if legal_mask is None:
+            legal_mask = 0
+            for a in state.legal_actions():
+                legal_mask |= 1 << a
+        return self.act_key(self.state_key(state), legal_mask)
+
+    def best_action(self, key, legal_actions):
+        legal_mask = 0
+        for a in legal_actions:
+            legal_mask |= 1 << a
+        return self.act_key(key, legal_mask)
+
+    def memory_bytes(self):
+        return HEADER_BYTES + 12 * self._n
+
+
+def load_policy(path):
+    """CompiledPolicy de `path`, o None si el archivo no existe."""
+    return CompiledPolicy(path) if os.path.exists(path) else None
+
+
+def main(args=None):
+    from qtable_file import load_qtable
+    args = sys.argv[1:] if args is None else args
+    out_path = args[args.index("--out") + 1] if "--out" in args else None
+    paths = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] != "--out")]
+    for path in paths or ["q_table_sarsa.qtb"]:
+        Q = load_qtable(path)
+        if Q is None:
+            print(f"No se encontro {path}")
+            continue
+        target = out_path or os.path.splitext(path)[0] + DEFAULT_SUFFIX
+        compile_policy(Q, target)
+        print(f"{path} ({os.path.getsize(Q.path)} bytes) -> {target} ({os.path.getsize(target)} bytes, {len(Q)} estados)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import sys
+import time
+
+# Perfil por fases de los ciclos de entrenamiento: tiempo de reloj y numero de llamadas de cada fase
+# (clone, apply_action, armado de llaves, seleccion epsilon-greedy, lectura/escritura de la Q-table...).
+#
+#     profiler = PhaseProfiler("sarsa", report_every=1000, folded_path="sarsa.folded")
+#     with profiler.phase("apply_action"):
+#         state.apply_action(a)
+#     profiler.tick()        # una vez por episodio: cada report_every episodios imprime la tabla
+#     profiler.close()       # ultima tabla y archivo .folded
+#
+# Las fases se pueden anidar. El archivo .folded tiene una linea "raiz;fase;subfase microsegundos" por pila
+# con el tiempo propio de cada una (formato de flamegraph.pl / speedscope / inferno).
+# Sin perfil los entrenamientos usan NULL_PROFILER, cuyas fases no hacen nada.
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullProfiler:
+    """Perfil desactivado: phase() devuelve siempre el mismo contexto vacio."""
+
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def tick(self, n=1):
+        pass
+
+    def report(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _Phase:
+    __slots__ = ("profiler", "name")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._stack.append((self.name, time.perf_counter(), [0.0]))
+        return self
+
+    def __exit__(self, *exc):
+        profiler = self.profiler
+        name, start, children = profiler._stack.pop()
+        elapsed = time.perf_counter() - start
+        path = profiler._path() + (name,)
+        entry = profiler.phases.get(path)
+        if entry is None:
+            entry = profiler.phases[path] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += elapsed - children[0]
+        if profiler._stack:
+            profiler._stack[-1][2][0] += elapsed
+        return False
+
+
+class PhaseProfiler:
+    """
+    Acumula {pila de fases: [llamadas, tiempo total, tiempo propio]}.
+    report_every: cada cuantos episodios (tick) se imprime la tabla en `stream` (0 = solo al cerrar).
+    folded_path: archivo donde close() escribe las pilas en formato "folded".
+    """
+
+    def __init__(self, name="train", report_every=0, folded_path=None, stream=None):
+        self.name = name
+        self.report_every = report_every
+        self.folded_path = folded_path
+        self.stream = stream or sys.stdout
+        self.phases = {}
+        self.episodes = 0
+        self._stack = []
+        self._cache = {}
+        self._start = time.perf_counter()
+
+    def _path(self):
+        return tuple(name for name, _, _ in self._stack)
+
+    def phase(self, name):
+        ctx = self._cache.get(name)
+        if ctx is None:
+            ctx = self._cache[name] = _Phase(self, name)
+        return ctx
+
+    def tick(self, n=1):
+        """Marca el fin de `n` episodios."""
+        self.episodes += n
+        if self.report_every and self.episodes % self.report_every == 0:
+            self.report()
+
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    def untracked(self):
+        """Tiempo de reloj que no cae en ninguna fase de primer nivel."""
+        return self.elapsed() - sum(entry[1] for path, entry in self.phases.items() if len(path) == 1)
+
+    def _tree_order(self):
+        """Pilas en orden de arbol: cada fase seguida de sus subfases, hermanas de mayor a menor tiempo."""
+        children = {}
+        for path in self.phases:
+            children.setdefault(path[:-1], []).append(path)
+        order = []
+
+        def visit(parent):
+            for path in sorted(children.get(parent, ()), key=lambda p: -self.phases[p][1]):
+                order.append(path)
+                visit(path)
+
+        visit(())
+        return order
+
+    def report(self):
+        """Imprime la tabla de fases (subfases bajo su fase, de mayor a menor tiempo)."""
+        wall = max(self.elapsed(), 1e-9)
+        out = self.stream
+        print(f"[{self.name}] {self.episodes} episodios, {wall:.2f}s", file=out)
+        print(f"  {'fase':<32}{'llamadas':>12}{'total s':>10}{'propio s':>10}{'%':>7}{'us/llamada':>12}", file=out)
+        for path in self._tree_order():
+            calls, total, own = self.phases[path]
+            label = "  " * (len(path) - 1) + path[-1]
+            print(f"  {label:<32}{calls:>12}{total:>10.3f}{own:>10.3f}{total / wall * 100:>7.1f}"
+                  f"{total / calls * 1e6:>12.2f}", file=out)
+        untracked = self.untracked()
+        print(f"  {'(sin fase)':<32}{'':>12}{untracked:>10.3f}{untracked:>10.3f}{untracked / wall * 100:>7.1f}",
+              file=out, flush=True)
+
+    def folded(self):
+        """Lineas "raiz;fase;... microsegundos" con el tiempo propio de cada pila."""
+        lines = [f"{self.name} {max(0, int(self.untracked() * 1e6))}"]
+        for path, (_, _, own) in self.phases.items():
+            lines.append(f"{';'.join((self.name,) + path)} {max(0, int(own * 1e6))}")
+        return lines
+
+    def write_folded(self, path):
+        with open(path, "w") as f:
+            f.write("\n".join(self.folded()) + "\n")
+
+    def close(self):
+        self.report()
+        if self.folded_path:
+            self.write_folded(self.folded_path)
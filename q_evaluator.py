@@ -0,0 +1,161 @@
+import sys
+import math
+import random
+import numpy as np
+from bitboard import BitboardState
+from keys import state_to_key
+from mcts_c4 import playout
+
+# Evaluador para el MCTS de open_spiel (misma interfaz que mcts.RandomRolloutEvaluator: evaluate y prior)
+# que usa los valores de una Q-table ya entrenada en vez de partidas aleatorias:
+#   - estado conocido: prior = softmax(Q / temperatura) sobre las acciones legales y valor = max Q legal
+#   - estado que no esta en la tabla: prior uniforme y valor promedio de n_rollouts partidas aleatorias
+# Las consultas a la tabla se guardan en un cache por llave que dura toda la busqueda (y las siguientes).
+# hits / misses dicen que fraccion de los estados visitados por la busqueda cubre la tabla.
+#
+#     python q_evaluator.py q_table_sarsa.qtb [--sims 5,10,20] [--baseline 100] [--games 40]
+
+
+class QTableEvaluator:
+    """
+    Q: QTable, MappedQTable o dict {(llave, accion): valor}; key_fn(state, player) su funcion de llaves.
+    Los valores de Q son para el jugador en turno y se recortan a [-1, 1].
+    """
+
+    def __init__(self, Q, key_fn=state_to_key, temperature=0.25, n_rollouts=1, seed=None, cache_size=1 << 20):
+        self.Q = Q
+        self.key_fn = key_fn
+        self.temperature = temperature
+        self.n_rollouts = n_rollouts
+        self.cache_size = cache_size
+        self._random = random.Random(seed).random
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _q_values(self, key, legal_actions):
+        """Valores de las acciones legales, o None si el estado no esta en la tabla."""
+        if hasattr(self.Q, "lookup"):
+            q = self.Q.lookup(key)
+            return None if q is None else [float(q[a]) for a in legal_actions]
+        if not any((key, a) in self.Q for a in legal_actions):
+            return None
+        return [self.Q.get((key, a), 0.0) for a in legal_actions]
+
+    def _lookup(self, state):
+        """(valor para el jugador en turno, prior) de la tabla, o (None, prior uniforme) si el estado no esta."""
+        player = state.current_player()
+        key = self.key_fn(state, player)
+        entry = self._cache.get(key)
+        if entry is not None:
+            return entry
+        legal_actions = state.legal_actions(player)
+        q = self._q_values(key, legal_actions)
+        if q is None:
+            entry = (None, [(a, 1.0 / len(legal_actions)) for a in legal_actions])
+        else:
+            best = max(q)
+            weights = [math.exp((v - best) / self.temperature) for v in q]
+            total = sum(weights)
+            entry = (max(-1.0, min(1.0, best)), [(a, w / total) for a, w in zip(legal_actions, weights)])
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[key] = entry
+        return entry
+
+    def _rollout_value(self, state):
+        board = getattr(state, "state", state)
+        if not isinstance(board, BitboardState):
+            board = BitboardState.from_history(state.history())
+        player = board.current_player()
+        current, mask = board.pieces(player), board.pieces(0) | board.pieces(1)
+        total = sum(playout(current, mask, board.move_number(), self._random) for _ in range(self.n_rollouts))
+        return total / self.n_rollouts
+
+    def evaluate(self, state):
+        if state.is_terminal():
+            return np.array(state.returns())
+        value, _ = self._lookup(state)
+        if value is None:
+            self.misses += 1
+            value = self._rollout_value(state)
+        else:
+            self.hits += 1
+        return np.array([value, -value] if state.current_player() == 0 else [-value, value])
+
+    def prior(self, state):
+        return self._lookup(state)[1]
+
+    def coverage(self):
+        """Fraccion de las hojas evaluadas que estaban en la tabla."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+
+def q_mcts_bot(Q, max_simulations=20, uct_c=2, key_fn=state_to_key, temperature=0.25, n_rollouts=1, seed=None,
+               puct=True):
+    """MCTSBot de open_spiel guiado por Q (con puct=True los priors de la tabla ordenan la exploracion)."""
+    from open_spiel.python.algorithms import mcts
+    from bitboard import load_game
+    evaluator = QTableEvaluator(Q, key_fn, temperature, n_rollouts, seed)
+    random_state = np.random.RandomState(None if seed is None else seed % (1 << 32))
+    selection = mcts.SearchNode.puct_value if puct else mcts.SearchNode.uct_value
+    return mcts.MCTSBot(load_game("pyspiel"), uct_c, max_simulations, evaluator, random_state=random_state,
+                        child_selection_fn=selection)
+
+
+def _match(bot, opponent, games, game):
+    """[victorias, derrotas, empates] de `bot` contra `opponent`, alternando quien empieza."""
+    counts = [0, 0, 0]
+    for i in range(games):
+        me = i % 2
+        state = game.new_initial_state()
+        while not state.is_terminal():
+            state.apply_action(bot.step(state) if state.current_player() == me else opponent.step(state))
+        r = state.returns()[me]
+        counts[0 if r > 0 else 1 if r < 0 else 2] += 1
+    return counts
+
+
+def search_savings(Q, sims=(5, 10, 20), baseline=100, games=40, seed=0):
+    """
+    Juega el MCTS guiado por Q con cada cantidad de simulaciones de `sims` contra el MCTS de rollouts
+    aleatorios con `baseline` simulaciones. Devuelve [(sims, victorias, derrotas, empates, cobertura)]:
+    cuantas menos simulaciones necesita para igualar al de referencia, mas busqueda ahorra la tabla.
+    """
+    from open_spiel.python.algorithms import mcts
+    from bitboard import load_game
+    game = load_game("pyspiel")
+    rows = []
+    for n in sims:
+        bot = q_mcts_bot(Q, max_simulations=n, seed=seed)
+        random_state = np.random.RandomState(seed)
+        opponent = mcts.MCTSBot(game, 2, baseline, mcts.RandomRolloutEvaluator(random_state=random_state),
+                                random_state=random_state)
+        wins, losses, draws = _match(bot, opponent, games, game)
+        rows.append((n, wins, losses, draws, bot.evaluator.coverage()))
+    return rows
+
+
+def main(args=None):
+    from qtable_file import load_qtable
+    args = sys.argv[1:] if args is None else args
+    path = args[0] if args and not args[0].startswith("--") else "q_table_sarsa.qtb"
+    sims = [int(s) for s in args[args.index("--sims") + 1].split(",")] if "--sims" in args else [5, 10, 20]
+    baseline = int(args[args.index("--baseline") + 1]) if "--baseline" in args else 100
+    games = int(args[args.index("--games") + 1]) if "--games" in args else 40
+    Q = load_qtable(path)
+    if Q is None:
+        print(f"No se encontro {path}")
+        return
+    print(f"MCTS guiado por {path} contra MCTS con {baseline} simulaciones ({games} partidas)")
+    for n, wins, losses, draws, coverage in search_savings(Q, sims, baseline, games):
+        print(f"  {n:>5} simulaciones: {wins}V {losses}D {draws}E | estados en la tabla: {coverage * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+import sys
+import numpy as np
+
+# Tabla Q compacta: cada llave de estado se guarda una sola vez y se asocia a una fila entera;
+# los valores de las 7 acciones viven en una matriz float32 contigua que crece por bloques.
+# Sustituye a defaultdict(float) con llaves (estado, accion) y a defaultdict(lambda: defaultdict(float)).
+
+NUM_ACTIONS = 7
+
+# Largo del prefijo b"p:" + jugador + b"obs:" de SARSA.state_to_key y tamano de una fila del tablero
+_OBS_PREFIX_LEN = 7
+_ROW_LEN = 7
+
+
+def mirror_obs_key(key):
+    """Refleja una llave de SARSA.state_to_key invirtiendo cada fila de 7 celdas de los 3 planos."""
+    obs = np.frombuffer(key, dtype=np.int8, offset=_OBS_PREFIX_LEN).reshape(-1, _ROW_LEN)
+    return key[:_OBS_PREFIX_LEN] + obs[:, ::-1].tobytes()
+
+
+def mirror_board_string(key):
+    """Refleja una llave de Q_learning.state_to_string (filas 'x'/'o'/'.' terminadas en salto de linea)."""
+    if key == "terminal":
+        return key
+    return "".join(line[::-1] + "\n" for line in key.split("\n")[:-1])
+
+
+def canonical_obs_key(key):
+    """(llave canonica, reflejada?) para llaves de state_to_key: la menor entre la posicion y su espejo."""
+    mirrored = mirror_obs_key(key)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+def canonical_board_string(key):
+    """(llave canonica, reflejada?) para llaves de state_to_string."""
+    mirrored = mirror_board_string(key)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+class QTable:
+    """
+    Q-table respaldada por arreglos:
+      - index: dict llave_estado -> fila
+      - keys: lista fila -> llave_estado
+      - values: matriz float32 (capacidad, NUM_ACTIONS)
+
+    Acepta tambien el protocolo de diccionario con llaves (estado, accion) que usan
+    SARSA.py y eval.py (Q[(s, a)], Q[(s, a)] = v, Q.get((s, a), 0.0)), asi que puede
+    reemplazar directamente al defaultdict(float). Leer un estado que no existe devuelve 0.0
+    sin insertarlo.
+
+    canonical: funcion opcional llave -> (llave_canonica, reflejada). Con ella la posicion y su
+    espejo comparten fila (Conecta 4 es simetrico izquierda-derecha) y las acciones de una
+    posicion reflejada se traducen a -> 6 - a al leer y al escribir. Ver canonical_obs_key y
+    canonical_board_string.
+    """
+
+    def __init__(self, num_actions=NUM_ACTIONS, chunk_size=1 << 16, canonical=None):
+        self.num_actions = num_actions
+        self.chunk_size = chunk_size
+        self.canonical = canonical
+        self._recent = {}  # cache de las ultimas llaves canonizadas (los ciclos alternan entre s y s')
+        self.index = {}
+        self.keys = []
+        self.values = np.zeros((chunk_size, num_actions), dtype=np.float32)
+        self._key_bytes = 0  # tamano acumulado de los objetos llave, para memory_bytes() en O(1)
+        self._dirty = None   # filas modificadas desde el ultimo take_dirty() (ver track_changes)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _grow(self):
+        # Crece por bloques (al menos chunk_size filas, o un 25% de la capacidad para no copiar seguido)
+        extra = max(self.chunk_size, len(self.values) // 4)
+        grown = np.zeros((len(self.values) + extra, self.num_actions), dtype=np.float32)
+        grown[:len(self.values)] = self.values
+        self.values = grown
+
+    def _locate(self, key):
+        """(llave almacenada, reflejada?) para `key`; sin canonizacion es (key, False)."""
+        if self.canonical is None:
+            return key, False
+        located = self._recent.get(key)
+        if located is None:
+            if len(self._recent) >= 8:
+                self._recent.clear()
+            located = self._recent[key] = self.canonical(key)
+        return located
+
+    def _action(self, action, flipped):
+        return self.num_actions - 1 - action if flipped else action
+
+    def intern(self, key):
+        """Devuelve la fila de `key` (ya canonizada), creandola (con valores 0) si no existe."""
+        row = self.index.get(key)
+        if row is None:
+            row = len(self.keys)
+            if row == len(self.values):
+                self._grow()
+            self.index[key] = row
+            self.keys.append(key)
+            self._key_bytes += sys.getsizeof(key)
+        return row
+
+    def intern_state(self, key):
+        """(fila, reflejada?) de una llave sin canonizar, creando la fila si no existe."""
+        stored, flipped = self._locate(key)
+        return self.intern(stored), flipped
+
+    def row(self, key):
+        """Fila de `key` o None si el estado no esta en la tabla."""
+        return self.index.get(self._locate(key)[0])
+
+    def get_value(self, key, action, default=0.0):
+        stored, flipped = self._locate(key)
+        row = self.index.get(stored)
+        if row is None:
+            return default
+        return float(self.values[row, self._action(action, flipped)])
+
+    def set_value(self, key, action, value):
+        stored, flipped = self._locate(key)
+        # intern() puede reemplazar self.values al crecer, por eso la fila se obtiene antes
+        row = self.intern(stored)
+        self.values[row, self._action(action, flipped)] = value
+        if self._dirty is not None:
+            self._dirty.add(row)
+
+    def add_values(self, rows, actions, deltas):
+        """Suma deltas[i] a values[rows[i], actions[i]] (acciones de la fila guardada; las repetidas se acumulan)."""
+        np.add.at(self.values, (rows, actions), deltas)
+        if self._dirty is not None:
+            self._dirty.update(rows.tolist())
+
+    def q_values(self, key):
+        """Vector con los valores de todas las acciones (ceros si el estado no existe)."""
+        stored, flipped = self._locate(key)
+        row = self.index.get(stored)
+        if row is None:
+            return np.zeros(self.num_actions, dtype=np.float32)
+        if flipped:
+            return self.values[row, ::-1]
+        return self.values[row]
+
+    def lookup(self, key):
+        """Como q_values, pero None si el estado no esta en la tabla."""
+        stored, flipped = self._locate(key)
+        row = self.index.get(stored)
+        if row is None:
+            return None
+        return self.values[row, ::-1] if flipped else self.values[row]
+
+    def values_for(self, keys):
+        """Matriz (len(keys), NUM_ACTIONS) con los valores de varios estados en una sola indexacion."""
+        index = self.index
+        if self.canonical is None:
+            rows = np.array([index.get(k, -1) for k in keys], dtype=np.int64)
+            out = self.values[rows]
+        else:
+            located = [self.canonical(k) for k in keys]
+            rows = np.array([index.get(stored, -1) for stored, _ in located], dtype=np.int64)
+            flipped = np.array([f for _, f in located], dtype=bool)
+            out = self.values[rows]
+            out[flipped] = out[flipped, ::-1]
+        out[rows < 0] = 0.0
+        return out
+
+    def best_action(self, key, legal_actions):
+        """
+        Argmax sobre las acciones legales; en empate gana la primera de legal_actions,
+        igual que max(legal_actions, key=lambda a: Q.get((key, a), 0.0)).
+        """
+        stored, flipped = self._locate(key)
+        row = self.index.get(stored)
+        if row is None:
+            return legal_actions[0]
+        if flipped:
+            q = self.values[row, [self.num_actions - 1 - a for a in legal_actions]]
+        else:
+            q = self.values[row, legal_actions]
+        return legal_actions[int(q.argmax())]
+
+    def track_changes(self, mark_existing=False):
+        """
+        Empieza a registrar las filas que modifica set_value (para checkpoints incrementales).
+        Con mark_existing=True las filas que ya existen cuentan como modificadas.
+        """
+        if self._dirty is None:
+            self._dirty = set()
+        if mark_existing:
+            self._dirty.update(range(len(self.keys)))
+
+    def take_dirty(self):
+        """Filas modificadas desde la llamada anterior (ordenadas), y vuelve a empezar el registro."""
+        rows = sorted(self._dirty)
+        self._dirty = set()
+        return rows
+
+    def snapshot(self):
+        """Copia independiente de la tabla (llaves y valores), p. ej. para guardarla en otro hilo."""
+        table = QTable(num_actions=self.num_actions, chunk_size=self.chunk_size, canonical=self.canonical)
+        table.index = dict(self.index)
+        table.keys = list(self.keys)
+        table.values = self.values[:len(self.keys)].copy()
+        table._key_bytes = self._key_bytes
+        return table
+
+    # Protocolo de diccionario con llaves (estado, accion)
+    def __getitem__(self, key_action):
+        key, action = key_action
+        return self.get_value(key, action)
+
+    def __setitem__(self, key_action, value):
+        key, action = key_action
+        self.set_value(key, action, value)
+
+    def get(self, key_action, default=0.0):
+        key, action = key_action
+        return self.get_value(key, action, default)
+
+    def __contains__(self, key_action):
+        key, action = key_action
+        return self._locate(key)[0] in self.index
+
+    def to_dict(self):
+        """
+        Diccionario {(estado, accion): valor} con las entradas distintas de 0 (formato de los .pkl).
+        Con canonizacion las llaves son las canonicas: hay que volver a cargarlo con el mismo `canonical`.
+        """
+        values = self.values
+        out = {}
+        for row, key in enumerate(self.keys):
+            for action in np.nonzero(values[row])[0].tolist():
+                out[(key, action)] = float(values[row, action])
+        return out
+
+    @classmethod
+    def from_dict(cls, data, num_actions=NUM_ACTIONS, canonical=None):
+        """Carga un diccionario {(estado, accion): valor} o anidado {estado: {accion: valor}}."""
+        table = cls(num_actions=num_actions, canonical=canonical)
+        for k, v in data.items():
+            if isinstance(v, dict):
+                for action, value in v.items():
+                    table.set_value(k, action, value)
+            else:
+                key, action = k
+                table.set_value(key, action, v)
+        return table
+
+    def __getstate__(self):
+        # Al serializar no se guarda la capacidad sobrante
+        state = self.__dict__.copy()
+        state["values"] = self.values[:len(self.keys)].copy()
+        state["index"] = None
+        state["_recent"] = {}
+        state["_dirty"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault("_dirty", None)
+        self.index = {key: row for row, key in enumerate(self.keys)}
+
+    def memory_bytes(self):
+        """Memoria aproximada de la tabla: matriz de valores + dict de indices + lista y objetos llave."""
+        return self.values.nbytes + sys.getsizeof(self.index) + sys.getsizeof(self.keys) + self._key_bytes
+
+    def bytes_per_state(self):
+        """Bytes por estado almacenado (para planificar capacidad)."""
+        if not self.keys:
+            return 0.0
+        return self.memory_bytes() / len(self.keys)
+
+
+def greedy_action(Q, key, legal_actions):
+    """Mejor accion legal para `key` con una QTable (o MappedQTable) o con un dict {(estado, accion): valor}."""
+    if hasattr(Q, "best_action"):
+        return Q.best_action(key, legal_actions)
+    return max(legal_actions, key=lambda a: Q.get((key, a), 0.0))
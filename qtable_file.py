@@ -0,0 +1,300 @@
+import os
+import sys
+import pickle
+import hashlib
+import numpy as np
+from qtable import QTable, canonical_obs_key, canonical_board_string
+from zobrist import split_zobrist_key
+
+# Formato binario de Q-tables (.qtb), pensado para abrirse con np.memmap en milisegundos y compartir las
+# paginas entre procesos (el sistema operativo carga solo lo que se lee):
+#
+#   cabecera (64 bytes): magia, num_estados, num_acciones, tipo_de_llave, canonizacion, tamano de las llaves
+#   hashes:   uint64[num_estados]                   ordenados, se buscan con np.searchsorted
+#   valores:  float32[num_estados, num_acciones]    en el mismo orden que los hashes
+#   offsets:  uint64[num_estados + 1]               posicion de cada llave original en el bloque de llaves
+#   llaves:   bytes                                 llaves originales, solo para volver a una QTable (to_qtable)
+#
+# El hash de una llave bytes/str son 8 bytes de blake2b; una llave entera (Zobrist) se usa tal cual.
+
+MAGIC = b"C4QTAB01"
+HEADER_BYTES = 64
+
+# Tipos de llave
+KEY_BYTES = 0   # SARSA.state_to_key
+KEY_STR = 1     # Q_learning.state_to_string
+KEY_INT = 2     # llaves de Zobrist
+
+# Funciones de canonizacion que se pueden guardar por nombre en la cabecera
+CANONICAL = {
+    "obs": canonical_obs_key,
+    "board": canonical_board_string,
+    "zobrist": split_zobrist_key,
+}
+
+_MASK64 = (1 << 64) - 1
+
+
+def key_hash(key):
+    """Hash de 64 bits de una llave de estado (bytes, str o int)."""
+    if isinstance(key, int):
+        return key & _MASK64
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _key_type(keys):
+    if not keys or isinstance(keys[0], bytes):
+        return KEY_BYTES
+    if isinstance(keys[0], str):
+        return KEY_STR
+    return KEY_INT
+
+
+def _encode_key(key, key_type):
+    if key_type == KEY_BYTES:
+        return key
+    if key_type == KEY_STR:
+        return key.encode("utf-8")
+    return key.to_bytes(8, "little")
+
+
+def _decode_key(raw, key_type):
+    if key_type == KEY_BYTES:
+        return raw
+    if key_type == KEY_STR:
+        return raw.decode("utf-8")
+    return int.from_bytes(raw, "little")
+
+
+def _canonical_name(canonical):
+    for name, fn in CANONICAL.items():
+        if fn is canonical:
+            return name
+    if canonical is None:
+        return ""
+    raise ValueError(f"Canonizacion sin nombre en qtable_file.CANONICAL: {canonical}")
+
+
+def _layout(num_states, num_actions, blob_size):
+    """Offsets (hashes, valores, offsets de llaves, llaves, fin) de cada seccion del archivo."""
+    hashes = HEADER_BYTES
+    values = hashes + 8 * num_states
+    offsets = values + 4 * num_states * num_actions
+    offsets += -offsets % 8
+    blob = offsets + 8 * (num_states + 1)
+    return hashes, values, offsets, blob, blob + blob_size
+
+
+def save_qtable(Q, path, canonical=None):
+    """
+    Guarda Q (QTable o dict {(estado, accion): valor} de los .pkl) en formato .qtb.
+    `canonical` es el nombre de la canonizacion ("obs", "board", "zobrist"); por defecto se deduce de Q.canonical.
+    """
+    if not isinstance(Q, QTable):
+        Q = QTable.from_dict(Q)
+    if canonical is None:
+        canonical = _canonical_name(Q.canonical)
+    keys = Q.keys
+    n = len(keys)
+    key_type = _key_type(keys)
+    hashes = np.array([key_hash(k) for k in keys], dtype=np.uint64)
+    order = np.argsort(hashes, kind="stable")
+    hashes = hashes[order]
+    if n > 1 and (hashes[1:] == hashes[:-1]).any():
+        raise ValueError("Colision de hash entre dos estados distintos")
+    encoded = [_encode_key(keys[i], key_type) for i in order.tolist()]
+    offsets = np.zeros(n + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(k) for k in encoded], dtype=np.uint64)
+    blob = b"".join(encoded)
+
+    h_off, v_off, o_off, b_off, end = _layout(n, Q.num_actions, len(blob))
+    header = MAGIC + np.array([n, Q.num_actions, key_type], dtype=np.uint64).tobytes()
+    header += canonical.encode("ascii").ljust(16, b"\0") + np.uint64(len(blob)).tobytes()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header.ljust(HEADER_BYTES, b"\0"))
+        f.write(hashes.tobytes())
+        f.write(np.ascontiguousarray(Q.values[:n][order]).tobytes())
+        f.write(b"\0" * (o_off - f.tell()))
+        f.write(offsets.tobytes())
+        f.write(blob)
+    # Se reemplaza de una vez para que un lector nunca vea un archivo a medio escribir
+    os.replace(tmp, path)
+
+
+class MappedQTable:
+    """
+    Q-table de solo lectura sobre un archivo .qtb mapeado en memoria. Expone la parte de la interfaz
+    de QTable que usan la evaluacion y el juego: get/[]/in con llaves (estado, accion), q_values,
+    best_action y values_for. Al serializarse (p. ej. hacia un proceso) solo viaja la ruta del archivo.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_BYTES)
+        if header[:8] != MAGIC:
+            raise ValueError(f"{path} no es un archivo .qtb")
+        n, num_actions, key_type = np.frombuffer(header, dtype=np.uint64, count=3, offset=8).tolist()
+        canonical = header[32:48].rstrip(b"\0").decode("ascii")
+        blob_size = int(np.frombuffer(header, dtype=np.uint64, count=1, offset=48)[0])
+        self.num_actions = num_actions
+        self.key_type = key_type
+        self.canonical_name = canonical
+        self.canonical = CANONICAL[canonical] if canonical else None
+        self._n = n
+        h_off, v_off, o_off, b_off, _ = _layout(n, num_actions, blob_size)
+        if n:
+            self.hashes = np.memmap(path, dtype=np.uint64, mode="r", offset=h_off, shape=(n,))
+            self.values = np.memmap(path, dtype=np.float32, mode="r", offset=v_off, shape=(n, num_actions))
+        else:
+            self.hashes = np.zeros(0, dtype=np.uint64)
+            self.values = np.zeros((0, num_actions), dtype=np.float32)
+        self._offsets = (o_off, b_off, blob_size)
+
+    def __len__(self):
+        return self._n
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def _locate(self, key):
+        """(fila o None, reflejada?) de `key`."""
+        flipped = False
+        if self.canonical is not None:
+            key, flipped = self.canonical(key)
+        h = key_hash(key)
+        i = int(np.searchsorted(self.hashes, np.uint64(h)))
+        if i < self._n and int(self.hashes[i]) == h:
+            return i, flipped
+        return None, flipped
+
+    def _action(self, action, flipped):
+        return self.num_actions - 1 - action if flipped else action
+
+    def get_value(self, key, action, default=0.0):
+        row, flipped = self._locate(key)
+        if row is None:
+            return default
+        return float(self.values[row, self._action(action, flipped)])
+
+    def q_values(self, key):
+        row, flipped = self._locate(key)
+        if row is None:
+            return np.zeros(self.num_actions, dtype=np.float32)
+        values = np.array(self.values[row])
+        return values[::-1] if flipped else values
+
+    def lookup(self, key):
+        """Como q_values, pero None si el estado no esta en la tabla."""
+        row, flipped = self._locate(key)
+        if row is None:
+            return None
+        values = np.array(self.values[row])
+        return values[::-1] if flipped else values
+
+    def values_for(self, keys):
+        """Matriz (len(keys), num_acciones) con los valores de varios estados en una sola busqueda."""
+        flips = np.zeros(len(keys), dtype=bool)
+        if self.canonical is not None:
+            located = [self.canonical(k) for k in keys]
+            keys = [k for k, _ in located]
+            flips[:] = [f for _, f in located]
+        wanted = np.array([key_hash(k) for k in keys], dtype=np.uint64)
+        rows = np.searchsorted(self.hashes, wanted)
+        found = rows < self._n
+        found[found] = self.hashes[rows[found]] == wanted[found]
+        out = np.zeros((len(keys), self.num_actions), dtype=np.float32)
+        out[found] = self.values[rows[found]]
+        out[flips] = out[flips, ::-1]
+        return out
+
+    def best_action(self, key, legal_actions):
+        """Misma regla que QTable.best_action: primera accion legal con el mayor valor."""
+        q = self.q_values(key)
+        return legal_actions[int(q[legal_actions].argmax())]
+
+    def get(self, key_action, default=0.0):
+        key, action = key_action
+        return self.get_value(key, action, default)
+
+    def __getitem__(self, key_action):
+        key, action = key_action
+        return self.get_value(key, action)
+
+    def __contains__(self, key_action):
+        return self._locate(key_action[0])[0] is not None
+
+    def stored_keys(self):
+        """Llaves originales (canonicas si la tabla se guardo con canonizacion), en el orden de las filas."""
+        o_off, b_off, blob_size = self._offsets
+        if not self._n:
+            return []
+        offsets = np.memmap(self.path, dtype=np.uint64, mode="r", offset=o_off, shape=(self._n + 1,)).tolist()
+        with open(self.path, "rb") as f:
+            f.seek(b_off)
+            blob = f.read(blob_size)
+        return [_decode_key(blob[offsets[i]:offsets[i + 1]], self.key_type) for i in range(self._n)]
+
+    def to_qtable(self):
+        """Copia en memoria como QTable modificable (para seguir entrenando)."""
+        table = QTable(num_actions=self.num_actions, canonical=self.canonical)
+        for key in self.stored_keys():
+            table.intern(key)
+        table.values[:self._n] = self.values
+        return table
+
+
+def open_qtable(path):
+    return MappedQTable(path)
+
+
+def convert_pickle(pkl_path, out_path=None, canonical=""):
+    """
+    Convierte un .pkl con el dict {(estado, accion): valor} (q_table_sarsa.pkl, q0/q1_tabla_sarsa.pkl)
+    a .qtb. Los .pkl no dicen si la tabla era simetrica: `canonical` indica con que canonizacion se entreno.
+    Devuelve la ruta escrita.
+    """
+    if out_path is None:
+        out_path = os.path.splitext(pkl_path)[0] + ".qtb"
+    with open(pkl_path, "rb") as f:
+        data = pickle.load(f)
+    save_qtable(QTable.from_dict(data), out_path, canonical=canonical)
+    return out_path
+
+
+def load_qtable(path, canonical="", mutable=False):
+    """
+    Abre `path` (.qtb); si no existe pero si el .pkl del mismo nombre, lo convierte primero.
+    Devuelve una MappedQTable (o una QTable si mutable=True), o None si no hay ninguno de los dos.
+    """
+    if not os.path.exists(path):
+        pkl_path = os.path.splitext(path)[0] + ".pkl"
+        if not os.path.exists(pkl_path):
+            return None
+        print(f"Convirtiendo {pkl_path} a {path}...")
+        convert_pickle(pkl_path, path, canonical=canonical)
+    table = MappedQTable(path)
+    return table.to_qtable() if mutable else table
+
+
+def main(args=None):
+    # Uso: python qtable_file.py q_table_sarsa.pkl [q0_tabla_sarsa.pkl ...] [--canonical obs|board|zobrist]
+    args = sys.argv[1:] if args is None else args
+    canonical = ""
+    if "--canonical" in args:
+        i = args.index("--canonical")
+        canonical = args[i + 1]
+        del args[i:i + 2]
+    for pkl_path in args or ["q_table_sarsa.pkl", "q0_tabla_sarsa.pkl", "q1_tabla_sarsa.pkl"]:
+        if os.path.exists(pkl_path):
+            print(f"{pkl_path} -> {convert_pickle(pkl_path, canonical=canonical)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import numpy as np
+
+# Repeticion de experiencia para la Q-table: las transiciones se guardan como registros enteros
+# (fila del estado en la QTable, accion, recompensa, fila del siguiente estado, acciones legales del
+# siguiente estado como mascara de bits) en arreglos NumPy preasignados que funcionan como anillo.
+# q_update_batch muestrea un lote y aplica la actualizacion de Q-learning a todas sus transiciones a la vez:
+#     Q(s, a) <- Q(s, a) + alpha * (r + gamma * max_{a' legal} Q(s', a') - Q(s, a))
+
+NUM_ACTIONS = 7
+_ACTION_BITS = 1 << np.arange(NUM_ACTIONS, dtype=np.uint8)
+
+
+def legal_bits(legal_actions, flipped=False):
+    """Mascara de bits de las acciones legales (reflejadas a -> 6 - a si la fila guardada es el espejo)."""
+    mask = 0
+    for a in legal_actions:
+        mask |= 1 << (NUM_ACTIONS - 1 - a if flipped else a)
+    return mask
+
+
+class ReplayBuffer:
+    """
+    Anillo de `capacity` transiciones. next_state = -1 marca un estado terminal (sin valor futuro).
+    Al llenarse, cada transicion nueva reemplaza a la mas antigua.
+    """
+
+    def __init__(self, capacity=100000, seed=None):
+        self.capacity = capacity
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.full(capacity, -1, dtype=np.int64)
+        self.next_legal = np.zeros(capacity, dtype=np.uint8)
+        self.rng = np.random.default_rng(seed)
+        self._next = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state=-1, next_legal=0):
+        i = self._next
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.next_legal[i] = next_legal
+        self._next = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def sample(self, batch_size):
+        """Indices de `batch_size` transiciones al azar (con reemplazo)."""
+        return self.rng.integers(0, self.size, batch_size)
+
+
+def q_update_batch(Q, buffer, batch_size, alpha, gamma):
+    """
+    Una actualizacion de Q-learning sobre un lote muestreado de `buffer` (Q es una QTable cuyas filas
+    son las que guarda el buffer). Devuelve los errores TD del lote.
+    """
+    idx = buffer.sample(batch_size)
+    states = buffer.states[idx]
+    actions = buffer.actions[idx]
+    next_states = buffer.next_states[idx]
+    legal = (buffer.next_legal[idx][:, None] & _ACTION_BITS) != 0
+
+    values = Q.values
+    next_q = np.where(legal, values[np.maximum(next_states, 0)], -np.inf).max(axis=1)
+    next_q = np.where((next_states >= 0) & legal.any(axis=1), next_q, 0.0)
+    td = buffer.rewards[idx] + gamma * next_q - values[states, actions]
+    Q.add_values(states, actions, alpha * td)
+    return td
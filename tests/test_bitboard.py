@@ -0,0 +1,34 @@
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitboard import BitboardState, load_game, piece_masks
+from endgame import _masks
+from opening_book import book_key
+
+
+def _pyspiel_positions(n, seed=0):
+    """Posiciones no terminales de pyspiel (envueltas con Zobrist) jugadas al azar."""
+    rng = random.Random(seed)
+    game = load_game("pyspiel", zobrist=True)
+    positions = []
+    while len(positions) < n:
+        state = game.new_initial_state()
+        for _ in range(rng.randrange(0, 30)):
+            if state.is_terminal():
+                break
+            state.apply_action(rng.choice(state.legal_actions()))
+        if not state.is_terminal():
+            positions.append(state)
+    return positions
+
+
+def test_masks_from_observation_match_history_replay():
+    for state in _pyspiel_positions(200):
+        board = BitboardState.from_history(state.history())
+        assert piece_masks(state) == (board.pieces(0), board.pieces(1))
+        assert _masks(state) == _masks(board)
+        h, hm = board.hash_key(), board.mirror_hash_key()
+        assert book_key(state) == ((hm, True) if hm < h else (h, False))
@@ -0,0 +1,50 @@
+import os
+import sys
+import csv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Metrics, CSVSink
+
+
+def _read(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_fields_match_snapshot():
+    metrics = Metrics()
+    metrics.counter("states")
+    metrics.gauge("epsilon", lambda: 0.1)
+    assert metrics.fields() == list(metrics.snapshot())
+
+
+def test_csv_sink_rotates_on_different_header(tmp_path):
+    path = str(tmp_path / "m.csv")
+    sink = CSVSink(path, ["a", "b"])
+    sink.write({"a": 1, "b": 2})
+    sink.close()
+
+    # Mismas columnas: se agrega al archivo existente
+    sink = CSVSink(path, ["a", "b"])
+    sink.write({"a": 3, "b": 4})
+    sink.close()
+    assert _read(path) == [["a", "b"], ["1", "2"], ["3", "4"]]
+
+    # Otra cabecera: archivo nuevo en vez de filas desalineadas
+    sink = CSVSink(path, ["a", "c"])
+    sink.write({"a": 5, "c": 6})
+    sink.close()
+    assert sink.path == str(tmp_path / "m.1.csv")
+    assert _read(sink.path) == [["a", "c"], ["5", "6"]]
+    assert len(_read(path)) == 3
+
+
+def test_csv_sink_keeps_late_columns(tmp_path):
+    path = str(tmp_path / "m.csv")
+    sink = CSVSink(path)
+    sink.write({"a": 1})
+    sink.write({"a": 2, "b": 3})
+    sink.close()
+    assert _read(path) == [["a"], ["1"]]
+    assert _read(sink.path) == [["a", "b"], ["2", "3"]]
@@ -0,0 +1,67 @@
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from bitboard import load_game
+from heuristic import threat_evaluation
+from minimax import alpha_beta, ParallelRootSearch
+from transposition import TranspositionTable
+
+INF = float("inf")
+DEPTH = 4
+
+
+class _Value:
+    """Sustituto de multiprocessing.Value para el alpha compartido dentro de un solo proceso."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _positions(n, seed=0):
+    rng = random.Random(seed)
+    game = load_game("bitboard")
+    positions = []
+    while len(positions) < n:
+        state = game.new_initial_state()
+        for _ in range(rng.randrange(2, 20)):
+            state.apply_action(rng.choice(state.legal_actions()))
+            if state.is_terminal():
+                break
+        if not state.is_terminal():
+            positions.append(state)
+    return positions
+
+
+def _plain(state):
+    return alpha_beta(state, DEPTH, -INF, INF, state.current_player(), evaluator=threat_evaluation)[0]
+
+
+@pytest.mark.parametrize("shared", [-INF, -0.5, 0.0, 0.5, INF])
+def test_tt_filled_under_shared_alpha_matches_plain_search(shared):
+    # Como en _search_root_move (y al cancelar, con alpha compartido = +inf): las hijas de la raiz se buscan
+    # con el alpha compartido y su tabla se reutiliza despues en una busqueda normal
+    for state in _positions(30):
+        player = state.current_player()
+        tt = TranspositionTable(max_bytes=8 * 1024 * 1024)
+        for action in state.legal_actions():
+            child = state.clone()
+            child.apply_action(action)
+            if not child.is_terminal():
+                alpha_beta(child, DEPTH - 1, max(-INF, min(shared, 1.0)), INF, player, tt=tt,
+                           evaluator=threat_evaluation, shared_alpha=_Value(shared))
+        value, _ = alpha_beta(state, DEPTH, -INF, INF, player, tt=tt, evaluator=threat_evaluation)
+        assert value == pytest.approx(_plain(state))
+
+
+def test_parallel_root_search_matches_alpha_beta():
+    positions = _positions(12, seed=1)
+    with ParallelRootSearch(num_workers=2, engine="bitboard") as search:
+        # Dos pasadas: la segunda reutiliza las tablas de los procesos llenadas por la primera
+        for _ in range(2):
+            for state in positions:
+                value, _ = search.search(state, DEPTH, evaluator=threat_evaluation)
+                assert value == pytest.approx(_plain(state))
@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from parallel_train import train_parallel
+
+
+def test_plays_exactly_num_episodes():
+    _, stats = train_parallel("sarsa", num_episodes=23, num_actors=3, merge_every=4, seed=0, verbose=False)
+    assert sum(stats.values()) == 23
+
+
+def test_q_learning_uses_zobrist_keys():
+    Q, _ = train_parallel("q_learning", num_episodes=8, num_actors=2, merge_every=4, zobrist=True, seed=0,
+                          verbose=False)
+    assert len(Q) and all(isinstance(k, int) for k in Q.keys)
+
+
+def test_actor_error_is_reported():
+    with pytest.raises(RuntimeError) as info:
+        train_parallel("sarsa", num_episodes=8, num_actors=2, merge_every=4, engine="nope", verbose=False)
+    assert isinstance(info.value.__cause__, ValueError)
@@ -0,0 +1,47 @@
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from bitboard import load_game
+from keys import state_to_key
+from qtable import QTable, canonical_obs_key, greedy_action
+from policy_file import compile_policy, CompiledPolicy
+
+
+def _positions(n, seed=0):
+    rng = random.Random(seed)
+    game = load_game("pyspiel")
+    positions = []
+    while len(positions) < n:
+        state = game.new_initial_state()
+        for _ in range(rng.randrange(0, 20)):
+            if state.is_terminal():
+                break
+            state.apply_action(rng.choice(state.legal_actions()))
+        if not state.is_terminal():
+            positions.append(state)
+    return positions
+
+
+@pytest.mark.parametrize("canonical", [None, canonical_obs_key])
+def test_compiled_policy_matches_greedy_action(tmp_path, canonical):
+    rng = random.Random(1)
+    Q = QTable(canonical=canonical)
+    positions = _positions(400)
+    # Pocos valores distintos: muchos empates, que es donde las orientaciones pueden diferir
+    for state in positions:
+        key = state_to_key(state, state.current_player())
+        for a in range(7):
+            Q.set_value(key, a, rng.choice((0.0, 0.0, 0.5, -0.5)))
+    path = str(tmp_path / "policy.c4p")
+    compile_policy(Q, path)
+    policy = CompiledPolicy(path)
+    flipped = 0
+    for state in positions:
+        key = state_to_key(state, state.current_player())
+        flipped += canonical is not None and canonical(key)[1]
+        assert policy.act(state) == greedy_action(Q, key, state.legal_actions())
+    assert canonical is None or flipped
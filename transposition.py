@@ -0,0 +1,70 @@
+# Tabla de transposicion acotada para la busqueda alfa-beta (minimax.py).
+# Cada cubeta tiene dos entradas: una que prefiere la busqueda mas profunda y otra que siempre se reemplaza,
+# asi las posiciones caras de recalcular sobreviven y las recientes igual quedan guardadas.
+
+# Tipo de cota del valor guardado
+EXACT = 0   # valor exacto dentro de la ventana (alpha, beta)
+LOWER = 1   # fallo alto: el valor real es >= value
+UPPER = 2   # fallo bajo: el valor real es <= value
+
+# Memoria aproximada de una entrada (tupla de 5 elementos + enteros/float + puntero en la lista)
+ENTRY_BYTES = 200
+
+
+def position_hash(state):
+    """
+    Hash de la posicion: usa hash_key() de BitboardState o ZobristState si existe; para un estado
+    de pyspiel sin envolver recurre al string del tablero (mas lento, pero no requiere cambios).
+    """
+    hash_key = getattr(state, "hash_key", None)
+    if hash_key is not None:
+        return hash_key()
+    return hash(str(state))
+
+
+class TranspositionTable:
+    """
+    Entradas (llave, valor, profundidad, tipo_de_cota, mejor_accion) en dos arreglos de cubetas:
+      - deep: se reemplaza solo por una busqueda de igual o mayor profundidad (o la misma posicion)
+      - recent: se reemplaza siempre
+    max_bytes limita la memoria total (numero de cubetas = max_bytes / (2 * ENTRY_BYTES)).
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.num_buckets = max(1, max_bytes // (2 * ENTRY_BYTES))
+        self.deep = [None] * self.num_buckets
+        self.recent = [None] * self.num_buckets
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        """Devuelve la entrada (key, value, depth, flag, move) de `key` o None."""
+        self.probes += 1
+        i = key % self.num_buckets
+        entry = self.deep[i]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = self.recent[i]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, value, depth, flag, move):
+        i = key % self.num_buckets
+        entry = (key, value, depth, flag, move)
+        deep = self.deep[i]
+        if deep is None or deep[0] == key or depth >= deep[2]:
+            self.deep[i] = entry
+        else:
+            self.recent[i] = entry
+
+    def clear(self):
+        self.deep = [None] * self.num_buckets
+        self.recent = [None] * self.num_buckets
+        self.probes = 0
+        self.hits = 0
+
+    def __len__(self):
+        return sum(e is not None for e in self.deep) + sum(e is not None for e in self.recent)
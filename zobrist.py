@@ -0,0 +1,110 @@
+import random
+
+# Hash de Zobrist para Conecta 4: cada (jugador, columna, fila) tiene un numero aleatorio fijo y la llave
+# de una posicion es el XOR de los numeros de sus fichas. Al aplicar una accion la llave se actualiza con
+# un solo XOR (la ficha cae en la altura actual de la columna), sin volver a serializar el tablero.
+#
+# Se mantiene en paralelo el hash de la posicion reflejada (columna c -> 6 - c), asi la llave entregada
+# ya indica cual de las dos orientaciones es la canonica:
+#     llave = ((min(hash, hash_espejo) ^ jugador) << 1) | reflejada
+# Una QTable normal usa la llave tal cual (una posicion y su espejo solo difieren en el bit bajo) y una
+# QTable con canonical=split_zobrist_key comparte la fila entre ambas (ver qtable.QTable).
+
+NUM_ROWS = 6
+NUM_COLS = 7
+
+# Semilla fija: las llaves deben ser las mismas entre ejecuciones para poder reutilizar tablas guardadas
+_rng = random.Random(0xC0FFEE)
+
+# ZOBRIST[jugador][columna][fila], 62 bits para que la llave empaquetada quepa en 63
+ZOBRIST = [[[_rng.getrandbits(62) for _ in range(NUM_ROWS)] for _ in range(NUM_COLS)] for _ in range(2)]
+
+# Perspectiva desde la que se mira la posicion (el `player` de state_to_key)
+PLAYER_KEYS = [_rng.getrandbits(62) for _ in range(2)]
+
+
+def pack_key(h, h_mirror, player):
+    """Empaqueta el hash de la posicion y el de su espejo en la llave de 63 bits descrita arriba."""
+    if h_mirror < h:
+        return ((h_mirror ^ PLAYER_KEYS[player]) << 1) | 1
+    return (h ^ PLAYER_KEYS[player]) << 1
+
+
+def split_zobrist_key(key):
+    """Funcion `canonical` para QTable con llaves de Zobrist: (llave canonica, reflejada?)."""
+    return key >> 1, bool(key & 1)
+
+
+class ZobristState:
+    """
+    Envoltorio delgado sobre un estado (pyspiel o bitboard) que actualiza el hash de Zobrist
+    en cada apply_action. El resto de los metodos se delegan al estado envuelto.
+    """
+
+    __slots__ = ("state", "hash", "mirror_hash", "_heights", "_player")
+
+    def __init__(self, state):
+        self.state = state
+        self.hash = 0
+        self.mirror_hash = 0
+        self._heights = [0] * NUM_COLS
+        self._player = 0
+        # Si el estado no es el inicial se reconstruye el hash desde su historial
+        for action in state.history():
+            self._update(action)
+
+    def _update(self, action):
+        p = self._player
+        row = self._heights[action]
+        self.hash ^= ZOBRIST[p][action][row]
+        self.mirror_hash ^= ZOBRIST[p][NUM_COLS - 1 - action][row]
+        self._heights[action] = row + 1
+        self._player = 1 - p
+
+    def apply_action(self, action):
+        self._update(action)
+        self.state.apply_action(action)
+
+    def undo_action(self, player, action):
+        self.state.undo_action(player, action)
+        row = self._heights[action] - 1
+        self._heights[action] = row
+        self.hash ^= ZOBRIST[player][action][row]
+        self.mirror_hash ^= ZOBRIST[player][NUM_COLS - 1 - action][row]
+        self._player = player
+
+    def clone(self):
+        other = ZobristState.__new__(ZobristState)
+        other.state = self.state.clone()
+        other.hash = self.hash
+        other.mirror_hash = self.mirror_hash
+        other._heights = self._heights[:]
+        other._player = self._player
+        return other
+
+    def state_key(self, player):
+        """Llave entera de la posicion vista por `player` (reemplaza a SARSA.state_to_key)."""
+        return pack_key(self.hash, self.mirror_hash, player)
+
+    def hash_key(self):
+        """Hash de la posicion con el jugador en turno (para tablas de transposicion)."""
+        return self.hash ^ PLAYER_KEYS[self._player]
+
+    def __getattr__(self, name):
+        return getattr(self.state, name)
+
+    def __str__(self):
+        return str(self.state)
+
+
+class ZobristGame:
+    """Envuelve un juego para que new_initial_state entregue estados ZobristState."""
+
+    def __init__(self, game):
+        self.game = game
+
+    def new_initial_state(self):
+        return ZobristState(self.game.new_initial_state())
+
+    def __getattr__(self, name):
+        return getattr(self.game, name)